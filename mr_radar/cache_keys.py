@@ -26,21 +26,37 @@ class CacheKeys:
     def IMAGE_PATH( self ) -> str:
         return 'image_path'
 
+    @property
+    def COMPRESSION( self ) -> str:
+        return 'compression'
+
+    @property
+    def PNG_STRATEGY( self ) -> str:
+        return 'png_strategy'
+
+    @property
+    def OPTIMIZE( self ) -> str:
+        return 'optimize'
+
     @property
     def FILE_NAME( self ) -> str | None:
 
         prev_frame = inspect.currentframe().f_back
-        calling_class = prev_frame.f_locals['self'].__class__.__name__
+        calling_classes = [ cls.__name__ for cls in prev_frame.f_locals['self'].__class__.__mro__ ]
 
-        if calling_class == 'MapGenerator':
-            return 'map_file_name'
+        if 'MapGenerator' in calling_classes:
+            return self.MAP_FILE_NAME
 
-        elif calling_class == 'FrameGenerator':
+        elif 'FrameGenerator' in calling_classes:
             return 'frames_file_name'
 
         else:
             return None
 
+    @property
+    def MAP_FILE_NAME( self ) -> str:
+        return 'map_file_name'
+
     @property
     def PRODUCT( self ) -> str:
         return 'product'
@@ -49,5 +65,41 @@ class CacheKeys:
     def FRAMES( self ) -> str:
         return 'frames'
 
+    @property
+    def INDEXED( self ) -> str:
+        return 'indexed'
+
+    @property
+    def LABELS( self ) -> str:
+        return 'labels'
+
+    @property
+    def MEMORY_BUDGET( self ) -> str:
+        return 'memory_budget'
+
+    @property
+    def SITES_COORDS( self ) -> str:
+        return 'sites_coords'
+
+    @property
+    def MOSAIC_RESOLUTION( self ) -> str:
+        return 'mosaic_resolution'
+
+    @property
+    def TOPOGRAPHY( self ) -> str:
+        return 'topography'
+
+    @property
+    def LAYERED( self ) -> str:
+        return 'layered'
+
+    @property
+    def SOURCE_RADIUS( self ) -> str:
+        return 'source_radius'
+
+    @property
+    def NEWEST_SCAN( self ) -> str:
+        return 'newest_scan'
+
 
 RadarCacheKeys = CacheKeys()
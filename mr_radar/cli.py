@@ -20,8 +20,8 @@ def main():
 
     parser.add_argument(
         'command',
-        choices=[ 'map', 'frames', 'dump-products', 'dump-vars' ],
-        help='The command to specify whether to generate the base map or NEXRAD radar imagery frames, or dump a list of available radar products for the given site'
+        choices=[ 'map', 'frames', 'update', 'mosaic', 'serve-http', 'dump-products', 'dump-vars' ],
+        help='The command to specify whether to generate the base map, NEXRAD radar imagery frames, frames for only those sites with new scans or a multi-site mosaic, serve generated images over HTTP, or dump a list of available radar products for the given site'
     )
 
     parser.add_argument(
@@ -68,8 +68,123 @@ def main():
     parser.add_argument(
         '-p', '--product',
         type=str,
+        nargs='+',
         dest='product',
-        help='The radar product to use for generating NEXRAD frames.  Default: Reflectivity'
+        metavar='PRODUCT[=NAME]',
+        help='One or more radar products to use for generating NEXRAD frames, each optionally saved under its own file name.  Default: Reflectivity'
+    )
+
+    parser.add_argument(
+        '--memory-budget',
+        type=int,
+        dest='memory_budget',
+        metavar='MB',
+        help='Fetch radar data in batches that keep roughly this many megabytes in memory, instead of all at once.  0 turns it off.  Default: off'
+    )
+
+    parser.add_argument(
+        '-s', '--sites',
+        type=str,
+        nargs='+',
+        dest='sites',
+        metavar='SITE',
+        help='Additional radar sites to composite with SITE for the mosaic command, or to check for new scans along with SITE for the update command'
+    )
+
+    parser.add_argument(
+        '--bbox',
+        type=float,
+        nargs=4,
+        dest='bbox',
+        metavar=( 'WEST', 'SOUTH', 'EAST', 'NORTH' ),
+        help='The regional bounding box for the mosaic command, in degrees.  Default: the radius around every site'
+    )
+
+    parser.add_argument(
+        '--resolution',
+        type=float,
+        dest='resolution',
+        help='The cell size in degrees of the composited mosaic grid.  Default: 0.02'
+    )
+
+    parser.add_argument(
+        '--host',
+        type=str,
+        dest='host',
+        help=f'The address the serve-http command listens on.  Default: {"0.0.0.0" if is_dockerized() else "127.0.0.1"}'
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        dest='port',
+        help='The port the serve-http command listens on.  Default: 8080'
+    )
+
+    parser.add_argument(
+        '--compression',
+        type=int,
+        dest='compression',
+        help='The zlib compression level (0-9) for PNG files.  Default: 6'
+    )
+
+    parser.add_argument(
+        '--png-strategy',
+        choices=[ 'default', 'filtered', 'huffman', 'rle', 'fixed' ],
+        dest='png_strategy',
+        help='The zlib strategy used when compressing PNG files.  Default: default'
+    )
+
+    parser.add_argument(
+        '--optimize',
+        action=argparse.BooleanOptionalAction,
+        dest='optimize',
+        help='Losslessly re-compress each PNG in the background after it is written, and report the bytes saved.  Default: off'
+    )
+
+    parser.add_argument(
+        '--indexed',
+        action=argparse.BooleanOptionalAction,
+        dest='indexed',
+        help='Save NEXRAD frames as 8-bit palette-indexed PNGs, which are several times smaller than full RGBA.  Default: off'
+    )
+
+    parser.add_argument(
+        '--topography',
+        choices=[ 'contour', 'raster', 'hillshade' ],
+        dest='topography',
+        help='How the map draws terrain: filled contours, or a much faster raster at the output resolution, optionally with relief shading.  Default: contour'
+    )
+
+    parser.add_argument(
+        '--source-radius',
+        type=int,
+        dest='source_radius',
+        metavar='MILES',
+        help='Map mode: fetch the data for each layer of the map out to this radius, so maps at any radius up to it can be cut from it without querying EDEX again.  Set it to the largest radius the site is mapped at.  Default: the radius'
+    )
+
+    parser.add_argument(
+        '--layered',
+        action=argparse.BooleanOptionalAction,
+        dest='layered',
+        help='Render each layer of the map to its own transparent PNG and stack them into the map, so that only the layers whose inputs changed are rendered again.  Default: off'
+    )
+
+    parser.add_argument(
+        '--rebuild-layers',
+        nargs='+',
+        choices=[ 'topography', 'borders', 'highways', 'lakes', 'rivers', 'cities' ],
+        dest='rebuild_layers',
+        metavar='LAYER',
+        help='Draw these layers from freshly fetched data rather than that saved for the site, such as to pick up fresh city data.  With --layered, they are also rendered again even if their inputs are unchanged'
+    )
+
+    parser.add_argument(
+        '--labels',
+        action=argparse.BooleanOptionalAction,
+        dest='labels',
+        help='Draw the site, product and timestamp into each NEXRAD frame.  With --no-labels they are only listed in the manifest, and the viewer overlays them.  Default: on'
     )
 
     args = vars( parser.parse_args( args=None if sys.argv[2:] else ['--help'] ) )
@@ -86,11 +201,54 @@ def main():
         elif command == 'map':
             args.pop( 'frames' )
             args.pop( 'product' )
+            args.pop( 'indexed' )
+            args.pop( 'labels' )
+            for arg in [ 'sites', 'bbox', 'resolution' ]:
+                args.pop( arg )
 
             from .map_generator import MapGenerator
             generator = MapGenerator( **args )
 
+        elif command == 'serve-http':
+            from .radar_loop_generator import RadarLoopGenerator
+            from .frame_server import serve
+
+            # Each site is served from wherever its JSON cache says its images are
+            directories = {}
+            for site in [ args['site_id'], *( args['sites'] or [] ) ]:
+                image_dir = args['image_dir'] if site == args['site_id'] else None
+                site_generator = RadarLoopGenerator( site_id=site, output_path=args['output_path'], image_dir=image_dir )
+                directories[site_generator.output_name] = site_generator.image_path
+
+            serve( directories, args['host'], args['port'] )
+
+        elif command == 'mosaic':
+            from .mosaic_generator import MosaicGenerator
+            generator = MosaicGenerator( **args )
+
+        elif command == 'update':
+            from .frame_generator import FrameGenerator
+
+            sites = [ args['site_id'], *( args['sites'] or [] ) ]
+            for arg in [ 'site_id', 'sites', 'bbox', 'resolution' ]:
+                args.pop( arg )
+
+            image_dir = args.pop( 'image_dir' )
+            generators = [ FrameGenerator( site_id=site, image_dir=image_dir if site == sites[0] else None, **args ) for site in sites ]
+
+            # One site's failure shouldn't keep the others from updating
+            for generator in FrameGenerator.fresh( generators ):
+                try:
+                    generator.generate()
+                except RLGException as e:
+                    logger.error( "Image generation for {} aborted: {}", generator.site_id, e )
+
+            generator = None
+
         elif command in [ 'frames', 'dump-products' ]:
+            for arg in [ 'sites', 'bbox', 'resolution' ]:
+                args.pop( arg )
+
             from .frame_generator import FrameGenerator
             generator = FrameGenerator( **args )
 
@@ -0,0 +1,124 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import TYPE_CHECKING
+
+import os
+import numpy as np
+from pathlib import Path
+
+if TYPE_CHECKING:
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+
+
+class ColormapLUT:
+    """
+    A precomputed RGBA lookup table for a discrete colormap: the bin
+    boundaries, followed by one color per bin and then the under, over and
+    bad colors.  It can be saved once per install and turned back into a
+    norm and colormap without rebuilding the colortable from metpy.
+    """
+
+    def __init__( self, key: str, boundaries: np.ndarray, colors: np.ndarray ) -> None:
+        self.key = key
+        self.boundaries = np.asarray( boundaries, dtype=np.float64 )
+        self.colors = np.asarray( colors, dtype=np.float64 )
+
+        if len( self.colors ) != len( self.boundaries ) - 1 + 3:
+            raise ValueError( 'The colormap LUT needs one color per bin, plus under, over and bad colors' )
+
+
+    @property
+    def bins( self ) -> int:
+        return len( self.boundaries ) - 1
+
+
+    @property
+    def under_index( self ) -> int:
+        return self.bins
+
+
+    @property
+    def over_index( self ) -> int:
+        return self.bins + 1
+
+
+    @property
+    def bad_index( self ) -> int:
+        return self.bins + 2
+
+
+    @classmethod
+    def from_colormap( cls, key: str, norm: BoundaryNorm, cmap: ListedColormap ) -> ColormapLUT:
+        colors = np.vstack( [ cmap( np.arange( cmap.N ) ), cmap.get_under(), cmap.get_over(), cmap.get_bad() ] )
+        return cls( key, norm.boundaries, colors )
+
+
+    @classmethod
+    def load( cls, file: str | Path ) -> ColormapLUT:
+        with np.load( file ) as data:
+            return cls( str( data['key'] ), data['boundaries'], data['colors'] )
+
+
+    def save( self, file: str | Path ) -> None:
+
+        file = Path( file )
+        file.parent.mkdir( parents=True, exist_ok=True )
+
+        # np.savez() adds '.npz' to names that don't already end with it
+        temp_file = file.with_name( f".{file.stem}.tmp.npz" )
+        np.savez( temp_file, key=self.key, boundaries=self.boundaries, colors=self.colors )
+        os.replace( temp_file, file )
+
+
+    def to_colormap( self ) -> ( BoundaryNorm, ListedColormap ):
+        """The norm and colormap to hand to matplotlib, equivalent to the ones this LUT was built from"""
+
+        from matplotlib.colors import BoundaryNorm, ListedColormap
+
+        cmap = ListedColormap( self.colors[:self.bins], name=self.key ).with_extremes(
+            under = self.colors[self.under_index],
+            over  = self.colors[self.over_index],
+            bad   = self.colors[self.bad_index]
+        )
+
+        return BoundaryNorm( self.boundaries, self.bins ), cmap
+
+
+    def indices( self, data: np.ndarray ) -> np.ndarray:
+        """Maps each value to its row in `colors`, the same way BoundaryNorm would"""
+
+        data = np.ma.masked_invalid( data )
+        values = np.ma.getdata( data )
+
+        indices = np.searchsorted( self.boundaries, values, side='right' ) - 1
+        indices[ values < self.boundaries[0] ] = self.under_index
+        indices[ values >= self.boundaries[-1] ] = self.over_index
+        indices[ np.ma.getmaskarray( data ) ] = self.bad_index
+
+        return indices
+
+
+    def visible( self, data: np.ndarray ) -> bool:
+        """Whether any value in a grid would be drawn in a color that isn't fully transparent"""
+
+        opaque = self.colors[:, 3] > 0
+
+        if opaque.all():
+            return bool( np.size( data ) )
+
+        # Usually only the bad color is transparent, so any valid value at all is visible
+        if opaque[:self.bad_index].all():
+            return bool( np.ma.masked_invalid( data ).count() )
+
+        return bool( opaque[ self.indices( data ) ].any() )
+
+
+    def apply( self, data: np.ndarray, alpha: float=1.0 ) -> np.ndarray:
+        """Colors a grid of values as 8-bit RGBA, truncating to bytes the same way matplotlib does"""
+
+        colors = self.colors.copy()
+        colors[:, 3] *= alpha
+        colors = ( colors * 255 ).astype( np.uint8 )
+
+        return colors[ self.indices( data ) ]
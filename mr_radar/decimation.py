@@ -0,0 +1,58 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+
+
+# A grid is only reduced along an axis when nearly all of its cells are
+# smaller than a pixel along it, so the coarse far-range cells of a radial
+# scan never get merged into something bigger than they already were
+CELL_SIZE_QUANTILE = 0.9
+
+
+def decimation_factor( lons: np.ndarray, lats: np.ndarray, pixels_per_degree: float ) -> ( int, int ):
+    """How many cells along each axis of the grid fit in one output pixel"""
+
+    factors = []
+    for axis in ( 0, 1 ):
+        if lons.shape[axis] < 2:
+            factors.append( 1 )
+            continue
+
+        cell_size = np.hypot( np.diff( lons, axis=axis ), np.diff( lats, axis=axis ) ) * pixels_per_degree
+        cell_size = np.nanquantile( cell_size, CELL_SIZE_QUANTILE ) if np.isfinite( cell_size ).any() else 1.0
+
+        # Rounded slightly up first, so evenly spaced cells of exactly 1/n pixels come out as n
+        factors.append( max( 1, int( 1.0 / cell_size + 1e-6 ) ) if cell_size > 0 else 1 )
+
+    return tuple( factors )
+
+
+def decimate( lons: np.ndarray, lats: np.ndarray, data: np.ndarray, factor: ( int, int ) ) -> ( np.ndarray, np.ndarray, np.ma.MaskedArray ):
+    """
+    Reduces a grid by `factor` cells along each axis.  Each block keeps its
+    highest unmasked value, so storm cores survive, and is placed at the
+    mean position of the cells it replaces.
+    """
+
+    fy, fx = factor
+    data = np.ma.masked_invalid( data )
+
+    if fy == 1 and fx == 1:
+        return lons, lats, data
+
+    height, width = data.shape
+    pad = ( ( 0, -height % fy ), ( 0, -width % fx ) )
+
+    data = np.ma.array( np.pad( data.filled( 0 ), pad ), mask=np.pad( np.ma.getmaskarray( data ), pad, constant_values=True ) )
+    lons = np.pad( lons, pad, mode='edge' )
+    lats = np.pad( lats, pad, mode='edge' )
+
+    blocks = ( data.shape[0] // fy, fy, data.shape[1] // fx, fx )
+
+    return (
+        lons.reshape( blocks ).mean( axis=( 1, 3 ) ),
+        lats.reshape( blocks ).mean( axis=( 1, 3 ) ),
+        data.reshape( blocks ).max( axis=( 1, 3 ) )
+    )
@@ -3,21 +3,37 @@
 from __future__ import annotations
 
 import re
+from io import BytesIO
+from contextlib import contextmanager
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterator, TYPE_CHECKING
 
 from loguru import logger
-from matplotlib import pyplot
-from matplotlib.cm import ScalarMappable
-from metpy.plots import ctables
-from awips.dataaccess import IGridData, IDataRequest, DataAccessLayer
 
 from .rlg_defaults import RLGDefaults
 from .cache_keys import RadarCacheKeys
-from .radar_loop_generator import RadarLoopGenerator
+from .radar_loop_generator import RadarLoopGenerator, data_access_layer
+from .frame_manifest import FrameManifest
+from .radar_frame import RadarFrame
+from .radar_products import RadarProduct, ProductStyle, REFLECTIVITY_STYLE
+from .run_config import FrameConfig
+from .viewer import write_viewer
 from .rlg_exception import *
 
+if TYPE_CHECKING:
+    import numpy as np
+    from matplotlib.colors import BoundaryNorm, ListedColormap
+    from matplotlib.text import Text
+    from awips.dataaccess import IGridData, IDataRequest
+    from .colormap_lut import ColormapLUT
+    from .indexed_palette import IndexedPalette
+    from .grid_batches import GridBatches
 
-NORM, CMAP = ctables.registry.get_with_steps( 'NWSStormClearReflectivity', -20, 0.5 )
+
+FRAME_ALPHA = 0.75
+
+FRAME_ENCODINGS = [ 'png', 'rgba' ]
 
 PNG_METADATA = {
     'Creation Time' : '',
@@ -27,17 +43,77 @@ PNG_METADATA = {
     'Copyright'     : 'Public Domain'
 }
 
+
+@lru_cache( maxsize=None )
+def colormap_lut( style: ProductStyle=REFLECTIVITY_STYLE, shared_path: str=None ) -> ColormapLUT:
+    """
+    The lookup table for a product style, built once per process, and once
+    per install when `shared_path` is given.  Building it needs metpy.plots,
+    which takes seconds to import, so a saved table is preferred as long as
+    its key still matches the colormap settings.
+    """
+
+    from .colormap_lut import ColormapLUT
+
+    lut_file = Path( shared_path, f"{style.key}.npz" ) if shared_path else None
+
+    if lut_file and lut_file.is_file():
+        try:
+            lut = ColormapLUT.load( lut_file )
+            if lut.key == style.key:
+                return lut
+        except ( OSError, ValueError, KeyError ) as e:
+            logger.warning( "Rebuilding unreadable colormap LUT {}: {}", lut_file.name, e )
+
+    from metpy.plots import ctables
+    norm, cmap = ctables.registry.get_with_steps( style.colormap, style.start, style.step )
+    lut = ColormapLUT.from_colormap( style.key, norm, cmap )
+
+    if lut_file:
+        lut.save( lut_file )
+        logger.info( "→ Saved colormap LUT {}", lut_file.name )
+
+    return lut
+
+
+@lru_cache( maxsize=None )
+def colormap( style: ProductStyle=REFLECTIVITY_STYLE, shared_path: str=None ) -> ( BoundaryNorm, ListedColormap ):
+    return colormap_lut( style, shared_path ).to_colormap()
+
+
+@lru_cache( maxsize=None )
+def indexed_palette( style: ProductStyle=REFLECTIVITY_STYLE, shared_path: str=None ) -> IndexedPalette:
+    """Shared by every indexed frame of a product style, see `--indexed`"""
+    from .indexed_palette import IndexedPalette
+    return IndexedPalette( colormap_lut( style, shared_path ).colors, FRAME_ALPHA )
+
+
 class FrameGenerator( RadarLoopGenerator ):
 
-    def __init__( self, name: str=None, product: str=None, frames: int=None, **kwargs ) -> None:
+    def __init__( self, name: str=None, product: str | [ str ]=None, frames: int=None, indexed: bool=None,
+                  memory_budget: int=None, labels: bool=None, **kwargs ) -> None:
         super().__init__( **kwargs )
+        self._current_product = None
+        self._decimation = ( 1, 1 )
+        self._crops = {}
+        self._blank_frames = {}
+        self._newest_scan = None
         self.product = product
         self.frames = frames
+        self.indexed = indexed
+        self.labels = labels
+        self.memory_budget = memory_budget
         self.file_name = ( name or RLGDefaults.frame_file_name )
+        self.manifests = {}
 
 
     @property
     def file_name( self ) -> str:
+        """While a product is being rendered, file names are that product's"""
+
+        if self._current_product:
+            return self._sanitize_file_name( self._current_product.file_name )
+
         return self.cache.get( RadarCacheKeys.FILE_NAME )
 
 
@@ -48,21 +124,101 @@ class FrameGenerator( RadarLoopGenerator ):
 
 
     @property
-    def product( self ) -> int:
-        return self.cache.get( RadarCacheKeys.PRODUCT, RLGDefaults.product )
+    def display_name( self ) -> str:
+        """How the radar site is named in frame labels and the viewer title"""
+        return self.site_id
+
+
+    @property
+    def base_name( self ) -> str:
+        """The file name without the frame index, e.g. 'frame' for 'frame_%d.png'"""
+        return Path( self.file_name.replace( '_%d', '' ) ).stem
+
+
+    @property
+    def manifest_file_path_name( self ) -> str:
+        return str( Path( self.image_path, self.base_name ).with_suffix( '.json' ) )
+
+
+    @property
+    def legend_file_path_name( self ) -> str:
+        return self.image_file_path_name.replace( '%d', '%s' ) % 'legend'
+
+
+    @property
+    def shared_legend_file_path_name( self ) -> str:
+        return str( Path( self.shared_path, f"{self.style.key}_legend.png" ) )
+
+
+    @property
+    def map_file_path_name( self ) -> str:
+        map_file_name = self.cache.get( RadarCacheKeys.MAP_FILE_NAME, self._sanitize_file_name( RLGDefaults.map_file_name ) )
+        return str( Path( self.image_path, map_file_name ) )
+
+
+    @property
+    def product( self ) -> str:
+        """The product being rendered, or the first one requested"""
+
+        if self._current_product:
+            return self._current_product.product
+
+        return self.product_list[0].product
 
 
     @product.setter
-    def product( self, product: int ) -> None:
+    def product( self, product: str | [ str ] ) -> None:
 
         if product is None:
             return
 
+        self._validate_product( product )
+
+        if isinstance( product, ( list, tuple ) ):
+            product = list( product ) if len( product ) > 1 else product[0]
+
         self.cache.set( RadarCacheKeys.PRODUCT, product )
 
 
+    @property
+    def products( self ) -> [ str ]:
+        """Every requested product, each as 'PRODUCT' or 'PRODUCT=NAME'"""
+
+        products = self.cache.get( RadarCacheKeys.PRODUCT, RLGDefaults.product )
+        return [ products ] if isinstance( products, str ) else products
+
+
+    @property
+    def newest_scan( self ) -> int | None:
+        """When the newest scan drawn by the last run was taken, in milliseconds since the epoch"""
+        return self.cache.get( RadarCacheKeys.NEWEST_SCAN )
+
+
+    @property
+    def product_list( self ) -> [ RadarProduct ]:
+
+        current_product = self._current_product
+        self._current_product = None
+        base_name = self.base_name
+        self._current_product = current_product
+
+        return [ RadarProduct.parse( spec, base_name, i == 0 ) for i, spec in enumerate( self.products ) ]
+
+
+    @property
+    def style( self ) -> ProductStyle:
+        return self._current_product.style if self._current_product else self.product_list[0].style
+
+
+    @property
+    def manifest( self ) -> FrameManifest | None:
+        return self.manifests.get( self.base_name )
+
+
     @property
     def frames( self ) -> int:
+        if self.config:
+            return self.config.frames
         return self.cache.get( RadarCacheKeys.FRAMES, RLGDefaults.frames )
 
 
@@ -76,25 +232,251 @@ class FrameGenerator( RadarLoopGenerator ):
         self.cache.set( RadarCacheKeys.FRAMES, quantity )
 
 
+    @property
+    def memory_budget( self ) -> int | None:
+        """Megabytes of radar data to hold at once, or None to fetch everything up front"""
+        if self.config:
+            return self.config.memory_budget
+        return self.cache.get( RadarCacheKeys.MEMORY_BUDGET, RLGDefaults.memory_budget )
+
+
+    @memory_budget.setter
+    def memory_budget( self, budget: int ) -> None:
+
+        if budget is None:
+            return
+
+        self._validate_memory_budget( budget )
+
+        # Zero turns batching back off
+        self.cache.set( RadarCacheKeys.MEMORY_BUDGET, budget or None )
+
+
+    @property
+    def indexed( self ) -> bool:
+        if self.config:
+            return self.config.indexed
+        return self.cache.get( RadarCacheKeys.INDEXED, RLGDefaults.indexed )
+
+
+    @indexed.setter
+    def indexed( self, indexed: bool ) -> None:
+
+        if indexed is None:
+            return
+
+        self.cache.set( RadarCacheKeys.INDEXED, bool( indexed ) )
+
+
+    @property
+    def labels( self ) -> bool:
+        """Whether each frame's label is drawn into its image, or only listed in the manifest"""
+        if self.config:
+            return self.config.labels
+        return self.cache.get( RadarCacheKeys.LABELS, RLGDefaults.labels )
+
+
+    @labels.setter
+    def labels( self, labels: bool ) -> None:
+
+        if labels is None:
+            return
+
+        self.cache.set( RadarCacheKeys.LABELS, bool( labels ) )
+
+
     @classmethod
     def _validate_frames( cls, frames: int ) -> None:
         if not isinstance( frames, int ) or frames < 1 or frames > 100:
             raise RLGValueError( 'The quantity of frames to generate must be an integer between 1 and 100' )
 
 
+    @classmethod
+    def _validate_memory_budget( cls, budget: int ) -> None:
+        if not isinstance( budget, int ) or budget < 0 or ( 0 < budget < 16 ):
+            raise RLGValueError( 'The memory budget must be at least 16 megabytes, or 0 for no limit' )
+
+
+    @classmethod
+    def _validate_product( cls, product: str | [ str ] ) -> None:
+
+        products = product if isinstance( product, ( list, tuple ) ) else [ product ]
+
+        if not products or not all( isinstance( p, str ) and p.partition( '=' )[0].strip() for p in products ):
+            raise RLGValueError( 'Each radar product must be a non-empty string' )
+
+
     def generate( self ) -> None:
-        logger.info( "→ Image frames will be saved as '{}'", self.image_file_path_name )
+        products = self.product_list
+
+        for product in products:
+            logger.info( "→ {} frames will be saved as '{}'", product.product, str( Path( self.image_path, product.file_name ) ) )
         logger.info( 'Generating NEXRAD image frames...' )
 
         super().generate()
 
-        response = self._fetch_data()
+        response = self._fetch_data( products )
 
-        if not response:
+        if not any( len( frames ) for frames in response.values() ):
             raise RLGRuntimeError( 'No NEXRAD data returned; aborting.' )
 
-        self._process_data( response )
-        self._cleanup()
+        # Every product is drawn on the same figure, so the map projection
+        # and axes are only set up once per run
+        self.make_figure()
+
+        for product in products:
+            if not len( response.get( product.product ) or [] ):
+                logger.warning( "No NEXRAD data returned for {}; skipping.", product.product )
+                continue
+
+            with self._rendering( product ):
+                self._process_data( response[product.product] )
+                self._cleanup()
+
+        self.close_figure()
+        self._finish_optimizing()
+
+        for product in products:
+            with self._rendering( product ):
+                if self.manifest:
+                    self._link_legend()
+                    self._generate_viewer()
+
+        if self._newest_scan:
+            self.cache.set( RadarCacheKeys.NEWEST_SCAN, self._newest_scan )
+            self.cache.dump()
+
+
+    @classmethod
+    def fresh( cls, generators: [ FrameGenerator ] ) -> [ FrameGenerator ]:
+        """
+        The generators whose sites have scanned since they last generated.
+        Sites requesting the same products are asked about together, in one
+        availability query when none of them have, by comparing its answer
+        with the last one, which is kept in the metadata cache.  The scan
+        times found for a fresh site are kept there too, so generating it
+        doesn't have to ask for them again.
+        """
+
+        from .site_availability import fresh_sites
+        from dynamicserialize.dstypes.com.raytheon.uf.common.dataquery.requests import RequestConstraint
+
+        DataAccessLayer = data_access_layer()
+
+        groups = {}
+        for generator in generators:
+            groups.setdefault( tuple( dict.fromkeys( product.product for product in generator.product_list ) ), [] ).append( generator )
+
+        fresh = set()
+        for names, group in groups.items():
+            sites = { generator.site_id: generator for generator in group }
+            first = group[0]
+
+            # Every site is assumed to scan at the same level as the first, which is how NEXRAD products are served
+            request = first._prepare_request()
+            request.setParameters( *names )
+            available_levels = first._available_levels( request, [ first.site_id, *names ] )
+            level = available_levels[0] if available_levels else None
+
+            request = DataAccessLayer.newDataRequest( 'radar' )
+            request.setParameters( *names )
+            if level:
+                request.setLevels( level )
+
+            def query( group: [ str ] ) -> list:
+                icao = group[0].lower() if len( group ) == 1 else RequestConstraint.new( 'in', [ site.lower() for site in group ] )
+                request.addIdentifier( 'icao', icao )
+                return DataAccessLayer.getAvailableTimes( request, True )
+
+            logger.info( "Checking {} sites for new {} scans...", len( sites ), ', '.join( names ) )
+
+            key = [ ','.join( sorted( sites ) ), *names, level ]
+
+            found, state = fresh_sites(
+                list( sites ),
+                { site: generator.newest_scan for site, generator in sites.items() },
+                query,
+                lambda time: time.getRefTime().getTime(),
+                first.metadata.peek( 'availability', key )
+            )
+
+            first.metadata.put( 'availability', key, state )
+
+            for site, times in found.items():
+                if len( names ) == 1 and times is not None:
+                    sites[site]._remember_times( [ site, names[0], level ], times )
+                fresh.add( sites[site] )
+
+            logger.info( "→ {} of {} have new scans", len( found ), len( sites ) )
+
+        return [ generator for generator in generators if generator in fresh ]
+
+
+    def iter_frames( self, encoding: str='png' ) -> Iterator[ RadarFrame ]:
+        """
+        Renders the latest frames of every product without writing any of
+        them to disk, yielding each as a RadarFrame whose image is encoded
+        PNG bytes (`encoding='png'`, honouring `indexed` and the compression
+        settings) or an RGBA numpy array (`encoding='rgba'`).
+
+        Nothing else is written either: the settings resolved for the run
+        aren't saved, and the colormap and EDEX's metadata are looked up in
+        memory rather than in the shared directory.
+
+        The figure is shared between frames, so each one is rendered while
+        the loop is waiting on it; break out early to skip the rest.
+        """
+
+        if encoding not in FRAME_ENCODINGS:
+            raise RLGValueError( f"The frame encoding must be one of: {', '.join( FRAME_ENCODINGS )}" )
+
+        products = self.product_list
+
+        self._start_run()
+        self._in_memory = True
+
+        try:
+            response = self._fetch_data( products )
+
+            if not any( len( frames ) for frames in response.values() ):
+                raise RLGRuntimeError( 'No NEXRAD data returned; aborting.' )
+
+            self.make_figure()
+
+            for product in products:
+                with self._rendering( product ):
+                    for frame in self._draw_frames( response.get( product.product ) or [] ):
+                        yield frame._replace( image=self._encode_frame( frame ) if encoding == 'png' else self.render_image( transparent=True ) )
+        finally:
+            self._in_memory = False
+            self.close_figure()
+
+
+    def encode_frame( self, metadata: dict ) -> bytes:
+        """The PNG bytes that save_image() would have written for the current frame"""
+
+        if self.indexed:
+            buffer = BytesIO()
+            indexed_palette( self.style, self._cache_path ).save( self.render_image( transparent=True ), buffer, metadata, **self.png_options )
+            return buffer.getvalue()
+
+        return self.encode_image( transparent=True, metadata=metadata )
+
+
+    def _encode_frame( self, frame: RadarFrame ) -> bytes:
+        """
+        Without a label, every empty frame of a product renders identically,
+        so it's only encoded once per run
+        """
+
+        if not frame.empty or self.labels:
+            return self.encode_frame( frame.metadata )
+
+        key = tuple( frame.metadata.items() )
+        if key not in self._blank_frames:
+            self._blank_frames[key] = self.encode_frame( frame.metadata )
+
+        return self._blank_frames[key]
 
 
     def dump_products( self ) -> None:
@@ -113,118 +495,342 @@ class FrameGenerator( RadarLoopGenerator ):
             print( f"\t{index}. {product}" )
 
 
+    def save_frame( self, frame: RadarFrame ) -> str:
+        """Saves a drawn frame, copying empty unlabelled frames from the one already encoded"""
+
+        if not frame.empty or self.labels:
+            return self.save_image( frame.index, frame.metadata )
+
+        file_path_name = self.image_file_path_name % frame.index
+
+        Path( self.image_path ).mkdir( parents=True, exist_ok=True )
+        Path( file_path_name ).write_bytes( self._encode_frame( frame ) )
+        self._optimize_later( file_path_name )
+
+        return Path( file_path_name ).name
+
+
     def save_image( self, index: int, metadata: dict ) -> str:
 
         file_path_name = self.image_file_path_name % index
 
-        super().save_image( file=file_path_name, transparent=True, metadata=metadata )
+        if self.indexed:
+            Path( self.image_path ).mkdir( parents=True, exist_ok=True )
+            indexed_palette( self.style, self.shared_path ).save( self.render_image( transparent=True ), file_path_name, metadata, **self.png_options )
+            self._optimize_later( file_path_name )
+        else:
+            super().save_image( file=file_path_name, transparent=True, metadata=metadata )
 
         return Path( file_path_name ).name
 
 
+    @contextmanager
+    def _rendering( self, product: RadarProduct ):
+        """Points file names, style and manifest at one product for the duration"""
+
+        self._current_product = product
+        try:
+            yield product
+        finally:
+            self._current_product = None
+
+
+    def _make_config( self ) -> FrameConfig:
+        settings = self._config_settings()
+
+        return FrameConfig(
+            **settings,
+            frames        = self.frames,
+            indexed       = self.indexed,
+            labels        = self.labels,
+            memory_budget = self.memory_budget
+        )
+
+
+    def make_figure( self ) -> None:
+        super().make_figure()
+        self._blank_frames.clear()
+
+
     def _prepare_request( self ) -> IDataRequest:
         logger.info( 'Preparing NEXRAD data request...' )
 
-        request = DataAccessLayer.newDataRequest( 'radar', envelope=self.image_envelope )
+        request = data_access_layer().newDataRequest( 'radar', envelope=self.image_envelope )
         request.addIdentifier( 'icao', self.site_id.lower() )
 
         return request
 
 
     def _fetch_product_list( self ) -> [ str ]:
-        request = self._prepare_request()
-        available_parameters = DataAccessLayer.getAvailableParameters( request )
-        return DataAccessLayer.getRadarProductNames( available_parameters )
+
+        def fetch() -> [ str ]:
+            DataAccessLayer = data_access_layer()
+            request = self._prepare_request()
+            available_parameters = DataAccessLayer.getAvailableParameters( request )
+            return list( DataAccessLayer.getRadarProductNames( available_parameters ) )
+
+        return self.metadata.get( 'products', [ self.site_id ], fetch )
 
 
-    def _fetch_data( self ) -> [ IGridData ]:
+    def _fetch_data( self, products: [ RadarProduct ] ) -> { str: GridBatches }:
+        """
+        Looks up the latest frames of every product, using one level query
+        for all of them; only the time query is per-product, since each
+        product has its own scan times.  Without a memory budget, every grid
+        is then fetched in one request.  With one, each product's grids are
+        fetched in batches as they're drawn.
+        """
 
+        from .grid_batches import GridBatches, grid_nbytes
+
+        DataAccessLayer = data_access_layer()
         request = self._prepare_request()
 
-        request.setParameters( self.product )
-        logger.info( "→ Product: {}", self.product )
+        names = list( dict.fromkeys( product.product for product in products ) )
+
+        request.setParameters( *names )
+        logger.info( "→ Products: {}", ', '.join( names ) )
 
-        available_levels = DataAccessLayer.getAvailableLevels( request )
+        available_levels = self._available_levels( request, [ self.site_id, *names ] )
         logger.info( "→ Available levels: {}", len( available_levels ) )
 
+        level = None
         if available_levels:
             level = available_levels[0]
             request.setLevels( level )
             logger.info( "    ...using {}", level )
 
         logger.info( '→ Fetching available times...' )
-        times = DataAccessLayer.getAvailableTimes( request, True )
-        logger.info( "    ...got {}, but we only need {}", len( times ), self.frames )
+
+        wanted = {}
+        for name in names:
+            request.setParameters( name )
+            times = self._available_times( request, [ self.site_id, name, level ] )
+            wanted[name] = times[-self.frames:][::-1]
+            logger.info( "    ...got {} for {}, but we only need {}", len( times ), name, self.frames )
+
+        # Recorded once the frames are saved, so the next run can tell whether anything has scanned since
+        self._newest_scan = max( ( wanted[name][0].getRefTime().getTime() for name in names if wanted[name] ), default=None )
 
         logger.info( '...done.' )
 
+        if self.memory_budget:
+            logger.info( "→ Fetching NEXRAD images in batches to stay within {} MB", self.memory_budget )
+
+            def fetcher( name: str ) -> callable:
+                def fetch( times: list ) -> [ IGridData ]:
+                    request.setParameters( name )
+                    return self._order_grids( DataAccessLayer.getGridData( request, times ), name, times )
+                return fetch
+
+            return {
+                name: GridBatches( wanted[name], fetcher( name ), grid_nbytes, self.memory_budget * 2**20 )
+                for name in names
+            }
+
         # Get the latest images
+        times = { str( time ): time for name in names for time in wanted[name] }
+        times = sorted( times.values(), key=lambda time: time.getRefTime().getTime() )
+
         logger.info( "Fetching latest {} NEXRAD images...", self.frames )
-        response = DataAccessLayer.getGridData( request, times[-self.frames:] )
+        request.setParameters( *names )
+        grids = { ( grid.getParameter(), str( grid.getDataTime() ) ): grid for grid in ( DataAccessLayer.getGridData( request, times ) if times else [] ) }
         logger.info( '...done.' )
 
-        return response
+        # Grids are handed over from the shared response as they're drawn, so each one can be freed afterwards
+        def collector( name: str ) -> callable:
+            def collect( times: list ) -> [ IGridData ]:
+                return [ grid for grid in ( grids.pop( ( name, str( time ) ), None ) for time in times ) if grid ]
+            return collect
+
+        return { name: GridBatches( wanted[name], collector( name ), grid_nbytes ) for name in names }
 
 
-    def _process_data( self, response: [ IGridData ] ) -> None:
+    @classmethod
+    def _order_grids( cls, grids: [ IGridData ], name: str, times: list ) -> [ IGridData ]:
+        """The grids of one product, in the same order as `times`"""
+        by_time = { str( grid.getDataTime() ): grid for grid in grids if grid.getParameter() == name }
+        return [ by_time[str( time )] for time in times if str( time ) in by_time ]
+
+
+    def _process_data( self, response: GridBatches ) -> None:
 
         if not self.frames:
             raise RLGValueError( 'The quantity of frames to generate has not been set' )
 
-        logger.info( 'Processing images...' )
+        logger.info( "Processing {} images...", self.product )
+
+        self.manifests[self.base_name] = FrameManifest(
+            self.display_name, self.product, RLGDefaults.frame_delay, RLGDefaults.last_frame_delay, labels=self.labels,
+            primary=( self.base_name == self.product_list[0].name ), units=self.style.label
+        )
 
-        # The response list is in order from oldest to newest, so we
-        # should iterate backwards to make `frame_0.png` the latest
-        for i, grid in enumerate( response[::-1] ):
-            self._process_frame( i, grid )
+        for frame in self._draw_frames( response ):
+            file_name = self.save_frame( frame )
+            self.manifest.add_frame( Path( self.image_path, file_name ), frame.time, frame.label, frame.empty )
+            logger.info( "→ Saved {}{}", file_name, ' (no echoes)' if frame.empty else '' )
 
         self._generate_legend()
 
         logger.info( '...done!' )
 
 
-    def _process_frame( self, i: int, grid: IGridData ) -> None:
+    def _draw_frames( self, response: GridBatches ) -> Iterator[ RadarFrame ]:
+        """
+        Draws each frame onto the shared figure in turn, newest first so that
+        `frame_0.png` is the latest, and clears it off again once the caller
+        is done with it
+        """
+
+        for i, source in enumerate( response ):
+            artists, frame = self._draw_frame( i, source )
+
+            try:
+                yield frame
+            finally:
+                # Leave the figure ready for the next frame
+                for artist in artists:
+                    artist.remove()
+
+
+    def _draw_frame( self, i: int, grid: IGridData ) -> ( list, RadarFrame ):
 
         lons, lats = grid.getLatLonCoords()
-        data = grid.getRawData()
+        lons, lats, data = self._crop_to_bounds( lons, lats, grid.getRawData() )
 
-        self.make_figure()
+        artists = []
 
-        self.axes.pcolormesh( lons, lats, data, cmap=CMAP, norm=NORM, alpha=0.75 )
+        # On a quiet day most scans have no echoes at all, so there's no mesh to build; the frame still gets its label
+        empty = not colormap_lut( self.style, self._cache_path ).visible( data )
 
-        text_x = ( self.axes.viewLim.x0 + self.axes.viewLim.x1 ) / 2.0
-        text_y = self.axes.viewLim.y0 * 1.0025
-        date_time = f"%s GMT" % str( grid.getDataTime().getRefTime() )
+        if not empty:
+            lons, lats, data = self._fit_to_output( lons, lats, data )
+            norm, cmap = colormap( self.style, self._cache_path )
+            artists.append( self.axes.pcolormesh( lons, lats, data, cmap=cmap, norm=norm, alpha=FRAME_ALPHA ) )
 
         values = ( self.site_id, grid.getParameter(), grid.getLevel() or 'N/A' )
+        label, date_time = self._frame_label( grid, values )
+
+        if self.labels:
+            artists.append( self._draw_label( label ) )
+
+        metadata = self._frame_metadata( date_time, "Site: %s, Product: %s, Level: %s" % values )
+
+        data_time = grid.getDataTime()
+        frame = RadarFrame( i, self.product, data_time, data_time.getRefTime().getTime(), label, metadata, empty=empty )
+
+        return artists, frame
+
+
+    def _crop_to_bounds( self, lons: np.ndarray, lats: np.ndarray, data: np.ndarray ) -> ( np.ndarray, np.ndarray, np.ndarray ):
+        """
+        Drops the rows and columns of a grid that fall outside the image,
+        since a radial product covers the radar's full range whatever the
+        envelope was.  Every scan from a site shares its geometry, so the
+        crop is worked out once.
+        """
+
+        import numpy as np
+        from .grid_crop import crop_slices, geometry_key
+
+        lons = np.asarray( lons )
+        lats = np.asarray( lats )
+
+        key = geometry_key( lons, lats )
+        if key not in self._crops:
+            self._crops[key] = crop_slices( lons, lats, self.image_bbox )
+
+            rows, cols = self._crops[key]
+            logger.info( "→ Cropping {}x{} grid to {}x{} inside the image bounds", *lons.shape, rows.stop - rows.start, cols.stop - cols.start )
+
+        rows, cols = self._crops[key]
+
+        return lons[rows, cols], lats[rows, cols], data[rows, cols]
+
+
+    def _fit_to_output( self, lons: np.ndarray, lats: np.ndarray, data: np.ndarray ) -> ( np.ndarray, np.ndarray, np.ndarray ):
+        """
+        Grids with more cells than the frame has pixels are reduced, once
+        cropped to the image, so pcolormesh only builds as many polygons as
+        can actually be seen
+        """
+
+        from .decimation import decimation_factor, decimate
+
+        factor = decimation_factor( lons, lats, self.pixels_per_degree )
+
+        if factor == ( 1, 1 ):
+            return lons, lats, data
+
+        if factor != self._decimation:
+            logger.info( "→ Reducing {}x{} grid by {}x{} to match the output resolution", *data.shape, *factor )
+            self._decimation = factor
+
+        return decimate( lons, lats, data, factor )
+
+
+    @classmethod
+    def _frame_label( cls, grid: IGridData, values: ( str, str, str ) ) -> ( str, str ):
+
+        date_time = f"%s GMT" % str( grid.getDataTime().getRefTime() )
+
         frame_label = ( "%s (%s %s)" % values ).replace( ' N/A', '' )
+        label = "%s - %s" % ( frame_label, date_time )
+
+        return label, date_time
+
+
+    def _frame_metadata( self, date_time: str, description: str ) -> dict:
+        """
+        An unlabelled frame leaves its timestamp to the manifest as well, so
+        that scans with identical data are saved as identical files
+        """
+
+        metadata = dict( PNG_METADATA )
+        metadata['Description'] = description
+
+        if self.labels:
+            metadata['Creation Time'] = date_time
+
+        return metadata
+
+
+    def _draw_label( self, label: str ) -> Text:
+
+        text_x = ( self.axes.viewLim.x0 + self.axes.viewLim.x1 ) / 2.0
+        text_y = self.axes.viewLim.y0 * 1.0025
 
         # Add the timestamp and product name at the bottom-center
-        self.axes.text(
-            text_x, text_y, "%s - %s" % ( frame_label, date_time ),
+        return self.axes.text(
+            text_x, text_y, label,
             transform=self.crs, ha='center', size='small'
         )
 
-        PNG_METADATA['Creation Time'] = date_time
-        PNG_METADATA['Description'] = "Site: %s, Product: %s, Level: %s" % values
 
-        file_name = self.save_image( i, PNG_METADATA )
+    def _generate_legend( self ) -> None:
+        """The legend only depends on the colormap, so it's rendered once into the shared directory for every site"""
 
-        logger.info( "→ Saved {}", file_name )
+        legend_file = Path( self.shared_legend_file_path_name )
+        lut_file = Path( self.shared_path, f"{self.style.key}.npz" )
 
+        # Make sure the LUT is on disk before comparing against it
+        norm, cmap = colormap( self.style, self.shared_path )
 
-    def _generate_legend( self ) -> None:
+        if legend_file.is_file() and ( not lut_file.is_file() or legend_file.stat().st_mtime >= lut_file.stat().st_mtime ):
+            return
 
-        legend_file = self.image_file_path_name.replace( '%d', '%s' ) % 'legend'
+        logger.info( "Generating {} legend...", self.style.label )
 
-        if Path( legend_file ).exists():
-            return
+        from matplotlib.cm import ScalarMappable
+
+        fig, ax = self.new_figure( ( 16, 0.2 ) )
+        fig.colorbar( ScalarMappable( norm=norm, cmap=cmap ), cax=ax, orientation='horizontal', label=self.style.label )
+        super().save_image( file=str( legend_file ), figure=fig, transparent=True )
 
-        logger.info( 'Generating dBZ legend...' )
 
-        fig, ax = pyplot.subplots( figsize=( 16, 0.2 ) )
-        fig.colorbar( ScalarMappable( norm=NORM, cmap=CMAP ), cax=ax, orientation='horizontal', label='dBZ' )
-        super().save_image( file=legend_file, figure=fig, transparent=True )
+    def _link_legend( self ) -> None:
+        if self.link_shared_file( self.shared_legend_file_path_name, self.legend_file_path_name ):
+            logger.info( "→ Linked {}", Path( self.legend_file_path_name ).name )
 
 
     def _cleanup( self ) -> None:
@@ -248,3 +854,21 @@ class FrameGenerator( RadarLoopGenerator ):
             Path( self.image_file_path_name % i ).unlink()
 
         logger.info( "→ Deleted {} extra frames", stop - start )
+
+
+    def _generate_viewer( self ) -> None:
+
+        logger.info( "Generating {} viewer manifest...", self.product )
+
+        # The page is written first, so the manifest never names a page that isn't there yet
+        title = f"NEXRAD Radar Loop: {self.display_name} {self.product}"
+        page_name = write_viewer( self.image_path, self.base_name, Path( self.manifest_file_path_name ).name, title )
+        logger.info( "→ Saved {}", page_name )
+
+        self.manifest.set_map( self.map_file_path_name )
+        self.manifest.set_legend( self.legend_file_path_name )
+        self.manifest.set_page( page_name )
+        manifest_name = self.manifest.dump( self.manifest_file_path_name )
+        logger.info( "→ Saved {} describing {} frames", manifest_name, len( self.manifest.frames ) )
+
+        logger.info( '...done' )
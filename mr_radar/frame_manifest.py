@@ -0,0 +1,122 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Any
+
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+
+class FrameManifest:
+    """
+    Describes the map, legend and frames that make up a radar loop, so that
+    the HTML viewer doesn't need to know file names or frame counts ahead of
+    time.  Every image carries a content hash, which the viewer appends to the
+    URL to bust caches and to skip downloading frames it already has.  When
+    `labels` is off the frames have no text of their own, and the viewer
+    overlays each frame's label instead.  It also names the viewer page
+    showing it, whether that page is the site's main one, which is the first
+    product's, and the units the legend is in.
+    """
+
+    def __init__( self, site_id: str, product: str, frame_delay: int, last_frame_delay: int, labels: bool=True,
+                  primary: bool=True, units: str=None ) -> None:
+        self.site_id = site_id
+        self.product = product
+        self.units = units
+        self.frame_delay = frame_delay
+        self.last_frame_delay = last_frame_delay
+        self.labels = labels
+        self.primary = primary
+
+        self._map    = None
+        self._legend = None
+        self._page   = None
+        self._frames = []
+
+
+    @property
+    def frames( self ) -> [ dict ]:
+        return self._frames
+
+
+    def set_map( self, file: str | Path ) -> None:
+        self._map = self._describe_image( file )
+
+
+    def set_legend( self, file: str | Path ) -> None:
+        self._legend = self._describe_image( file )
+
+
+    def set_page( self, file: str | Path ) -> None:
+        self._page = Path( file ).name
+
+
+    def add_frame( self, file: str | Path, time: int, label: str, empty: bool=False ) -> None:
+        """
+        Frames may be added in any order; the viewer animates them from oldest
+        to newest.  An empty frame is one with no visible echoes.
+        """
+
+        frame = self._describe_image( file )
+
+        if frame is None:
+            return
+
+        frame.update( time=time, label=label, empty=empty )
+        self._frames.append( frame )
+
+
+    def to_dict( self ) -> dict:
+        return dict(
+            site      = self.site_id,
+            product   = self.product,
+            units     = self.units,
+            generated = datetime.now( timezone.utc ).isoformat( timespec='seconds' ),
+            delay     = dict( frame=self.frame_delay, last=self.last_frame_delay ),
+            labels    = self.labels,
+            page      = self._page,
+            primary   = self.primary,
+            map       = self._map,
+            legend    = self._legend,
+            frames    = sorted( self._frames, key=lambda frame: frame['time'] )
+        )
+
+
+    def dump( self, file: str | Path ) -> str:
+        """Writes the manifest atomically so that a polling viewer never reads a partial file"""
+
+        file = Path( file )
+        temp_file = file.with_name( f".{file.name}.tmp" )
+
+        with open( temp_file, 'w' ) as f:
+            json.dump( self.to_dict(), f, indent=2 )
+
+        os.replace( temp_file, file )
+
+        return file.name
+
+
+    @classmethod
+    def file_hash( cls, file: str | Path ) -> str:
+        digest = hashlib.sha1()
+
+        with open( file, 'rb' ) as f:
+            for chunk in iter( lambda: f.read( 65536 ), b'' ):
+                digest.update( chunk )
+
+        return digest.hexdigest()[:12]
+
+
+    @classmethod
+    def _describe_image( cls, file: str | Path ) -> dict[ str, Any ] | None:
+
+        file = Path( file )
+
+        if not file.is_file():
+            return None
+
+        return dict( file=file.name, hash=cls.file_hash( file ) )
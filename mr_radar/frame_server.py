@@ -0,0 +1,387 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import hashlib
+import mimetypes
+import threading
+from collections import deque
+from pathlib import Path
+from typing import NamedTuple
+from urllib.parse import urlsplit, parse_qs
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from loguru import logger
+
+
+# A file whose mtime is more recent than this may still be being written, so it's picked up on a later scan
+SETTLE_TIME = 1.0
+
+# How often an idle event stream sends a comment, so proxies don't time it out
+KEEPALIVE_INTERVAL = 15.0
+
+SERVED_SUFFIXES = [ '.png', '.json', '.html', '.js', '.css' ]
+
+
+class ServedFile( NamedTuple ):
+    body: bytes
+    etag: str
+    content_type: str
+    hash: str
+
+
+class FrameStore:
+    """
+    An in-memory copy of every servable file in one or more image
+    directories, each published under a URL prefix.  Files are only read
+    from disk when a scan finds that they've changed, so serving a request
+    never touches the filesystem.  Every change bumps a version number that
+    event streams wait on.  The viewer page each manifest names is noted,
+    so a directory's index can be its main page, whatever it's called.
+    """
+
+    def __init__( self, directories: { str: str | Path } ) -> None:
+        self.directories = { prefix.strip( '/' ): Path( path ) for prefix, path in directories.items() }
+
+        self._files = {}
+        self._stats = {}
+        self._pages = {}
+        self._version = 0
+        self._changes = deque( maxlen=256 )
+        self._condition = threading.Condition()
+
+
+    @property
+    def version( self ) -> int:
+        return self._version
+
+
+    def get( self, path: str ) -> ServedFile | None:
+        return self._files.get( path.strip( '/' ) )
+
+
+    def index( self, prefix: str ) -> ServedFile | None:
+        """
+        The page served for a directory: the viewer page its main manifest
+        names, or failing that, any page a manifest names, or its only page
+        """
+
+        prefix = prefix.strip( '/' )
+
+        with self._condition:
+            files, pages = self._files, self._pages
+
+        ordered = sorted( ( not primary, page ) for path, ( primary, page ) in pages.items() if path.startswith( f"{prefix}/" ) )
+        for _, page in ordered:
+            served = files.get( f"{prefix}/{page}" )
+            if served:
+                return served
+
+        html = [ path for path in files if path.startswith( f"{prefix}/" ) and path.endswith( '.html' ) ]
+        return files[ html[0] ] if len( html ) == 1 else None
+
+
+    def scan( self ) -> [ str ]:
+        """
+        Loads new and changed files, drops deleted ones, and returns the
+        paths that changed.  The store's contents are rebuilt on the side and
+        swapped in whole, as request threads read them while this runs.
+        """
+
+        files, stats, pages = dict( self._files ), dict( self._stats ), dict( self._pages )
+
+        changed = []
+        seen = set()
+        now = time.time()
+
+        for prefix, directory in self.directories.items():
+            if not directory.is_dir():
+                continue
+
+            for entry in os.scandir( directory ):
+                if not entry.is_file() or Path( entry.name ).suffix not in SERVED_SUFFIXES or entry.name.startswith( '.' ):
+                    continue
+
+                path = f"{prefix}/{entry.name}"
+                stat = entry.stat()
+                seen.add( path )
+
+                key = ( stat.st_mtime_ns, stat.st_size )
+                if stats.get( path ) == key or now - stat.st_mtime < SETTLE_TIME:
+                    continue
+
+                served = self._load( entry.path, key )
+                if served is None:
+                    continue
+
+                stats[path] = key
+
+                if files.get( path ) and files[path].hash == served.hash:
+                    continue
+
+                files[path] = served
+                self._note_page( pages, path, served )
+                changed.append( path )
+
+        for path in set( files ) - seen:
+            del files[path]
+            stats.pop( path, None )
+            pages.pop( path, None )
+            changed.append( path )
+
+        with self._condition:
+            self._files, self._stats, self._pages = files, stats, pages
+
+            if changed:
+                for path in changed:
+                    self._version += 1
+                    self._changes.append( ( self._version, path ) )
+                self._condition.notify_all()
+
+        return changed
+
+
+    def changes_since( self, version: int, prefix: str ) -> [ ( int, str ) ]:
+        prefix = prefix.strip( '/' ) + '/'
+        return [ ( v, path ) for v, path in list( self._changes ) if v > version and path.startswith( prefix ) ]
+
+
+    def wait( self, version: int, timeout: float ) -> int:
+        """Blocks until the store is newer than `version` or the timeout passes, and returns the current version"""
+
+        with self._condition:
+            self._condition.wait_for( lambda: self._version > version, timeout )
+            return self._version
+
+
+    @classmethod
+    def _note_page( cls, pages: { str: ( bool, str ) }, path: str, served: ServedFile ) -> None:
+        """Notes in `pages` the viewer page a manifest names, if it is one"""
+
+        if not path.endswith( '.json' ):
+            return
+
+        try:
+            manifest = json.loads( served.body )
+        except ValueError:
+            manifest = None
+
+        if isinstance( manifest, dict ) and isinstance( manifest.get( 'page' ), str ):
+            pages[path] = ( bool( manifest.get( 'primary', True ) ), manifest['page'] )
+        else:
+            pages.pop( path, None )
+
+
+    @classmethod
+    def _load( cls, file: str, key: ( int, int ) ) -> ServedFile | None:
+
+        with open( file, 'rb' ) as f:
+            body = f.read()
+
+        # Skip files that changed while we were reading them; the next scan will get them
+        stat = os.stat( file )
+        if ( stat.st_mtime_ns, stat.st_size ) != key:
+            return None
+
+        digest = hashlib.sha1( body ).hexdigest()
+        content_type = mimetypes.guess_type( file )[0] or 'application/octet-stream'
+
+        return ServedFile( body, f'"{digest}"', content_type, digest[:12] )
+
+
+class FrameRequestHandler( BaseHTTPRequestHandler ):
+    """
+    Serves `/<site>/<file>` from the store with strong ETags, and
+    `/<site>/events` as a stream of server-sent events naming each manifest
+    as it's republished
+    """
+
+    server: FrameServer
+
+    protocol_version = 'HTTP/1.1'
+
+
+    def do_GET( self ) -> None:
+        self._respond( send_body=True )
+
+
+    def do_HEAD( self ) -> None:
+        self._respond( send_body=False )
+
+
+    def log_message( self, format: str, *args ) -> None:
+        logger.debug( "{} - {}", self.address_string(), format % args )
+
+
+    def _respond( self, send_body: bool ) -> None:
+
+        url = urlsplit( self.path )
+        path = url.path.strip( '/' )
+        prefix, _, name = path.partition( '/' )
+
+        if name == 'events' and send_body:
+            return self._stream_events( prefix )
+
+        served = self.server.store.get( path )
+
+        if served is None and prefix in self.server.store.directories and not name:
+            served = self.server.store.index( prefix )
+
+        if served is None:
+            return self._send_status( HTTPStatus.NOT_FOUND )
+
+        # A versioned URL (see the viewer's ?v=hash) names exactly one body, so it can be cached for good
+        versions = parse_qs( url.query ).get( 'v' )
+        if versions and versions[0] == served.hash:
+            cache_control = 'public, max-age=31536000, immutable'
+        else:
+            cache_control = 'no-cache'
+
+        if self._etag_matches( served.etag ):
+            self.send_response( HTTPStatus.NOT_MODIFIED )
+            self.send_header( 'ETag', served.etag )
+            self.send_header( 'Cache-Control', cache_control )
+            self.end_headers()
+            return
+
+        self.send_response( HTTPStatus.OK )
+        self.send_header( 'Content-Type', served.content_type )
+        self.send_header( 'Content-Length', str( len( served.body ) ) )
+        self.send_header( 'ETag', served.etag )
+        self.send_header( 'Cache-Control', cache_control )
+        self.end_headers()
+
+        if send_body:
+            self.wfile.write( served.body )
+
+
+    def _etag_matches( self, etag: str ) -> bool:
+
+        header = self.headers.get( 'If-None-Match' )
+
+        if not header:
+            return False
+
+        if header.strip() == '*':
+            return True
+
+        return etag in [ tag.strip().removeprefix( 'W/' ) for tag in header.split( ',' ) ]
+
+
+    def _send_status( self, status: HTTPStatus ) -> None:
+        body = f"{status.value} {status.phrase}\n".encode()
+
+        self.send_response( status )
+        self.send_header( 'Content-Type', 'text/plain; charset=utf-8' )
+        self.send_header( 'Content-Length', str( len( body ) ) )
+        self.end_headers()
+        self.wfile.write( body )
+
+
+    def _stream_events( self, prefix: str ) -> None:
+
+        store = self.server.store
+
+        if prefix not in store.directories:
+            return self._send_status( HTTPStatus.NOT_FOUND )
+
+        self.send_response( HTTPStatus.OK )
+        self.send_header( 'Content-Type', 'text/event-stream' )
+        self.send_header( 'Cache-Control', 'no-cache' )
+        self.send_header( 'Connection', 'close' )
+        self.end_headers()
+        self.close_connection = True
+
+        version = store.version
+
+        try:
+            self.wfile.write( b"retry: 5000\n\n" )
+            self.wfile.flush()
+
+            while not self.server.stopping.is_set():
+                current = store.wait( version, KEEPALIVE_INTERVAL )
+
+                if current == version:
+                    self.wfile.write( b": keepalive\n\n" )
+                    self.wfile.flush()
+                    continue
+
+                for v, path in store.changes_since( version, prefix ):
+                    served = store.get( path )
+                    if served is None or not path.endswith( '.json' ):
+                        continue
+
+                    data = json.dumps( dict( file=path.partition( '/' )[2], hash=served.hash ) )
+                    self.wfile.write( f"id: {v}\nevent: manifest\ndata: {data}\n\n".encode() )
+
+                self.wfile.flush()
+                version = current
+
+        except ( BrokenPipeError, ConnectionResetError ):
+            pass
+
+
+class FrameServer( ThreadingHTTPServer ):
+    """Serves one or more sites' images from memory, rescanning their directories in the background"""
+
+    daemon_threads = True
+
+
+    def __init__( self, address: ( str, int ), directories: { str: str | Path }, scan_interval: float ) -> None:
+        super().__init__( address, FrameRequestHandler )
+
+        self.store = FrameStore( directories )
+        self.scan_interval = scan_interval
+        self.stopping = threading.Event()
+
+        self.store.scan()
+        self._watcher = threading.Thread( target=self._watch, name='frame-store-watcher', daemon=True )
+
+
+    def serve_forever( self, poll_interval: float=0.5 ) -> None:
+        self._watcher.start()
+        super().serve_forever( poll_interval )
+
+
+    def shutdown( self ) -> None:
+        self.stopping.set()
+        super().shutdown()
+
+
+    def _watch( self ) -> None:
+
+        while not self.stopping.wait( self.scan_interval ):
+            try:
+                changed = self.store.scan()
+            except OSError as e:
+                logger.warning( "Failed to scan image directories: {}", e )
+                continue
+
+            if changed:
+                logger.info( "→ Published {} changed files", len( changed ) )
+
+
+def serve( directories: { str: str | Path }, host: str=None, port: int=None, scan_interval: float=None ) -> None:
+    """Runs the frame server until interrupted"""
+
+    from .rlg_defaults import RLGDefaults
+
+    host = host or RLGDefaults.serve_host
+    port = port or RLGDefaults.serve_port
+
+    server = FrameServer( ( host, port ), directories, scan_interval or RLGDefaults.serve_scan_interval )
+
+    for prefix, path in server.store.directories.items():
+        logger.info( "→ Serving {} at http://{}:{}/{}/", path, host, server.server_address[1], prefix )
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info( 'Shutting down...' )
+    finally:
+        server.stopping.set()
+        server.server_close()
@@ -0,0 +1,73 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import Any, Callable, Iterator
+
+from loguru import logger
+
+
+# Drawing a grid builds a mesh, face colors and a raster of its own, which
+# together take a few times the memory of the grid itself
+RENDER_OVERHEAD = 4
+
+
+class GridBatches:
+    """
+    The frames of one product, newest first, fetched lazily in batches.
+    Without a memory budget everything is fetched in one go.  With one,
+    grids are fetched alone until one comes back to measure how big a grid
+    is, and the rest are fetched as many at a time as fit in the budget
+    alongside the one being drawn.  Each grid is let go of as soon as the consumer moves on.
+    """
+
+    def __init__( self, times: [ Any ], fetch: Callable[ [ [ Any ] ], [ Any ] ], sizeof: Callable[ [ Any ], int ], budget: int=None ) -> None:
+        self.times = list( times )
+        self.fetch = fetch
+        self.sizeof = sizeof
+        self.budget = budget
+
+
+    def __len__( self ) -> int:
+        return len( self.times )
+
+
+    def __iter__( self ) -> Iterator[ Any ]:
+
+        start = 0
+        batch_size = 1 if self.budget else len( self.times )
+        measured = not self.budget
+
+        while start < len( self.times ):
+            batch = self.fetch( self.times[ start:start + batch_size ] )
+            start += batch_size
+
+            # A scan can be missing, so the first grid to measure isn't always the first one asked for
+            if batch and not measured:
+                measured = True
+                batch_size = self.batch_size( self.sizeof( batch[0] ) )
+                logger.info( "→ Fetching up to {} grids at a time", batch_size )
+
+            # Hand grids out one at a time, dropping our reference to each
+            batch.reverse()
+            while batch:
+                yield batch.pop()
+
+
+    def batch_size( self, grid_size: int ) -> int:
+        """How many grids of `grid_size` bytes can be held at once while one of them is being drawn"""
+
+        available = self.budget - ( grid_size * RENDER_OVERHEAD )
+        batch_size = max( 1, available // max( 1, grid_size ) )
+
+        if available < grid_size:
+            logger.warning( "A single {:.1f} MB grid doesn't fit in the memory budget; fetching one at a time", grid_size / 2**20 )
+
+        return int( batch_size )
+
+
+def grid_nbytes( grid ) -> int:
+    """The memory held by a grid's data and coordinates"""
+
+    lons, lats = grid.getLatLonCoords()
+    return sum( getattr( array, 'nbytes', 0 ) for array in ( grid.getRawData(), lons, lats ) )
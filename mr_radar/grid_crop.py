@@ -0,0 +1,39 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+
+
+# Extra rows and columns kept around the bounds, so cells straddling the
+# edge of the image are still drawn whole
+CROP_MARGIN = 2
+
+
+def crop_slices( lons: np.ndarray, lats: np.ndarray, bbox: [ float, float, float, float ], margin: int=CROP_MARGIN ) -> ( slice, slice ):
+    """
+    The smallest block of rows and columns of a curvilinear grid that holds
+    every cell inside `bbox` (west, south, east, north), plus `margin`
+    cells on each side.  An empty block means nothing is inside.
+    """
+
+    west, south, east, north = bbox
+
+    with np.errstate( invalid='ignore' ):
+        inside = ( lons >= west ) & ( lons <= east ) & ( lats >= south ) & ( lats <= north )
+
+    rows = np.flatnonzero( inside.any( axis=1 ) )
+    cols = np.flatnonzero( inside.any( axis=0 ) )
+
+    if not len( rows ) or not len( cols ):
+        return slice( 0, 0 ), slice( 0, 0 )
+
+    return (
+        slice( max( 0, rows[0] - margin ), min( lons.shape[0], rows[-1] + margin + 1 ) ),
+        slice( max( 0, cols[0] - margin ), min( lons.shape[1], cols[-1] + margin + 1 ) )
+    )
+
+
+def geometry_key( lons: np.ndarray, lats: np.ndarray ) -> tuple:
+    """Identifies a grid's geometry cheaply, so crops can be reused for every scan from the same site"""
+    return ( lons.shape, float( lons.flat[0] ), float( lats.flat[0] ), float( lons.flat[-1] ), float( lats.flat[-1] ) )
@@ -0,0 +1,95 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+
+# Anti-aliased label text is drawn in black at varying opacity
+TEXT_LEVELS = 16
+
+
+class IndexedPalette:
+    """
+    A fixed 8-bit palette built from the colors of a discrete colormap (see
+    ColormapLUT), used to write radar frames as palette-indexed PNGs instead
+    of 32-bit RGBA.  Every frame shares the same palette: transparency first,
+    then each colormap color at the opacity it's plotted with, then a ramp of
+    black for the frame label.
+    """
+
+    def __init__( self, colors: np.ndarray, alpha: float ) -> None:
+
+        colors = np.array( colors, dtype=np.float64 )
+        colors[:, 3] *= alpha
+
+        text = np.zeros( ( TEXT_LEVELS, 4 ) )
+        text[:, 3] = np.linspace( 1.0 / TEXT_LEVELS, 1.0, TEXT_LEVELS )
+
+        palette = np.vstack( [ np.zeros( ( 1, 4 ) ), colors, text ] )
+        palette = np.round( palette * 255 ).astype( np.uint8 )
+
+        # Keep the first occurrence of each color so indices stay stable
+        _, first = np.unique( palette, axis=0, return_index=True )
+        palette = palette[ np.sort( first ) ]
+
+        if len( palette ) > 256:
+            raise ValueError( f"The colormap needs {len( palette )} palette entries, but at most 256 are possible" )
+
+        self._palette = palette
+        self._premultiplied = self._premultiply( palette )
+
+
+    @property
+    def palette( self ) -> np.ndarray:
+        return self._palette
+
+
+    def __len__( self ) -> int:
+        return len( self._palette )
+
+
+    def quantize( self, rgba: np.ndarray ) -> np.ndarray:
+        """Maps an RGBA image onto palette indices, returning an array of the same height and width"""
+
+        height, width = rgba.shape[:2]
+        packed = np.ascontiguousarray( rgba[..., :4], dtype=np.uint8 ).view( np.uint32 ).reshape( -1 )
+
+        # A rendered frame only has a few hundred distinct colors, so match
+        # those to the palette rather than every pixel
+        colors, inverse = np.unique( packed, return_inverse=True )
+        colors = colors.view( np.uint8 ).reshape( -1, 4 )
+
+        distances = self._premultiply( colors )[:, None, :] - self._premultiplied[None, :, :]
+        nearest = np.argmin( np.einsum( 'ijk,ijk->ij', distances, distances ), axis=1 ).astype( np.uint8 )
+
+        # Anything fully transparent is always index 0
+        nearest[ colors[:, 3] == 0 ] = 0
+
+        return nearest[ inverse ].reshape( height, width )
+
+
+    def to_image( self, rgba: np.ndarray ) -> Image.Image:
+        image = Image.fromarray( self.quantize( rgba ), mode='P' )
+        image.putpalette( self._palette[:, :3].tobytes(), rawmode='RGB' )
+        image.info['transparency'] = self._palette[:, 3].tobytes()
+        return image
+
+
+    def save( self, rgba: np.ndarray, file: str, metadata: dict=None, **kwargs ) -> None:
+
+        png_info = PngInfo()
+        for key, value in ( metadata or {} ).items():
+            png_info.add_text( key, value )
+
+        image = self.to_image( rgba )
+        image.save( file, format='png', pnginfo=png_info, transparency=image.info['transparency'], **kwargs )
+
+
+    @classmethod
+    def _premultiply( cls, colors: np.ndarray ) -> np.ndarray:
+        colors = colors.astype( np.float32 )
+        colors[:, :3] *= colors[:, 3:] / 255.0
+        return colors
@@ -0,0 +1,65 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import shapely
+from shapely import STRtree
+
+
+# The average width of a glyph, as a fraction of the font size, which is
+# close enough to size a label's box without laying out any text
+CHAR_WIDTH = 0.6
+
+# How far the glyphs reach below the baseline, as a fraction of the font size
+DESCENT = 0.25
+
+
+def label_boxes( x: np.ndarray, y: np.ndarray, lengths: np.ndarray, offset: ( float, float ),
+                 font_size: float, marker_size: float, scale: float ) -> np.ndarray:
+    """
+    The box each label covers in data coordinates, along with its marker,
+    for labels of `lengths` characters placed `offset` points from each
+    point, as annotate() places them.  `scale` is data units per point.
+    """
+
+    dx, dy = offset
+    lengths = np.asarray( lengths, dtype=float )
+
+    left   = np.full_like( lengths, -marker_size )
+    right  = dx + lengths * font_size * CHAR_WIDTH
+    bottom = np.full_like( lengths, dy - font_size * DESCENT )
+    top    = np.full_like( lengths, max( dy + font_size * ( 1 - DESCENT ), marker_size ) )
+
+    return shapely.box( x + left * scale, y + bottom * scale, x + right * scale, y + top * scale )
+
+
+def declutter( boxes: np.ndarray, priority: np.ndarray ) -> np.ndarray:
+    """
+    The indices of the labels to keep, highest priority first, such that
+    no two kept labels overlap.  Every overlapping pair is found at once
+    from a spatial index, so only the greedy pass itself is a loop.
+    """
+
+    if not len( boxes ):
+        return np.empty( 0, dtype=np.intp )
+
+    tree = STRtree( boxes )
+    first, second = tree.query( boxes, predicate='intersects' )
+
+    # Each pair comes back both ways round, and every box overlaps itself
+    others = first != second
+    first, second = first[others], second[others]
+
+    # Group each box's neighbours together
+    order = np.argsort( first, kind='stable' )
+    neighbours = np.split( second[order], np.searchsorted( first[order], np.arange( 1, len( boxes ) ) ) )
+
+    order = np.argsort( -np.asarray( priority ), kind='stable' )
+    kept = np.zeros( len( boxes ), dtype=bool )
+
+    for i in order:
+        if not kept[ neighbours[i] ].any():
+            kept[i] = True
+
+    return order[ kept[order] ]
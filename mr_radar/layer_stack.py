@@ -0,0 +1,110 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+
+
+# The base map's layers, bottom to top
+MAP_LAYERS = [ 'topography', 'borders', 'highways', 'lakes', 'rivers', 'cities' ]
+
+
+def inputs_hash( inputs: dict ) -> str:
+    """A short, stable digest of everything a layer's pixels depend on"""
+    encoded = json.dumps( inputs, sort_keys=True, default=str ).encode()
+    return hashlib.sha1( encoded ).hexdigest()[:12]
+
+
+def file_stamp( file: str | Path | None ) -> ( int, int ) | None:
+    """When a file a layer is drawn from was last written, and its size, or None if it doesn't exist"""
+
+    try:
+        stat = os.stat( file )
+    except ( OSError, TypeError ):
+        return None
+
+    return stat.st_mtime_ns, stat.st_size
+
+
+def composite( images: [ np.ndarray ], background: ( float, float, float, float ) ) -> np.ndarray:
+    """
+    Stacks RGBA images of the same size, bottom first, over a solid
+    `background` with the usual "over" operator, as a uint8 RGBA image
+    """
+
+    height, width = images[0].shape[:2]
+
+    result = np.empty( ( height, width, 4 ), dtype=np.float32 )
+    result[:] = background
+
+    for image in images:
+        if image.shape[:2] != ( height, width ):
+            raise ValueError( f"Layer of {image.shape[1]}x{image.shape[0]} can't be stacked on {width}x{height}" )
+
+        above = image.astype( np.float32 ) / 255
+        alpha = above[ ..., 3:4 ]
+
+        # Premultiplying keeps the colors right where both are partly transparent
+        out_alpha = alpha + result[ ..., 3:4 ] * ( 1 - alpha )
+        color = above[ ..., :3 ] * alpha + result[ ..., :3 ] * result[ ..., 3:4 ] * ( 1 - alpha )
+
+        result[ ..., :3 ] = np.divide( color, out_alpha, out=np.zeros_like( color ), where=out_alpha > 0 )
+        result[ ..., 3:4 ] = out_alpha
+
+    return np.round( result * 255 ).astype( np.uint8 )
+
+
+class LayerStack:
+    """
+    Which file holds each of the base map's layers, and a digest of the
+    inputs it was rendered from, so that only the layers whose inputs
+    changed need rendering again.  It's saved beside the layers, where a
+    viewer could also use it to stack them itself.
+    """
+
+    def __init__( self, background: str, layers: { str: dict }=None ) -> None:
+        self.background = background
+        self.layers = layers or {}
+
+
+    def is_current( self, name: str, directory: str | Path, inputs: str ) -> bool:
+        layer = self.layers.get( name )
+        return bool( layer ) and layer['inputs'] == inputs and Path( directory, layer['file'] ).is_file()
+
+
+    def set_layer( self, name: str, file: str | Path, inputs: str ) -> None:
+        self.layers[name] = dict( file=Path( file ).name, inputs=inputs )
+
+
+    def files( self, directory: str | Path, order: [ str ] ) -> [ Path ]:
+        return [ Path( directory, self.layers[name]['file'] ) for name in order if name in self.layers ]
+
+
+    def to_dict( self ) -> dict:
+        return dict(
+            background = self.background,
+            layers     = [ dict( name=name, **layer ) for name, layer in self.layers.items() ]
+        )
+
+
+    @classmethod
+    def load( cls, file: str | Path ) -> LayerStack:
+        with open( file ) as f:
+            data = json.load( f )
+
+        return cls( data['background'], { layer.pop( 'name' ): layer for layer in data['layers'] } )
+
+
+    def dump( self, file: str | Path ) -> None:
+
+        file = Path( file )
+        temp_file = file.with_name( f".{file.name}.tmp" )
+
+        with open( temp_file, 'w' ) as f:
+            json.dump( self.to_dict(), f, indent=2 )
+
+        os.replace( temp_file, file )
@@ -2,15 +2,28 @@
 
 from __future__ import annotations
 
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
 from loguru import logger
 import numpy as np
-from awips.dataaccess import DataAccessLayer
-from matplotlib import pyplot
-from cartopy.feature import ShapelyFeature, NaturalEarthFeature
+import shapely
+from matplotlib import colormaps, rcParams
+from cartopy import config as cartopy_config
+from cartopy.feature import ShapelyFeature
 
 from .rlg_defaults import RLGDefaults
+from .rlg_exception import *
 from .cache_keys import RadarCacheKeys
-from .radar_loop_generator import RadarLoopGenerator
+from .radar_loop_generator import RadarLoopGenerator, data_access_layer
+from .map_layer import MapLayer, simplify_tolerance, pack_geometries, unpack_geometries
+from .label_declutter import label_boxes, declutter
+from .layer_stack import MAP_LAYERS, LayerStack, composite, file_stamp, inputs_hash
+from .natural_earth import NATURAL_EARTH_LAYERS, find_shapefile, natural_earth_index, seed
+
+if TYPE_CHECKING:
+    import shapely.geometry as sgeo
+    from .topography import TopographyRaster
 
 
 # See https://www.naturalearthdata.com/
@@ -20,16 +33,75 @@ SCALE = dict(
     small  = '110m', # Coarse detail
 )
 
-# See https://www.naturalearthdata.com/downloads/50m-cultural-vectors/
-COUNTRY_BORDERS = 'admin_0_boundary_lines_land'
-STATE_BORDERS   = 'admin_1_states_provinces_lines'
+# Simplified map layers are kept here, under the shared directory
+MAP_LAYER_DIR = 'map_layers'
+
+# The data each site's layers are built from is kept here, under the shared directory, one directory per site
+SITE_SOURCE_DIR = 'map_sources'
+
+# Natural Earth layers downloaded on demand are kept here, under the shared directory
+NATURAL_EARTH_DIR = 'natural_earth'
+
+# How the terrain is drawn: filled contours, or a raster at the output resolution with or without relief shading
+TOPOGRAPHY_STYLES = [ 'contour', 'raster', 'hillshade' ]
+
+# The shared raster that maps within RLGDefaults.topography_bbox are cropped from
+TOPOGRAPHY_FILE = 'topography.npz'
+
+# Terrain is drawn this faintly, so that it's not so bold
+TOPOGRAPHY_ALPHA = 0.1
+
+# A layered map is stacked over this, as the single image is drawn over the axes' background
+MAP_BACKGROUND = 'white'
+
+# Where each city's name sits relative to its marker, in points, and roughly how far the marker reaches
+CITY_LABEL_OFFSET = ( 3, -8 )
+CITY_MARKER_SIZE  = 3
+
+# The Natural Earth layers drawn with the borders, and how they're described
+NATURAL_EARTH_BORDERS = ( ( 'coastline', 'coastline' ), ( 'countries', 'country borders' ), ( 'states', 'state borders' ) )
+
+# How each layer is drawn.  A layered map renders a layer again whenever its style changes.
+LAYER_STYLES = dict(
+    topography = dict( cmap='terrain', contours=80, alpha=TOPOGRAPHY_ALPHA ),
+    borders    = dict(
+        natural_earth = dict( linestyle='-', color='black', linewidth=1.0, zorder=2 ),
+        counties      = dict( linestyle='-', color='#CCCCCC', linewidth=1.0, zorder=2 ),
+    ),
+    highways   = dict( linestyle='-', color='orange', linewidth=1.0, zorder=2 ),
+    lakes      = dict( facecolor='blue', linestyle='-', edgecolor='#20B2AA', alpha=0.25, zorder=1.5 ),
+    rivers     = dict( linestyle=':', color='#20B2AA', alpha=0.25, linewidth=1.0, zorder=2 ),
+    cities     = dict(
+        markers = dict( marker='.', facecolor='black', zorder=1 ),
+        labels  = dict( xytext=CITY_LABEL_OFFSET, textcoords='offset points', zorder=3 ),
+    ),
+)
+
+# The `mapdata` tables, saved for each site, that each layer is drawn from
+LAYER_TABLES = dict(
+    borders  = [ 'mapdata.county' ],
+    highways = [ 'mapdata.interstate' ],
+    lakes    = [ 'mapdata.lake' ],
+    rivers   = [ 'mapdata.majorrivers' ],
+    cities   = [ 'mapdata.city' ],
+)
+
+# The settings the city labels are sized and drawn with
+CITY_FONT_PARAMS = [ 'font.family', 'font.size', 'font.style', 'font.weight', 'font.sans-serif', 'text.color', 'lines.markersize' ]
 
 
 class MapGenerator( RadarLoopGenerator ):
 
-    def __init__( self, name: str=None, **kwargs ) -> None:
+    def __init__( self, name: str=None, topography: str=None, layered: bool=None, rebuild_layers: [ str ]=None,
+                  source_radius: int=None, **kwargs ) -> None:
         super().__init__( **kwargs )
+        self._current_layer = None
+        self._refreshed = set()
         self.file_name = ( name or RLGDefaults.map_file_name )
+        self.topography = topography
+        self.source_radius = source_radius
+        self.layered = layered
+        self.rebuild_layers = rebuild_layers or []
 
 
     @property
@@ -43,34 +115,364 @@ class MapGenerator( RadarLoopGenerator ):
         self.cache.set( RadarCacheKeys.FILE_NAME, file_name )
 
 
+    @property
+    def topography( self ) -> str:
+        return self.cache.get( RadarCacheKeys.TOPOGRAPHY, RLGDefaults.topography )
+
+
+    @topography.setter
+    def topography( self, style: str ) -> None:
+
+        if style is None:
+            return
+
+        self._validate_topography( style )
+        self.cache.set( RadarCacheKeys.TOPOGRAPHY, style )
+
+
+    @property
+    def source_radius( self ) -> int | None:
+        """
+        The radius the site's layer data is fetched for, so that maps at
+        any radius up to it are cut from the same data without asking EDEX
+        again.  Data is always fetched for at least the map's own radius.
+        """
+        return self.cache.get( RadarCacheKeys.SOURCE_RADIUS, RLGDefaults.source_radius )
+
+
+    @source_radius.setter
+    def source_radius( self, radius: int ) -> None:
+
+        if radius is None:
+            return
+
+        self._validate_radius( radius )
+        self.cache.set( RadarCacheKeys.SOURCE_RADIUS, radius )
+
+
+    @property
+    def source_envelope( self ) -> sgeo.Polygon:
+        radius = max( self.radius, self.source_radius or 0 )
+
+        if radius == self.radius:
+            return self.image_envelope
+
+        from .bounding_box_calculator import BoundingBoxCalculator
+        return BoundingBoxCalculator( self.site_coords, radius ).get_polygon()
+
+
+    @property
+    def layered( self ) -> bool:
+        return self.cache.get( RadarCacheKeys.LAYERED, RLGDefaults.layered )
+
+
+    @layered.setter
+    def layered( self, layered: bool ) -> None:
+
+        if layered is None:
+            return
+
+        self.cache.set( RadarCacheKeys.LAYERED, bool( layered ) )
+
+
+    @property
+    def rebuild_layers( self ) -> [ str ]:
+        """
+        Layers drawn from data fetched afresh rather than from what was saved
+        for the site, such as to pick up fresh city data.  Layered maps also
+        render them again even though their inputs haven't changed.
+        """
+        return self._rebuild_layers
+
+
+    @rebuild_layers.setter
+    def rebuild_layers( self, layers: [ str ] ) -> None:
+
+        for layer in layers:
+            if layer not in MAP_LAYERS:
+                raise RLGValueError( f"The map layers to rebuild must be among: {', '.join( MAP_LAYERS )}" )
+
+        self._rebuild_layers = list( layers )
+
+
+    @property
+    def layer_stack_file_path_name( self ) -> str:
+        return str( Path( self.image_path, f"{Path( self.file_name ).stem}.layers.json" ) )
+
+
+    def layer_file_path_name( self, layer: str ) -> str:
+        return str( Path( self.image_path, f"{Path( self.file_name ).stem}_{layer}.png" ) )
+
+
     def generate( self ) -> None:
         logger.info( "→ Map file will be saved as '{}'", self.image_file_path_name )
         logger.info( 'Generating map...' )
 
         super().generate()
 
+        if self.layered:
+            self._generate_layered()
+            return
+
         self.make_figure()
 
-        self._generate_topography()
-        self._generate_borders()
-        self._generate_highways()
-        self._generate_lakes()
-        self._generate_rivers()
-        self._generate_cities()
+        for layer in MAP_LAYERS:
+            self._generate_layer( layer )
 
         self.save_image()
 
 
+    def _generate_layer( self, layer: str ) -> None:
+
+        self._current_layer = layer
+
+        try:
+            getattr( self, f"_generate_{layer}" )()
+        finally:
+            self._current_layer = None
+
+
+    def _refreshing( self, kind: str, name: str ) -> bool:
+        """
+        Whether the saved `name` should be fetched again rather than reused,
+        as the layer being drawn is one of those to rebuild.  Each is only
+        fetched again once per run, however many times it's drawn.
+        """
+
+        if self._current_layer not in self.rebuild_layers or ( kind, name ) in self._refreshed:
+            return False
+
+        self._refreshed.add( ( kind, name ) )
+        return True
+
+
     def save_image( self ) -> None:
         super().save_image()
+        self.close_figure()
+        self._finish_optimizing()
         logger.info( '...map saved' )
 
 
+    def _generate_layered( self ) -> None:
+        """
+        Renders each layer to its own transparent PNG of the same extent,
+        skipping any whose inputs haven't changed since they were last
+        rendered, then stacks them into the map
+        """
+
+        stack_file = Path( self.layer_stack_file_path_name )
+        stack = None
+
+        if stack_file.is_file():
+            try:
+                stack = LayerStack.load( stack_file )
+            except ( OSError, ValueError, KeyError ) as e:
+                logger.warning( "Rebuilding every layer, as {} is unreadable: {}", stack_file.name, e )
+
+        if stack is None or stack.background != MAP_BACKGROUND:
+            stack = LayerStack( MAP_BACKGROUND )
+
+        rebuilt = 0
+
+        for number, layer in enumerate( MAP_LAYERS, start=1 ):
+            inputs = inputs_hash( self._layer_inputs( layer ) )
+
+            if layer not in self.rebuild_layers and stack.is_current( layer, self.image_path, inputs ):
+                logger.info( "Layer {} of {}: {} is unchanged", number, len( MAP_LAYERS ), layer )
+                continue
+
+            self.make_figure()
+            self._generate_layer( layer )
+
+            # Drawing it may have fetched or saved its data, which the next run will find
+            inputs = inputs_hash( self._layer_inputs( layer ) )
+
+            # The axes alone, rather than a tight box around whatever this layer happens to draw
+            self.axes.apply_aspect()
+            extent = self.axes.get_window_extent().transformed( self.figure.dpi_scale_trans.inverted() )
+
+            file = self.layer_file_path_name( layer )
+            super().save_image( file=file, transparent=True, bbox_inches=extent )
+            self.close_figure()
+
+            stack.set_layer( layer, file, inputs )
+            rebuilt += 1
+
+        stack.dump( stack_file )
+
+        if rebuilt or not Path( self.image_file_path_name ).is_file():
+            self._composite_layers( stack )
+
+        self._finish_optimizing()
+        logger.info( "...map saved, with {} of {} layers rebuilt", rebuilt, len( MAP_LAYERS ) )
+
+
+    def _layer_inputs( self, layer: str ) -> dict:
+        """
+        Everything a layer's pixels depend on besides the code that draws it:
+        the bounds, how it's drawn, and when each file it's drawn from was
+        last written
+        """
+
+        inputs = dict( layer=layer, bbox=self.image_bbox, dpi=rcParams['figure.dpi'], style=LAYER_STYLES[layer] )
+
+        sources = { table: self._site_source_file( table ) for table in LAYER_TABLES.get( layer, [] ) }
+
+        if layer == 'topography':
+            inputs.update( topography=self.topography )
+            sources.update( topography=self._site_source_file( 'topography' ) )
+            if self.topography != 'contour':
+                sources.update( raster=Path( self.shared_path, TOPOGRAPHY_FILE ) )
+
+        elif layer == 'borders':
+            sources.update( { name: self._natural_earth_file( name ) for name, _ in NATURAL_EARTH_BORDERS } )
+
+        elif layer == 'cities':
+            inputs.update( fonts={ key: rcParams[key] for key in CITY_FONT_PARAMS } )
+
+        inputs.update( sources={ name: file_stamp( file ) for name, file in sources.items() } )
+
+        return inputs
+
+
+    def _composite_layers( self, stack: LayerStack ) -> None:
+        from PIL import Image
+        from matplotlib.colors import to_rgba
+
+        logger.info( 'Stacking the layers into the map...' )
+
+        images = []
+        for file in stack.files( self.image_path, MAP_LAYERS ):
+            with Image.open( file ) as image:
+                images.append( np.asarray( image.convert( 'RGBA' ) ) )
+
+        rgba = composite( images, to_rgba( stack.background ) )
+
+        Image.fromarray( rgba, 'RGBA' ).save( self.image_file_path_name, **self.png_options )
+        self._optimize_later( self.image_file_path_name )
+
+
     def _generate_topography( self ) -> None:
         logger.info( 'Generating layer 1 of 6: topography...' )
 
+        if self.topography != 'contour':
+            self._generate_topography_raster()
+            logger.info( '...done' )
+            return
+
+        lons, lats, topo = self._site_topography()
+        style = LAYER_STYLES['topography']
+
+        # Add topography (with 90% transparency so that it's not so bold)
+        self.axes.contourf( lons, lats, topo, style['contours'], cmap=colormaps[style['cmap']], alpha=style['alpha'], extend='both' )
+
+        logger.info( '...done' )
+
+
+    def _generate_topography_raster( self ) -> None:
+        """
+        Draws the terrain as one image at the output resolution, which is
+        far cheaper than contouring it.  Maps inside the shared raster's
+        bounds are cropped from it; any others fetch their own.
+        """
+
+        from .topography import grid_axes, resample, shade
+
+        bbox = self.image_bbox
+        shape = ( int( np.ceil( self.axes.bbox.height ) ), int( np.ceil( self.axes.bbox.width ) ) )
+        style = LAYER_STYLES['topography']
+
+        raster = self._topography_raster()
+
+        if raster and raster.covers( bbox ):
+            elevation = raster.crop( bbox, shape )
+        else:
+            lons, lats, topo = self._site_topography()
+            axes = grid_axes( lons, lats )
+
+            if axes is None:
+                logger.warning( 'The topography grid is not rectilinear; falling back to contours' )
+                self.axes.contourf( lons, lats, topo, style['contours'], cmap=colormaps[style['cmap']], alpha=style['alpha'], extend='both' )
+                return
+
+            elevation = resample( *axes, topo, bbox, shape )
+
+        rgba = shade( elevation, colormaps[style['cmap']], bbox, hillshade=( self.topography == 'hillshade' ) )
+
+        west, south, east, north = bbox
+        self.axes.imshow(
+            rgba, origin='lower', extent=[ west, east, south, north ], transform=self.crs,
+            alpha=style['alpha'], interpolation='nearest'
+        )
+
+
+    def _topography_raster( self ) -> TopographyRaster | None:
+        """The shared topography raster, which is fetched and saved the first time a map needs it"""
+
+        from .topography import TopographyRaster
+
+        bbox = RLGDefaults.topography_bbox
+        resolution = RLGDefaults.topography_resolution
+        raster_file = Path( self.shared_path, TOPOGRAPHY_FILE )
+
+        if raster_file.is_file():
+            try:
+                raster = TopographyRaster.load( raster_file )
+                if raster.bbox == bbox and raster.resolution == resolution:
+                    return raster
+            except ( OSError, ValueError, KeyError ) as e:
+                logger.warning( "Rebuilding unreadable topography raster {}: {}", raster_file.name, e )
+
+        if not TopographyRaster( bbox, resolution, None ).covers( self.image_bbox ):
+            return None
+
+        import shapely.geometry as sgeo
+
+        logger.info( "→ Building the shared topography raster; this only happens once" )
+
+        def fetch( tile_bbox: [ float, float, float, float ] ) -> ( np.ndarray, np.ndarray, np.ndarray ):
+            # A little extra around each tile, so its edges can be interpolated
+            margin = resolution * 2
+            return self._fetch_topography( sgeo.box( *tile_bbox ).buffer( margin, join_style='mitre' ) )
+
+        try:
+            raster = TopographyRaster.build( bbox, resolution, RLGDefaults.topography_tile_size, fetch )
+        except ValueError as e:
+            logger.warning( "Couldn't build the shared topography raster: {}", e )
+            return None
+
+        raster.save( raster_file )
+        logger.info( "→ Saved topography raster {}", raster_file.name )
+
+        return raster
+
+
+    def _site_topography( self ) -> ( np.ndarray, np.ndarray, np.ma.MaskedArray ):
+        """The topography within the image, cut from the site's source data"""
+
+        from .site_source import window
+
+        def fetch( envelope: sgeo.Polygon ) -> { str: np.ndarray }:
+            lons, lats, topo = self._fetch_topography( envelope )
+            return dict( lons=np.asarray( lons ), lats=np.asarray( lats ), topo=np.ma.filled( topo.astype( np.float32 ), np.nan ) )
+
+        source = self._site_source( 'topography', fetch )
+        lons, lats, topo = source['lons'], source['lats'], source['topo']
+
+        if lons.ndim == 1:
+            lons, lats = np.meshgrid( lons, lats )
+
+        rows, cols = window( lons, lats, self.image_bbox )
+
+        return lons[rows, cols], lats[rows, cols], np.ma.masked_invalid( topo[rows, cols] )
+
+
+    def _fetch_topography( self, envelope ) -> ( np.ndarray, np.ndarray, np.ma.MaskedArray ):
+
+        DataAccessLayer = data_access_layer()
+
         # Define request for topography
-        request = DataAccessLayer.newDataRequest( 'topo', envelope=self.image_envelope )
+        request = DataAccessLayer.newDataRequest( 'topo', envelope=envelope )
         request.addIdentifier( 'group', '/' )
         request.addIdentifier( 'dataset', 'full' )
 
@@ -78,46 +480,27 @@ class MapGenerator( RadarLoopGenerator ):
         grid_data = DataAccessLayer.getGridData( request )
         grid = grid_data[0]
 
-        topo = np.ma.masked_invalid( grid.getRawData() )
         lons, lats = grid.getLatLonCoords()
 
-        # Add topography (with 90% transparency so that it's not so bold)
-        self.axes.contourf( lons, lats, topo, 80, cmap=pyplot.get_cmap( 'terrain' ), alpha=0.1, extend='both' )
-
-        logger.info( '...done' )
+        return lons, lats, np.ma.masked_invalid( grid.getRawData() )
 
 
     def _generate_borders( self ) -> None:
         logger.info( 'Generating layer 2 of 6: borders...' )
 
-        request = DataAccessLayer.newDataRequest( 'maps', envelope=self.image_envelope )
+        counties = self._map_layer( 'mapdata.county' )
 
-        # Required identifiers for requesting counties within the envelope
-        request.addIdentifier( 'table', 'mapdata.county' )
-        request.addIdentifier( 'geomField', 'the_geom' )
+        # Plot the coastline, and country and state boundaries, from Natural Earth
+        for name, description in NATURAL_EARTH_BORDERS:
+            layer = self._natural_earth_layer( name )
 
-        # Get response and create list of county geometries
-        response = DataAccessLayer.getGeometryData( request, None )
-        counties = []
-        for county in response:
-            counties.append( county.getGeometry() )
-
-        self.axes.coastlines( resolution=SCALE['medium'] )
-
-        # Plot country boundaries handled by Cartopy
-        country_boundaries = NaturalEarthFeature( category='cultural', name=COUNTRY_BORDERS, scale=SCALE['medium'], facecolor='none' )
-        self.axes.add_feature( country_boundaries, linestyle='-', edgecolor='black' )
-        logger.info( ' • added country borders' )
-
-        # Plot state boundaries handled by Cartopy
-        state_boundaries = NaturalEarthFeature( category='cultural', name=STATE_BORDERS, scale=SCALE['medium'], facecolor='none' )
-        self.axes.add_feature( state_boundaries, linestyle='-', edgecolor='black' )
-        logger.info( ' • added state borders' )
+            if layer is not None:
+                self._draw_lines( layer, **LAYER_STYLES['borders']['natural_earth'] )
+                logger.info( ' • added {}', description )
 
         # Plot county boundaries
-        county_boundaries = ShapelyFeature( counties, self.crs, facecolor='none', linestyle='-', edgecolor='#CCCCCC' )
-        self.axes.add_feature( county_boundaries )
-        logger.info( ' • added {} county borders', len( counties ) )
+        self._draw_lines( counties, **LAYER_STYLES['borders']['counties'] )
+        logger.info( ' • added {} county borders', len( counties.geometries ) )
 
         logger.info( '...done' )
 
@@ -125,19 +508,11 @@ class MapGenerator( RadarLoopGenerator ):
     def _generate_highways( self ) -> None:
         logger.info( 'Generating layer 3 of 6: major highways...' )
 
-        # Define the request for the interstate highways
-        request = DataAccessLayer.newDataRequest( 'maps', envelope=self.image_envelope )
-        request.addIdentifier( 'table', 'mapdata.interstate' )
-        request.addIdentifier( 'geomField', 'the_geom' )
-
-        # Get interstate highway geometries
-        interstates = DataAccessLayer.getGeometryData( request, None )
-        logger.info( "\tUsing %d interstate MultiLineStrings" % len( interstates ) )
+        interstates = self._map_layer( 'mapdata.interstate' )
+        logger.info( "\tUsing %d interstate MultiLineStrings" % len( interstates.geometries ) )
 
         # Plot interstate highways
-        for highway in interstates:
-            shape_feature = ShapelyFeature( highway.getGeometry(), self.crs, facecolor='none', linestyle='-', edgecolor='orange' )
-            self.axes.add_feature( shape_feature )
+        self._draw_lines( interstates, **LAYER_STYLES['highways'] )
 
         logger.info( '...done' )
 
@@ -145,17 +520,11 @@ class MapGenerator( RadarLoopGenerator ):
     def _generate_lakes( self ) -> None:
         logger.info( 'Generating layer 4 of 6: lakes...' )
 
-        # Define request for lakes
-        request = DataAccessLayer.newDataRequest( 'maps', envelope=self.image_envelope )
-        request.addIdentifier( 'table', 'mapdata.lake' )
-        request.addIdentifier( 'geomField', 'the_geom' )
-
-        # Get lake geometries
-        lakes = DataAccessLayer.getGeometryData( request, None )
-        logger.info( "\tUsing %d lake MultiPolygons" % len( lakes ) )
+        lakes = self._map_layer( 'mapdata.lake' )
+        logger.info( "\tUsing %d lake MultiPolygons" % len( lakes.geometries ) )
 
         # Plot lakes
-        shape_feature = ShapelyFeature( [ lake.getGeometry() for lake in lakes ], self.crs, facecolor='blue', linestyle='-', edgecolor='#20B2AA', alpha=0.25 )
+        shape_feature = ShapelyFeature( lakes.geometries, self.crs, **LAYER_STYLES['lakes'] )
         self.axes.add_feature( shape_feature )
 
         logger.info( '...done' )
@@ -164,51 +533,217 @@ class MapGenerator( RadarLoopGenerator ):
     def _generate_rivers( self ) -> None:
         logger.info( 'Generating layer 5 of 6: major rivers...' )
 
-        # Define request for rivers
-        request = DataAccessLayer.newDataRequest( 'maps', envelope=self.image_envelope )
-        request.addIdentifier( 'table', 'mapdata.majorrivers' )
-        request.addIdentifier( 'geomField', 'the_geom' )
-
-        # Get river geometries
-        rivers = DataAccessLayer.getGeometryData( request, None )
-        logger.info( "\tUsing %d river MultiLineStrings" % len( rivers ) )
+        rivers = self._map_layer( 'mapdata.majorrivers' )
+        logger.info( "\tUsing %d river MultiLineStrings" % len( rivers.geometries ) )
 
         # Plot rivers
-        shape_feature = ShapelyFeature( [ river.getGeometry() for river in rivers ], self.crs, facecolor='none', linestyle=":", edgecolor='#20B2AA', alpha=0.25 )
-        self.axes.add_feature( shape_feature )
+        self._draw_lines( rivers, **LAYER_STYLES['rivers'] )
 
         logger.info( '...done' )
 
 
+    def _draw_lines( self, layer: MapLayer, **kwargs ) -> None:
+        """
+        Draws every line of a layer as one collection, so the cost of drawing
+        it doesn't grow with the number of features
+        """
+
+        from matplotlib.collections import LineCollection
+
+        # The same width add_feature() would have used
+        kwargs.setdefault( 'linewidth', 1.0 )
+
+        lines = LineCollection( layer.line_segments(), transform=self.crs, **kwargs )
+        self.axes.add_collection( lines, autolim=False )
+
+
+    def _map_layer( self, table: str ) -> MapLayer:
+        """A `mapdata` table's geometries within the image, clipped and simplified to the output resolution"""
+
+        def fetch( envelope: sgeo.Polygon ) -> { str: np.ndarray }:
+            DataAccessLayer = data_access_layer()
+
+            request = DataAccessLayer.newDataRequest( 'maps', envelope=envelope )
+            request.addIdentifier( 'table', table )
+            request.addIdentifier( 'geomField', 'the_geom' )
+
+            response = DataAccessLayer.getGeometryData( request, None )
+            offsets, wkb = pack_geometries( [ item.getGeometry() for item in response ] )
+
+            return dict( offsets=offsets, wkb=wkb )
+
+        def geometries() -> list:
+            source = self._site_source( table, fetch )
+            return unpack_geometries( source['offsets'], source['wkb'] )
+
+        return self._cached_layer( table, geometries )
+
+
+    def _site_source( self, name: str, fetch: Callable[ [ sgeo.Polygon ], { str: np.ndarray } ] ) -> { str: np.ndarray }:
+        """
+        The arrays a layer is built from, fetched once for the site's
+        source envelope and saved.  Maps of any smaller radius are cut from
+        them rather than querying EDEX again; only a larger map than any
+        before it fetches them afresh.
+        """
+
+        from .site_source import load_source, save_source
+
+        source_file = self._site_source_file( name )
+
+        if self._refreshing( 'source', name ):
+            logger.info( "→ Fetching {} for {} again, as its layer is being rebuilt", name, self.site_id )
+
+        elif source_file.is_file():
+            try:
+                source = load_source( source_file, self.image_envelope )
+                if source is not None:
+                    return source
+            except ( OSError, ValueError, KeyError ) as e:
+                logger.warning( "Fetching unreadable map source {} again: {}", source_file.name, e )
+
+        envelope = self.source_envelope
+        source = fetch( envelope )
+
+        save_source( source_file, envelope, source )
+        logger.info( "→ Saved {} for {} out to {} miles", name, self.site_id, max( self.radius, self.source_radius or 0 ) )
+
+        return source
+
+
+    def _site_source_file( self, name: str ) -> Path:
+        return Path( self.shared_path, SITE_SOURCE_DIR, self.site_id.lower(), f"{name.replace( '.', '_' )}.npz" )
+
+
+    def _natural_earth_file( self, name: str ) -> Path | None:
+        """Where a Natural Earth layer is found locally, if it is"""
+
+        category, layer_name = NATURAL_EARTH_LAYERS[ name ]
+        shared_dir = Path( self.shared_path, NATURAL_EARTH_DIR )
+
+        return find_shapefile( [ RLGDefaults.natural_earth_dir, shared_dir, cartopy_config['data_dir'] ], category, layer_name, SCALE['medium'] )
+
+
+    def _natural_earth_layer( self, name: str ) -> MapLayer | None:
+        """
+        A Natural Earth layer within the image, clipped and simplified like
+        the `mapdata` tables.  Only the geometries crossing the image are
+        taken from the layer's spatial index.  None if the layer can't be
+        found locally or downloaded.
+        """
+
+        file = self._natural_earth_file( name )
+
+        if file is None:
+            try:
+                file, = seed( Path( self.shared_path, NATURAL_EARTH_DIR ), SCALE['medium'], { name: NATURAL_EARTH_LAYERS[ name ] } )
+            except OSError as e:
+                logger.warning( "Skipping Natural Earth {}, which isn't available locally and couldn't be downloaded: {}", name, e )
+                return None
+
+        return self._cached_layer( f"natural_earth.{file.stem}", lambda: natural_earth_index( str( file ) ).query( self.image_envelope ) )
+
+
+    def _cached_layer( self, source: str, fetch: Callable[ [], list ] ) -> MapLayer:
+        """
+        The geometries from `fetch`, clipped and simplified to the output
+        resolution.  The result is saved under the shared directory and
+        reused by later maps with the same bounds.
+        """
+
+        envelope = self.image_envelope
+        tolerance = simplify_tolerance( self.pixels_per_degree )
+
+        key = MapLayer.make_key( source, envelope, tolerance )
+        layer_file = Path( self.shared_path, MAP_LAYER_DIR, MapLayer.file_name( key ) )
+
+        if not self._refreshing( 'layer', source ) and layer_file.is_file():
+            try:
+                layer = MapLayer.load( layer_file )
+                if layer.key == key:
+                    return layer
+            except ( OSError, ValueError, KeyError ) as e:
+                logger.warning( "Rebuilding unreadable map layer {}: {}", layer_file.name, e )
+
+        geometries = fetch()
+
+        layer = MapLayer.build( key, geometries, envelope, tolerance )
+        layer.save( layer_file )
+
+        vertices = MapLayer( key, geometries ).vertices
+        logger.info( "\tSimplified {} from {} to {} vertices", source, vertices, layer.vertices )
+
+        return layer
+
+
+    @classmethod
+    def _validate_topography( cls, style: str ) -> None:
+        if style not in TOPOGRAPHY_STYLES:
+            raise RLGValueError( f"The topography style must be one of: {', '.join( TOPOGRAPHY_STYLES )}" )
+
+
     def _generate_cities( self ) -> None:
         logger.info( 'Generating layer 6 of 6: cities...' )
 
-        # Define the request for the cities
-        request = DataAccessLayer.newDataRequest( 'maps', parameters=[ 'name', 'population', 'prog_disc', 'lat', 'lon' ], envelope=self.image_envelope.buffer( -0.5 ) )
-        request.addIdentifier( 'table', 'mapdata.city' )
-        request.addIdentifier( 'geomField', 'the_geom' )
+        def fetch( envelope: sgeo.Polygon ) -> { str: np.ndarray }:
+            DataAccessLayer = data_access_layer()
+
+            # Define the request for the cities
+            request = DataAccessLayer.newDataRequest( 'maps', parameters=[ 'name', 'population', 'prog_disc', 'lat', 'lon' ], envelope=envelope )
+            request.addIdentifier( 'table', 'mapdata.city' )
+            request.addIdentifier( 'geomField', 'the_geom' )
+
+            # Get city geometries
+            cities = DataAccessLayer.getGeometryData( request, None )
+            points = [ city.getGeometry() for city in cities ]
+
+            # Pull the attributes out into arrays once, so filtering and placement work on every city at once
+            return dict(
+                names       = np.array( [ city.getString( 'name' ) for city in cities ], dtype=str ),
+                populations = np.array( [ city.getString( 'population' ) for city in cities ], dtype=str ),
+                prog_disc   = np.array( [ city.getNumber( 'prog_disc' ) for city in cities ], dtype=float ),
+                x           = np.array( shapely.get_x( points ) if points else [], dtype=float ),
+                y           = np.array( shapely.get_y( points ) if points else [], dtype=float ),
+            )
+
+        source = self._site_source( 'mapdata.city', fetch )
+
+        # Only those well inside the image
+        inside = shapely.contains_xy( self.image_envelope.buffer( -0.5 ), source['x'], source['y'] )
+
+        names = source['names'][inside].astype( object )
+        populations = source['populations'][inside]
+        prog_disc = source['prog_disc'][inside]
+        x, y = source['x'][inside], source['y'][inside]
+
+        logger.info( "\tFound %d cities within the image" % len( names ) )
+
+        if not len( names ):
+            logger.info( '...done' )
+            return
+
+        known = populations != 'None'
+        population = np.zeros( len( names ) )
+        population[known] = populations[known].astype( float )
 
-        # Get city geometries
-        cities = DataAccessLayer.getGeometryData( request, None )
-        logger.info( "\tQueried %d total cities" % len( cities ) )
+        selected = known & ( prog_disc > 8000 ) & ( population > 5000 )
 
-        # Set aside two arrays - one for the geometry of the cities and one for their names
-        city_coords = []
-        city_names = []
+        names = names[selected]
+        population = population[selected]
+        x, y = x[selected], y[selected]
 
-        for city in cities:
-            if city.getString( 'population' ) != 'None':
-                if city.getNumber( 'prog_disc' ) > 8000 and int( city.getString( 'population' ) ) > 5000:
-                    city_coords.append( city.getGeometry() )
-                    city_names.append( city.getString( 'name' ) )
+        # Where labels would overlap, keep the biggest city's
+        scale = self.figure.dpi / 72.0 / self.pixels_per_degree
+        boxes = label_boxes( x, y, [ len( name ) for name in names ], CITY_LABEL_OFFSET, rcParams['font.size'], CITY_MARKER_SIZE, scale )
+        kept = declutter( boxes, population )
 
-        logger.info( "\tPlotting %d cities" % len( city_names ) )
+        logger.info( "\tPlotting %d of %d cities" % ( len( kept ), len( names ) ) )
 
         # Plot city markers
-        self.axes.scatter( [point.x for point in city_coords], [point.y for point in city_coords], transform=self.crs, marker='.', facecolor='black' )
+        self.axes.scatter( x[kept], y[kept], transform=self.crs, **LAYER_STYLES['cities']['markers'] )
 
         # Plot city names
-        for i, name in enumerate( city_names ):
-            self.axes.annotate( name, ( city_coords[i].x, city_coords[i].y ), xytext=( 3, -8 ), textcoords='offset points', transform=self.crs )
+        for i in kept:
+            self.axes.annotate( names[i], ( x[i], y[i] ), transform=self.crs, **LAYER_STYLES['cities']['labels'] )
 
         logger.info( '...done' )
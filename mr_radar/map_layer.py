@@ -0,0 +1,130 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import hashlib
+import numpy as np
+import shapely
+from pathlib import Path
+from shapely.geometry.base import BaseGeometry
+
+
+# Vertices closer together than this fraction of a pixel can't be told apart
+SIMPLIFY_PIXELS = 0.5
+
+# Geometries are clipped this many pixels outside the image, so strokes don't end visibly at its edge
+CLIP_MARGIN_PIXELS = 2
+
+# shapely type ids, see shapely.get_type_id()
+LINE_TYPES    = [ 1, 2 ]
+POLYGON_TYPES = [ 3 ]
+
+
+def simplify_tolerance( pixels_per_degree: float ) -> float:
+    """The simplification tolerance, in degrees, for an image of the given resolution"""
+    return SIMPLIFY_PIXELS / pixels_per_degree
+
+
+def pack_geometries( geometries: [ BaseGeometry ] ) -> ( np.ndarray, np.ndarray ):
+    """Geometries as one buffer of WKB and the offset where each starts, which np.savez() can store without pickling"""
+
+    chunks = shapely.to_wkb( geometries ) if len( geometries ) else []
+    offsets = np.cumsum( [ 0, *( len( chunk ) for chunk in chunks ) ] )
+
+    return offsets, np.frombuffer( b''.join( chunks ), dtype=np.uint8 )
+
+
+def unpack_geometries( offsets: np.ndarray, wkb: np.ndarray ) -> [ BaseGeometry ]:
+    wkb = wkb.tobytes()
+    chunks = [ wkb[ start:end ] for start, end in zip( offsets[:-1], offsets[1:] ) ]
+    return list( shapely.from_wkb( chunks ) ) if chunks else []
+
+
+class MapLayer:
+    """
+    The geometries of one base map layer, clipped to the image envelope and
+    simplified to the output resolution.  A map at a large radius would
+    otherwise carry thousands of vertices per pixel.  Layers are saved as WKB
+    under a key naming the source, envelope and tolerance, so the next map
+    for the same bounds is built without asking EDEX for them again.
+    """
+
+    def __init__( self, key: str, geometries: [ BaseGeometry ] ) -> None:
+        self.key = key
+        self.geometries = list( geometries )
+
+
+    @property
+    def vertices( self ) -> int:
+        return int( shapely.get_num_coordinates( self.geometries ).sum() ) if self.geometries else 0
+
+
+    def line_segments( self ) -> [ np.ndarray ]:
+        """
+        Every line in the layer as an array of vertices, with polygons
+        reduced to their outlines, ready to be drawn as a single collection
+        """
+
+        if not self.geometries:
+            return []
+
+        parts = shapely.get_parts( np.asarray( self.geometries, dtype=object ) )
+
+        polygonal = np.isin( shapely.get_type_id( parts ), POLYGON_TYPES )
+        parts[polygonal] = shapely.boundary( parts[polygonal] )
+        parts = shapely.get_parts( parts )
+
+        # Clipping can leave stray points behind where a line touched the envelope
+        parts = parts[ np.isin( shapely.get_type_id( parts ), LINE_TYPES ) ]
+
+        coords, index = shapely.get_coordinates( parts, return_index=True )
+
+        return np.split( coords, np.flatnonzero( np.diff( index ) ) + 1 ) if len( coords ) else []
+
+
+    @classmethod
+    def make_key( cls, source: str, envelope: BaseGeometry, tolerance: float ) -> str:
+        bounds = ','.join( f"{bound:.5f}" for bound in envelope.bounds )
+        return f"{source}|{bounds}|{tolerance:.3g}"
+
+
+    @classmethod
+    def file_name( cls, key: str ) -> str:
+        source = key.partition( '|' )[0].replace( '.', '_' )
+        return f"{source}_{hashlib.sha1( key.encode() ).hexdigest()[:12]}.npz"
+
+
+    @classmethod
+    def build( cls, key: str, geometries: [ BaseGeometry ], envelope: BaseGeometry, tolerance: float ) -> MapLayer:
+
+        geometries = np.asarray( geometries, dtype=object )
+
+        if not len( geometries ):
+            return cls( key, [] )
+
+        clip = envelope.buffer( tolerance / SIMPLIFY_PIXELS * CLIP_MARGIN_PIXELS, join_style='mitre' )
+
+        geometries = shapely.intersection( geometries, clip )
+        geometries = shapely.simplify( geometries, tolerance, preserve_topology=True )
+
+        return cls( key, geometries[ ~shapely.is_empty( geometries ) ] )
+
+
+    @classmethod
+    def load( cls, file: str | Path ) -> MapLayer:
+        with np.load( file ) as data:
+            return cls( str( data['key'] ), unpack_geometries( data['offsets'], data['wkb'] ) )
+
+
+    def save( self, file: str | Path ) -> None:
+
+        file = Path( file )
+        file.parent.mkdir( parents=True, exist_ok=True )
+
+        offsets, wkb = pack_geometries( self.geometries )
+
+        # np.savez() adds '.npz' to names that don't already end with it
+        temp_file = file.with_name( f".{file.stem}.tmp.npz" )
+        np.savez( temp_file, key=self.key, offsets=offsets, wkb=wkb )
+        os.replace( temp_file, file )
@@ -0,0 +1,148 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Any, Callable
+
+import os
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+
+from loguru import logger
+
+
+# The cache is kept here, under the shared directory
+METADATA_FILE = 'metadata.json'
+
+
+class MetadataCache:
+    """
+    Answers to EDEX's metadata queries, such as which levels, scan times and
+    products a site has, each trusted for as long as its kind's TTL allows.
+    They're held in memory, for processes that generate again and again,
+    and saved to disk, so separate command-line runs share them too.
+
+    Values are stored as whatever `encode` turns them into, which must be
+    JSON, and handed back through `decode`, so that a query answers with
+    the same types whether it was asked of EDEX or of the cache.
+    """
+
+    def __init__( self, file: str | Path=None, ttl: { str: float }=None, clock: Callable[ [], float ]=time.time ) -> None:
+        self.file = Path( file ) if file else None
+        self.ttl = dict( ttl or {} )
+        self.clock = clock
+
+        self._entries = {}
+        self._lock = Lock()
+
+        if self.file and self.file.is_file():
+            try:
+                self._entries = self._read()
+            except ( OSError, ValueError ) as e:
+                logger.warning( "Ignoring unreadable metadata cache {}: {}", self.file.name, e )
+
+
+    def get( self, kind: str, key: [ str ], fetch: Callable[ [], Any ],
+             encode: Callable[ [ Any ], Any ]=None, decode: Callable[ [ Any ], Any ]=None ) -> Any:
+        """
+        The answer to a query of `kind`, identified by `key`, from the cache
+        if it's younger than the kind's TTL, or else from `fetch`
+        """
+
+        encode = encode or ( lambda value: value )
+        decode = decode or ( lambda value: value )
+
+        name = '|'.join( [ kind, *( str( part ) for part in key ) ] )
+        now = self.clock()
+
+        entry = self._entry( kind, name, now )
+        if entry:
+            return decode( entry['value'] )
+
+        value = encode( fetch() )
+        self._store( name, value, now )
+
+        return decode( value )
+
+
+    def peek( self, kind: str, key: [ str ] ) -> Any:
+        """The cached answer to a query, without asking anything if there isn't one, in which case it's None"""
+
+        entry = self._entry( kind, '|'.join( [ kind, *( str( part ) for part in key ) ] ), self.clock() )
+        return entry['value'] if entry else None
+
+
+    def put( self, kind: str, key: [ str ], value: Any, encode: Callable[ [ Any ], Any ]=None ) -> None:
+        """Records an answer learned some other way, replacing whatever was cached"""
+
+        encode = encode or ( lambda value: value )
+        self._store( '|'.join( [ kind, *( str( part ) for part in key ) ] ), encode( value ), self.clock() )
+
+
+    def _entry( self, kind: str, name: str, now: float ) -> dict | None:
+
+        with self._lock:
+            entry = self._entries.get( name )
+
+        if entry and 0 <= now - entry['fetched'] < self.ttl.get( kind, 0 ):
+            return entry
+
+        return None
+
+
+    def _store( self, name: str, value: Any, now: float ) -> None:
+        entry = dict( fetched=now, value=value )
+
+        with self._lock:
+            self._entries[name] = entry
+            self._expire( self._entries, now )
+
+        if self.file:
+            self._write( name, entry, now )
+
+
+    def clear( self ) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+    def _expire( self, entries: { str: dict }, now: float ) -> None:
+        """Forgets entries too old to be used again, so the cache doesn't keep every query ever made"""
+
+        for name in [ name for name, entry in entries.items() if now - entry['fetched'] >= self.ttl.get( name.partition( '|' )[0], 0 ) ]:
+            del entries[name]
+
+
+    def _read( self ) -> { str: dict }:
+        with open( self.file ) as f:
+            return json.load( f )
+
+
+    def _write( self, name: str, entry: dict, now: float ) -> None:
+        """Merges the entry into the file as it is now, so runs sharing the file don't undo each other's work"""
+
+        entries = {}
+        if self.file.is_file():
+            try:
+                entries = self._read()
+            except ( OSError, ValueError ):
+                pass
+
+        entries[name] = entry
+        self._expire( entries, now )
+
+        self.file.parent.mkdir( parents=True, exist_ok=True )
+        temp_file = self.file.with_name( f".{self.file.name}.{os.getpid()}.tmp" )
+
+        with open( temp_file, 'w' ) as f:
+            json.dump( entries, f, indent=2 )
+
+        os.replace( temp_file, self.file )
+
+
+@lru_cache( maxsize=None )
+def metadata_cache( shared_path: str=None, ttl: ( ( str, float ), ... )=() ) -> MetadataCache:
+    """One cache per shared directory per process"""
+    return MetadataCache( Path( shared_path, METADATA_FILE ) if shared_path else None, dict( ttl ) )
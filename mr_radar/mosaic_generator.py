@@ -0,0 +1,393 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+from .rlg_defaults import RLGDefaults
+from .cache_keys import RadarCacheKeys
+from .radar_loop_generator import data_access_layer
+from .frame_generator import FrameGenerator, FRAME_ALPHA, colormap, colormap_lut
+from .radar_frame import RadarFrame
+from .rlg_exception import *
+
+if TYPE_CHECKING:
+    from awips.dataaccess import IGridData, IDataRequest
+    from .mosaic_grid import MosaicGrid
+    from .radar_products import RadarProduct
+    from .grid_batches import GridBatches
+
+
+class MosaicGenerator( FrameGenerator ):
+    """
+    Renders one regional loop from several radar sites.  Each site's scans
+    are matched to a common set of frame times, and the grids are merged with
+    max-reflectivity compositing into a single raster per frame, so a viewer
+    downloads one loop instead of one per site.
+    """
+
+    def __init__( self, site_id: str, sites: [ str ]=None, bbox: [ float, float, float, float ]=None,
+                  resolution: float=None, **kwargs ) -> None:
+
+        # The JSON cache and image directory are named after every site, so
+        # these need to be known before the parent constructor loads the cache
+        self._sites = self._parse_sites( site_id, sites )
+        self._bbox = None
+        self._grid = None
+
+        super().__init__( site_id=site_id, **kwargs )
+
+        self.bbox = bbox
+        self.resolution = resolution
+
+
+    @property
+    def sites( self ) -> [ str ]:
+        return self._sites
+
+
+    @property
+    def output_name( self ) -> str:
+        return '_'.join( [ 'mosaic', *[ site.lower() for site in self.sites ] ] )
+
+
+    @property
+    def display_name( self ) -> str:
+        return '+'.join( self.sites )
+
+
+    @property
+    def sites_coords( self ) -> { str: ( float, float ) }:
+        return self.cache.get( RadarCacheKeys.SITES_COORDS, {} )
+
+
+    @sites_coords.setter
+    def sites_coords( self, coords: { str: ( float, float ) } ) -> None:
+        self.cache.set( RadarCacheKeys.SITES_COORDS, coords )
+
+
+    @property
+    def bbox( self ) -> [ float, float, float, float ] | None:
+        """The regional bounding box requested up front, if any; otherwise it covers every site's radius"""
+        return self._bbox
+
+
+    @bbox.setter
+    def bbox( self, bbox: [ float, float, float, float ] ) -> None:
+
+        if bbox is None:
+            return
+
+        self._validate_bbox( bbox )
+        self._bbox = [ float( coord ) for coord in bbox ]
+
+        if self.image_bbox != self._bbox:
+            self.cache.rem( RadarCacheKeys.BBOX )
+            self.cache.rem( RadarCacheKeys.ENVELOPE )
+
+
+    @property
+    def resolution( self ) -> float:
+        return self.cache.get( RadarCacheKeys.MOSAIC_RESOLUTION, RLGDefaults.mosaic_resolution )
+
+
+    @resolution.setter
+    def resolution( self, resolution: float ) -> None:
+
+        if resolution is None:
+            return
+
+        self._validate_resolution( resolution )
+        self.cache.set( RadarCacheKeys.MOSAIC_RESOLUTION, resolution )
+
+
+    @property
+    def product_list( self ) -> [ RadarProduct ]:
+        return super().product_list[:1]
+
+
+    @property
+    def grid( self ) -> MosaicGrid:
+        if not self._grid:
+            from .mosaic_grid import MosaicGrid
+            self._grid = MosaicGrid( self.image_bbox, self.resolution )
+        return self._grid
+
+
+    @classmethod
+    def _parse_sites( cls, site_id: str, sites: [ str ] | None ) -> [ str ]:
+
+        cls._validate_site_id( site_id )
+
+        parsed = [ site_id.upper() ]
+        for site in ( sites or [] ):
+            cls._validate_site_id( site )
+            if site.upper() not in parsed:
+                parsed.append( site.upper() )
+
+        return parsed
+
+
+    @classmethod
+    def _validate_bbox( cls, bbox: [ float, float, float, float ] ) -> None:
+
+        if not isinstance( bbox, ( list, tuple ) ) or len( bbox ) != 4 or not all( isinstance( coord, ( int, float ) ) for coord in bbox ):
+            raise RLGValueError( 'The bounding box must be four numbers: west, south, east and north' )
+
+        west, south, east, north = bbox
+
+        if not ( -180 <= west < east <= 180 ) or not ( -90 <= south < north <= 90 ):
+            raise RLGValueError( 'The bounding box must be ordered west, south, east, north, in degrees' )
+
+
+    @classmethod
+    def _validate_resolution( cls, resolution: float ) -> None:
+        if not isinstance( resolution, ( int, float ) ) or resolution < 0.005 or resolution > 0.5:
+            raise RLGValueError( 'The mosaic resolution must be between 0.005 and 0.5 degrees' )
+
+
+    @classmethod
+    def align_times( cls, site_times: { str: [ int ] }, frames: int, tolerance: int ) -> ( [ int ], { str: [ int | None ] } ):
+        """
+        Picks the frame times from whichever site has the most recent scan,
+        then matches every site to its nearest scan within `tolerance`
+        milliseconds of each of those.  A site with no close enough scan is
+        left out of that frame.
+        """
+
+        import numpy as np
+
+        site_times = { site: np.sort( np.asarray( times, dtype=np.int64 ) ) for site, times in site_times.items() if len( times ) }
+
+        if not site_times:
+            return [], {}
+
+        reference = max( site_times, key=lambda site: site_times[site][-1] )
+        targets = site_times[reference][-frames:]
+
+        aligned = {}
+        for site, times in site_times.items():
+            after = np.clip( np.searchsorted( times, targets ), 0, len( times ) - 1 )
+            before = np.clip( after - 1, 0, len( times ) - 1 )
+
+            nearest = np.where( np.abs( times[before] - targets ) <= np.abs( times[after] - targets ), times[before], times[after] )
+            close = np.abs( nearest - targets ) <= tolerance
+
+            aligned[site] = [ int( time ) if ok else None for time, ok in zip( nearest, close ) ]
+
+        return [ int( time ) for time in targets ], aligned
+
+
+    def generate( self ) -> None:
+
+        if len( self.products ) > 1:
+            logger.warning( "Mosaics are composited from one product; only {} will be used", self.product )
+
+        logger.info( "Compositing NEXRAD frames from {}...", ', '.join( self.sites ) )
+
+        super().generate()
+
+
+    def make_figure( self ) -> None:
+        super().make_figure()
+        self.axes.set_extent( self.grid.extent, crs=self.crs )
+
+
+    def _prepare_request( self, site_id: str=None ) -> IDataRequest:
+
+        request = data_access_layer().newDataRequest( 'radar', envelope=self.image_envelope )
+        request.addIdentifier( 'icao', ( site_id or self.site_id ).lower() )
+
+        return request
+
+
+    def _fetch_data( self, products: [ RadarProduct ] ) -> { str: GridBatches }:
+        """
+        For each frame time, newest first, the grid of every site that
+        scanned close enough to it.  Each site costs one time query, and one
+        grid request per batch; the level is looked up once, from the first
+        site.
+        """
+
+        logger.info( 'Preparing NEXRAD mosaic data requests...' )
+
+        from .grid_batches import GridBatches, grid_nbytes
+
+        DataAccessLayer = data_access_layer()
+        product = products[0].product
+
+        requests = { site: self._prepare_request( site ) for site in self.sites }
+        for request in requests.values():
+            request.setParameters( product )
+
+        available_levels = self._available_levels( requests[self.site_id], [ self.site_id, product ] )
+        logger.info( "→ Available levels: {}", len( available_levels ) )
+
+        level = None
+        if available_levels:
+            level = available_levels[0]
+            for request in requests.values():
+                request.setLevels( level )
+            logger.info( "    ...using {}", level )
+
+        logger.info( '→ Fetching available times...' )
+
+        available = {}
+        for site, request in requests.items():
+            times = self._available_times( request, [ site, product, level ] )
+            available[site] = { time.getRefTime().getTime(): time for time in times }
+            logger.info( "    ...got {} for {}", len( times ), site )
+
+        targets, aligned = self.align_times(
+            { site: list( times ) for site, times in available.items() },
+            self.frames,
+            RLGDefaults.mosaic_tolerance * 1000
+        )
+
+        logger.info( '...done.' )
+
+        for site, times in aligned.items():
+            if not any( time is not None for time in times ):
+                logger.warning( "No scans from {} line up with the mosaic frames; skipping.", site )
+
+        # Which scan of each site goes into each frame
+        matches = {
+            target: [ ( site, times[k] ) for site, times in aligned.items() if times[k] is not None ]
+            for k, target in enumerate( targets )
+        }
+
+        def fetch( batch: [ int ] ) -> [ ( int, [ ( str, IGridData ) ] ) ]:
+            logger.info( "Fetching {} NEXRAD mosaic frames from {} sites...", len( batch ), len( aligned ) )
+
+            grids = { target: [] for target in batch }
+            for site in aligned:
+                wanted = sorted( { time for target in batch for s, time in matches[target] if s == site } )
+
+                if not wanted:
+                    continue
+
+                response = DataAccessLayer.getGridData( requests[site], [ available[site][time] for time in wanted ] )
+                by_time = { grid.getDataTime().getRefTime().getTime(): grid for grid in response }
+
+                for target in batch:
+                    for s, time in matches[target]:
+                        if s == site and time in by_time:
+                            grids[target].append( ( site, by_time[time] ) )
+
+            logger.info( '...done.' )
+
+            return [ ( target, grids[target] ) for target in batch if grids[target] ]
+
+        def sizeof( source: ( int, [ ( str, IGridData ) ] ) ) -> int:
+            return sum( grid_nbytes( grid ) for _, grid in source[1] )
+
+        budget = self.memory_budget * 2**20 if self.memory_budget else None
+        newest_first = [ target for target in reversed( targets ) if matches[target] ]
+
+        return { product: GridBatches( newest_first, fetch, sizeof, budget ) }
+
+
+    def _draw_frame( self, i: int, source: ( int, [ ( str, IGridData ) ] ) ) -> ( list, RadarFrame ):
+
+        target, grids = source
+
+        layers = []
+        for site, grid in grids:
+            lons, lats = grid.getLatLonCoords()
+            layers.append( ( site, lons, lats, grid.getRawData() ) )
+
+        artists = []
+
+        # When no site has any echoes there's nothing to composite
+        lut = colormap_lut( self.style, self._cache_path )
+        empty = not any( lut.visible( data ) for _, _, _, data in layers )
+
+        if not empty:
+            data = self.grid.composite( layers )
+
+            norm, cmap = colormap( self.style, self._cache_path )
+            artists.append( self.axes.imshow(
+                data, origin='lower', extent=self.grid.extent, transform=self.crs,
+                cmap=cmap, norm=norm, alpha=FRAME_ALPHA, interpolation='nearest'
+            ) )
+
+        # Every site's grid was matched to this frame, so label it with the reference scan
+        reference = grids[0][1]
+        for site, grid in grids:
+            if grid.getDataTime().getRefTime().getTime() == target:
+                reference = grid
+
+        sites = [ site for site, _ in grids ]
+        values = ( '+'.join( sites ), reference.getParameter(), reference.getLevel() or 'N/A' )
+        label, date_time = self._frame_label( reference, values )
+
+        if self.labels:
+            artists.append( self._draw_label( label ) )
+
+        metadata = self._frame_metadata( date_time, "Sites: %s, Product: %s, Level: %s" % values )
+
+        frame = RadarFrame( i, self.product, reference.getDataTime(), target, label, metadata, empty=empty )
+
+        return artists, frame
+
+
+    def _check_site_coords( self ) -> None:
+
+        coords = self.sites_coords
+        missing = [ site for site in self.sites if site not in coords ]
+
+        if missing:
+            logger.info( "Retrieving coordinates for {}...", ', '.join( missing ) )
+
+            DataAccessLayer = data_access_layer()
+            request = DataAccessLayer.newDataRequest( 'obs', parameters=[ 'longitude', 'latitude' ], locationNames=missing )
+            response = DataAccessLayer.getGeometryData( request, None )
+
+            for data in response:
+                site = data.getLocationName().upper()
+                if site in missing and site not in coords:
+                    coords[site] = ( data.getNumber( 'latitude' ), data.getNumber( 'longitude' ) )
+
+            missing = [ site for site in self.sites if site not in coords ]
+            if missing:
+                raise RLGRuntimeError( f"Empty response while requesting coordinates for sites {', '.join( missing )}" )
+
+            self.sites_coords = coords
+
+            logger.info( '...done' )
+
+        if not self.site_coords:
+            self.site_coords = coords[self.site_id]
+
+
+    def _check_image_bounds( self ) -> None:
+
+        if not self.radius:
+            raise RLGRuntimeError( 'Radius not specified' )
+
+        if self.image_bbox and self.image_envelope:
+            return
+
+        import shapely.geometry as sgeo
+
+        if self.bbox:
+            self.image_bbox = self.bbox
+
+        else:
+            logger.info( "Calculating mosaic bounds for {}...", ', '.join( self.sites ) )
+
+            from .bounding_box_calculator import BoundingBoxCalculator
+
+            bboxes = [ BoundingBoxCalculator( self.sites_coords[site], self.radius ).get_bbox() for site in self.sites ]
+            self.image_bbox = [
+                min( bbox[0] for bbox in bboxes ),
+                min( bbox[1] for bbox in bboxes ),
+                max( bbox[2] for bbox in bboxes ),
+                max( bbox[3] for bbox in bboxes )
+            ]
+
+        self.image_envelope = sgeo.mapping( sgeo.box( *self.image_bbox ) )
+
+        logger.info( f"...done.  Mosaic bounds for {self.display_name}: {self.image_bbox}" )
@@ -0,0 +1,125 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+
+
+class MosaicGrid:
+    """
+    A regular lat/lon raster covering a regional bounding box, into which the
+    grids of several radar sites are merged by keeping the highest value that
+    lands in each cell.  The cell each source gate falls into only depends on
+    the site's coordinates, so it's worked out once per site and reused for
+    every scan.
+    """
+
+    def __init__( self, bbox: [ float, float, float, float ], resolution: float, fill_passes: int=2 ) -> None:
+        self.west, self.south, self.east, self.north = bbox
+        self.resolution = resolution
+        self.fill_passes = fill_passes
+
+        self.width  = max( 1, int( np.ceil( ( self.east - self.west ) / resolution ) ) )
+        self.height = max( 1, int( np.ceil( ( self.north - self.south ) / resolution ) ) )
+
+        self._indices = {}
+
+
+    @property
+    def shape( self ) -> ( int, int ):
+        return self.height, self.width
+
+
+    @property
+    def extent( self ) -> [ float, float, float, float ]:
+        """West, east, south and north, as imshow() and set_extent() expect them"""
+        return [
+            self.west,
+            self.west + self.width * self.resolution,
+            self.south,
+            self.south + self.height * self.resolution
+        ]
+
+
+    def locate( self, key: str, lons: np.ndarray, lats: np.ndarray ) -> ( np.ndarray, np.ndarray ):
+        """
+        The flattened cell index of every source gate that lands inside the
+        grid, and the mask of which gates those are.  Results are cached under
+        `key` for as long as the source grid keeps the same shape.
+        """
+
+        lons = np.asarray( lons )
+        lats = np.asarray( lats )
+
+        cached = self._indices.get( key )
+        if cached and cached[0] == lons.shape:
+            return cached[1], cached[2]
+
+        with np.errstate( invalid='ignore' ):
+            x = np.floor( ( lons - self.west ) / self.resolution )
+            y = np.floor( ( lats - self.south ) / self.resolution )
+
+            inside = np.isfinite( x ) & np.isfinite( y ) & ( x >= 0 ) & ( x < self.width ) & ( y >= 0 ) & ( y < self.height )
+
+        inside = inside.ravel()
+        indices = ( y.ravel()[inside].astype( np.intp ) * self.width ) + x.ravel()[inside].astype( np.intp )
+
+        self._indices[key] = ( lons.shape, indices, inside )
+
+        return indices, inside
+
+
+    def composite( self, layers: [ ( str, np.ndarray, np.ndarray, np.ndarray ) ] ) -> np.ma.MaskedArray:
+        """
+        Merges `( key, lons, lats, data )` layers, keeping the maximum value
+        per cell.  Cells that a site covers but where it has no echo stay
+        masked, while small gaps between the edges of distant, widening radar
+        gates are filled from their neighbours.
+        """
+
+        values = np.full( self.width * self.height, np.nan, dtype=np.float32 )
+        covered = np.zeros( self.width * self.height, dtype=bool )
+
+        for key, lons, lats, data in layers:
+            indices, inside = self.locate( key, lons, lats )
+
+            data = np.ma.masked_invalid( data ).astype( np.float32 )
+            data = np.ma.filled( data, np.nan ).ravel()[inside]
+
+            covered[indices] = True
+            np.fmax.at( values, indices, data )
+
+        values = values.reshape( self.shape )
+        covered = covered.reshape( self.shape )
+
+        self._fill_gaps( values, covered )
+
+        return np.ma.masked_invalid( values )
+
+
+    def _fill_gaps( self, values: np.ndarray, covered: np.ndarray ) -> None:
+
+        height, width = self.shape
+
+        for _ in range( self.fill_passes ):
+            gaps = ~covered
+
+            if not gaps.any():
+                return
+
+            padded_values = np.pad( values, 1, constant_values=np.nan )
+            padded_covered = np.pad( covered, 1, constant_values=False )
+
+            neighbour_values = np.full( self.shape, np.nan, dtype=values.dtype )
+            neighbour_covered = np.zeros( self.shape, dtype=bool )
+
+            for dy in range( 3 ):
+                for dx in range( 3 ):
+                    if dy == 1 and dx == 1:
+                        continue
+                    neighbour_values = np.fmax( neighbour_values, padded_values[ dy:dy + height, dx:dx + width ] )
+                    neighbour_covered |= padded_covered[ dy:dy + height, dx:dx + width ]
+
+            fill = gaps & neighbour_covered
+            values[fill] = neighbour_values[fill]
+            covered |= fill
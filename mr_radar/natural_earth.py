@@ -0,0 +1,106 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import shutil
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+from shapely import STRtree
+from shapely.geometry.base import BaseGeometry
+
+
+# The Natural Earth layers drawn on every map, by category and name.
+# See https://www.naturalearthdata.com/downloads/50m-cultural-vectors/
+NATURAL_EARTH_LAYERS = dict(
+    coastline = ( 'physical', 'coastline' ),
+    countries = ( 'cultural', 'admin_0_boundary_lines_land' ),
+    states    = ( 'cultural', 'admin_1_states_provinces_lines' ),
+)
+
+# A shapefile is several files side by side, all of which are needed
+SHAPEFILE_SUFFIXES = [ '.shp', '.shx', '.dbf', '.prj', '.cpg' ]
+
+
+def shapefile_name( scale: str, name: str ) -> str:
+    return f"ne_{scale}_{name}.shp"
+
+
+def find_shapefile( directories: [ str | Path ], category: str, name: str, scale: str ) -> Path | None:
+    """
+    Looks for a layer in each directory in turn, either directly in it or
+    laid out the way cartopy keeps its own downloads
+    """
+
+    file_name = shapefile_name( scale, name )
+
+    for directory in directories:
+        if not directory:
+            continue
+
+        for file in ( Path( directory, file_name ), Path( directory, 'shapefiles', 'natural_earth', category, file_name ) ):
+            if file.is_file():
+                return file
+
+    return None
+
+
+def seed( directory: str | Path, scale: str, layers: { str: ( str, str ) }=None ) -> [ Path ]:
+    """
+    Downloads the Natural Earth layers the map needs into `directory`, so
+    that maps can later be built without a network connection.  Layers
+    already there are left alone.
+    """
+
+    from cartopy.io import shapereader
+
+    directory = Path( directory )
+    directory.mkdir( parents=True, exist_ok=True )
+
+    files = []
+
+    for category, name in ( layers or NATURAL_EARTH_LAYERS ).values():
+        file = Path( directory, shapefile_name( scale, name ) )
+
+        if not file.is_file():
+            source = Path( shapereader.natural_earth( resolution=scale, category=category, name=name ) )
+
+            for suffix in SHAPEFILE_SUFFIXES:
+                if source.with_suffix( suffix ).is_file():
+                    shutil.copyfile( source.with_suffix( suffix ), file.with_suffix( suffix ) )
+
+            logger.info( "→ Saved Natural Earth layer {}", file.name )
+
+        files.append( file )
+
+    return files
+
+
+class NaturalEarthIndex:
+    """
+    Every geometry of one Natural Earth shapefile, held in a spatial index
+    so that a map only ever touches the handful that cross its envelope
+    rather than transforming the whole world
+    """
+
+    def __init__( self, geometries: [ BaseGeometry ] ) -> None:
+        self.geometries = np.asarray( geometries, dtype=object )
+        self.tree = STRtree( self.geometries )
+
+
+    def query( self, envelope: BaseGeometry ) -> [ BaseGeometry ]:
+        return list( self.geometries[ self.tree.query( envelope, predicate='intersects' ) ] )
+
+
+    @classmethod
+    def read( cls, file: str | Path ) -> NaturalEarthIndex:
+        from cartopy.io import shapereader
+        return cls( [ geometry for geometry in shapereader.Reader( str( file ) ).geometries() if geometry is not None ] )
+
+
+@lru_cache( maxsize=None )
+def natural_earth_index( file: str ) -> NaturalEarthIndex:
+    """Each shapefile is read and indexed once per process"""
+    return NaturalEarthIndex.read( file )
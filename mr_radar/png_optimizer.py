@@ -0,0 +1,142 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import zlib
+from io import BytesIO
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, Future
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+
+# zlib strategies understood by Pillow's PNG encoder (`compress_type`)
+PNG_STRATEGIES = dict(
+    default = zlib.Z_DEFAULT_STRATEGY,
+    filtered = zlib.Z_FILTERED,
+    huffman = zlib.Z_HUFFMAN_ONLY,
+    rle = zlib.Z_RLE,
+    fixed = zlib.Z_FIXED
+)
+
+
+def png_options( compression: int, strategy: str ) -> dict:
+    """Keyword arguments for Pillow's PNG encoder, also accepted by savefig() as `pil_kwargs`"""
+    return dict( compress_level=compression, compress_type=PNG_STRATEGIES[strategy] )
+
+
+class PNGOptimizer:
+    """
+    Losslessly re-encodes PNG files on a background thread pool, so that the
+    next image can be rendered while the previous one is being squeezed.  zlib
+    releases the GIL, so the threads do run in parallel with rendering.
+    """
+
+    def __init__( self, workers: int=None ) -> None:
+        self._executor = ThreadPoolExecutor( max_workers=workers or os.cpu_count(), thread_name_prefix='png-optimizer' )
+        self._futures = []
+
+
+    def __enter__( self ) -> PNGOptimizer:
+        return self
+
+
+    def __exit__( self, *args ) -> None:
+        self.wait()
+
+
+    def submit( self, file: str | Path ) -> Future:
+        future = self._executor.submit( self.optimize, file )
+        self._futures.append( future )
+        return future
+
+
+    def wait( self ) -> ( int, int ):
+        """Blocks until every submitted file is done, then returns the total bytes before and after"""
+
+        before = after = 0
+
+        for future in self._futures:
+            file_before, file_after = future.result()
+            before += file_before
+            after += file_after
+
+        self._futures = []
+        self._executor.shutdown()
+
+        if before:
+            logger.info( "→ Optimized PNGs: {:,} → {:,} bytes ({})", before, after, self._savings( before, after ) )
+
+        return before, after
+
+
+    @classmethod
+    def optimize( cls, file: str | Path ) -> ( int, int ):
+        """Rewrites the file only if a smaller lossless encoding was found, then returns its size before and after"""
+
+        file = Path( file )
+        before = file.stat().st_size
+
+        with Image.open( file ) as image:
+            image.load()
+
+        png_info = PngInfo()
+        for key, value in getattr( image, 'text', {} ).items():
+            png_info.add_text( key, value )
+
+        candidates = [ image ]
+        if image.mode == 'RGBA':
+            palette_image = cls._to_palette( image )
+            if palette_image:
+                candidates.append( palette_image )
+
+        best = None
+        for candidate in candidates:
+            for strategy in ( 'default', 'filtered', 'rle' ):
+                buffer = BytesIO()
+                kwargs = dict( optimize=True, pnginfo=png_info, compress_type=PNG_STRATEGIES[strategy] )
+                if 'transparency' in candidate.info:
+                    kwargs['transparency'] = candidate.info['transparency']
+                candidate.save( buffer, format='png', **kwargs )
+                if best is None or buffer.tell() < best.tell():
+                    best = buffer
+
+        after = before
+        if best.tell() < before:
+            temp_file = file.with_name( f".{file.name}.tmp" )
+            temp_file.write_bytes( best.getbuffer()[:best.tell()] )
+            os.replace( temp_file, file )
+            after = best.tell()
+
+        logger.info( "→ Optimized {}: {:,} → {:,} bytes ({})", file.name, before, after, cls._savings( before, after ) )
+
+        return before, after
+
+
+    @classmethod
+    def _to_palette( cls, image: Image.Image ) -> Image.Image | None:
+        """An exact palette version of an RGBA image, if it has no more than 256 distinct colors"""
+
+        rgba = np.asarray( image )
+        packed = np.ascontiguousarray( rgba ).view( np.uint32 ).reshape( -1 )
+        colors, inverse = np.unique( packed, return_inverse=True )
+
+        if len( colors ) > 256:
+            return None
+
+        colors = colors.view( np.uint8 ).reshape( -1, 4 )
+
+        palette_image = Image.fromarray( inverse.astype( np.uint8 ).reshape( rgba.shape[:2] ), mode='P' )
+        palette_image.putpalette( colors[:, :3].tobytes(), rawmode='RGB' )
+        palette_image.info['transparency'] = colors[:, 3].tobytes()
+
+        return palette_image
+
+
+    @classmethod
+    def _savings( cls, before: int, after: int ) -> str:
+        return f"-{( before - after ) / before:.1%}" if before else 'n/a'
@@ -0,0 +1,27 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from typing import NamedTuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    from awips.dataaccess import DataTime
+
+
+class RadarFrame( NamedTuple ):
+    """
+    One rendered frame, as yielded by `FrameGenerator.iter_frames()`.  Index
+    0 is the latest frame, as with the saved `frame_0.png`.  The image is
+    either encoded PNG bytes or an RGBA array, depending on the encoding asked
+    for.  An empty frame had no visible echoes, so only its label was drawn.
+    """
+
+    index: int
+    product: str
+    data_time: DataTime
+    time: int
+    label: str
+    metadata: dict
+    image: bytes | np.ndarray | None = None
+    empty: bool = False
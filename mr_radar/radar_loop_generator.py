@@ -2,22 +2,36 @@
 
 from __future__ import annotations
 
+import os
+import shutil
 import warnings
 import re
+from io import BytesIO
 from pathlib import Path
+from typing import TYPE_CHECKING
 
 from loguru import logger
-from awips.dataaccess import DataAccessLayer
-from matplotlib import pyplot
-import cartopy.crs as ccrs
-import shapely.geometry as sgeo
 
 from .rlg_defaults import RLGDefaults
 from .rlg_cache import RLGCache
 from .cache_keys import RadarCacheKeys
-from .bounding_box_calculator import BoundingBoxCalculator
 from .rlg_exception import *
 
+# matplotlib, cartopy, shapely, numpy and python-awips each take a noticeable
+# time to import, and cheap commands (--help, dump-vars, bad arguments) never
+# need them, so they are imported where they're used instead
+if TYPE_CHECKING:
+    import numpy as np
+    import cartopy.crs as ccrs
+    import shapely.geometry as sgeo
+    from matplotlib.axes import Axes
+    from matplotlib.figure import Figure
+    from .png_optimizer import PNGOptimizer
+    from .run_config import RunConfig
+    from .metadata_cache import MetadataCache
+    from awips.dataaccess import IDataRequest
+    from dynamicserialize.dstypes.com.raytheon.uf.common.time import DataTime
+
 # suppress a few warnings that come from plotting
 warnings.filterwarnings( 'ignore', category=RuntimeWarning )
 warnings.filterwarnings( 'ignore', category=UserWarning )
@@ -26,16 +40,30 @@ warnings.filterwarnings( 'ignore', category=UserWarning )
 EDEX_HOST = 'edex-cloud.unidata.ucar.edu'
 
 
-class RadarLoopGenerator:
+def data_access_layer():
+    """Imports python-awips on first use and points it at our EDEX server"""
 
-    def __init__( self, site_id: str, radius: int=None, output_path: str=None, image_dir: str=None, **kwargs ) -> None:
+    from awips.dataaccess import DataAccessLayer
 
+    if DataAccessLayer.THRIFT_HOST != EDEX_HOST:
         DataAccessLayer.changeEDEXHost( EDEX_HOST )
 
+    return DataAccessLayer
+
+
+class RadarLoopGenerator:
+
+    def __init__( self, site_id: str, radius: int=None, output_path: str=None, image_dir: str=None,
+                  compression: int=None, png_strategy: str=None, optimize: bool=None, **kwargs ) -> None:
+
         self._site_id     = None
         self._output_path = None
         self._axes        = None
         self._figure      = None
+        self._optimizer   = None
+        self._config      = None
+        self._config_generation = None
+        self._in_memory   = False
 
         self.cache = RLGCache()
 
@@ -47,8 +75,11 @@ class RadarLoopGenerator:
         # of the other setters are used since those depend on .load()
         self.cache.load( self.json_path )
 
-        self.radius      = radius
-        self.image_path  = image_dir
+        self.radius       = radius
+        self.image_path   = image_dir
+        self.compression  = compression
+        self.png_strategy = png_strategy
+        self.optimize     = optimize
 
 
     @property
@@ -60,11 +91,14 @@ class RadarLoopGenerator:
     def site_id( self, site_id: str ) -> None:
         self._validate_site_id( site_id )
         self._site_id = site_id.upper()
+        self._config = None
         logger.info( "→ Site ID is '{}'", self.site_id )
 
 
     @property
     def radius( self ) -> int:
+        if self.config:
+            return self.config.radius
         return self.cache.get( RadarCacheKeys.RADIUS, RLGDefaults.radius )
 
 
@@ -86,6 +120,8 @@ class RadarLoopGenerator:
 
     @property
     def site_coords( self ) -> ( float, float ):
+        if self.config:
+            return self.config.site_coords
         return self.cache.get( RadarCacheKeys.SITE_COORDS )
 
 
@@ -97,6 +133,8 @@ class RadarLoopGenerator:
 
     @property
     def image_bbox( self ) -> [ float, float, float, float ]:
+        if self.config:
+            return self.config.image_bbox
         return self.cache.get( RadarCacheKeys.BBOX )
 
 
@@ -107,8 +145,16 @@ class RadarLoopGenerator:
 
     @property
     def image_envelope( self ) -> sgeo.Polygon | None:
+        if self.config:
+            return self.config.image_envelope
+
         envelope = self.cache.get( RadarCacheKeys.ENVELOPE )
-        return sgeo.shape( envelope ) if envelope else None
+
+        if not envelope:
+            return None
+
+        import shapely.geometry as sgeo
+        return sgeo.shape( envelope )
 
 
     @image_envelope.setter
@@ -116,8 +162,23 @@ class RadarLoopGenerator:
         self.cache.set( RadarCacheKeys.ENVELOPE, envelope )
 
 
+    @property
+    def pixels_per_degree( self ) -> float:
+        """
+        Output pixels per degree of longitude/latitude across the image
+        bounds, erring on the high side so nothing is reduced below the
+        image's real resolution
+        """
+
+        west, south, east, north = self.image_bbox
+        width, height = self.axes.bbox.width, self.axes.bbox.height
+
+        return max( width / ( east - west ), height / ( north - south ) )
+
+
     @property
     def crs( self ) -> ccrs.Projection:
+        import cartopy.crs as ccrs
         return ccrs.PlateCarree()
 
 
@@ -146,17 +207,41 @@ class RadarLoopGenerator:
 
         self._validate_file_path( path )
         self._output_path = str( path )
+        self._config = None
+
+
+    @property
+    def output_name( self ) -> str:
+        """Names the JSON cache file and the default image directory"""
+        return self.site_id.lower()
 
 
     @property
     def json_path( self ) -> str:
-        json_path = Path( self.output_path, self.site_id.lower() ).with_suffix( '.json' )
+        json_path = Path( self.output_path, self.output_name ).with_suffix( '.json' )
         return str( json_path )
 
 
+    @property
+    def shared_path( self ) -> str:
+        """Artifacts that are identical for every site, such as the legend, live here under the output root"""
+        if self.config:
+            return self.config.shared_path
+        return str( Path( self.output_path, RLGDefaults.shared_dir ) )
+
+
+    @property
+    def _cache_path( self ) -> str | None:
+        """Where lookups are kept between runs, or None while only rendering in memory, which writes nothing"""
+        return None if self._in_memory else self.shared_path
+
+
     @property
     def image_path( self ) -> str:
-        image_dir = self.cache.get( RadarCacheKeys.IMAGE_PATH, self.site_id.lower() )
+        if self.config:
+            return self.config.image_path
+
+        image_dir = self.cache.get( RadarCacheKeys.IMAGE_PATH, self.output_name )
         image_path =  Path( image_dir )
         if not image_path.is_absolute():
             image_path = Path( self.output_path, image_path )
@@ -175,12 +260,87 @@ class RadarLoopGenerator:
 
     @property
     def image_file_path_name( self ) -> str:
-        image_file_path = Path( self.image_path, self.file_name or '' )
-        return str( image_file_path )
+        from .run_config import file_path
+        return file_path( self.image_path, self.file_name or '' )
+
+
+    @property
+    def compression( self ) -> int:
+        if self.config:
+            return self.config.compression
+        return self.cache.get( RadarCacheKeys.COMPRESSION, RLGDefaults.compression )
+
+
+    @compression.setter
+    def compression( self, level: int ) -> None:
+
+        if level is None:
+            return
+
+        self._validate_compression( level )
+        self.cache.set( RadarCacheKeys.COMPRESSION, level )
 
 
     @property
-    def axes( self ) -> pyplot.Axes:
+    def png_strategy( self ) -> str:
+        if self.config:
+            return self.config.png_strategy
+        return self.cache.get( RadarCacheKeys.PNG_STRATEGY, RLGDefaults.png_strategy )
+
+
+    @png_strategy.setter
+    def png_strategy( self, strategy: str ) -> None:
+
+        if strategy is None:
+            return
+
+        self._validate_png_strategy( strategy )
+        self.cache.set( RadarCacheKeys.PNG_STRATEGY, strategy )
+
+
+    @property
+    def optimize( self ) -> bool:
+        if self.config:
+            return self.config.optimize
+        return self.cache.get( RadarCacheKeys.OPTIMIZE, RLGDefaults.optimize )
+
+
+    @optimize.setter
+    def optimize( self, optimize: bool ) -> None:
+
+        if optimize is None:
+            return
+
+        self.cache.set( RadarCacheKeys.OPTIMIZE, bool( optimize ) )
+
+
+    @property
+    def png_options( self ) -> dict:
+        if self.config:
+            # A copy, since whatever it's handed to is free to add to it
+            return dict( self.config.png_options )
+
+        from .png_optimizer import png_options
+        return png_options( self.compression, self.png_strategy )
+
+
+    @property
+    def optimizer( self ) -> PNGOptimizer:
+        if not self._optimizer:
+            from .png_optimizer import PNGOptimizer
+            self._optimizer = PNGOptimizer()
+        return self._optimizer
+
+
+    @property
+    def metadata( self ) -> MetadataCache:
+        """EDEX's answers about what data there is, shared by every generator using the same output root"""
+        from .metadata_cache import metadata_cache
+        return metadata_cache( self._cache_path, tuple( RLGDefaults.metadata_ttl.items() ) )
+
+
+    @property
+    def axes( self ) -> Axes:
         return self._axes
 
 
@@ -190,7 +350,7 @@ class RadarLoopGenerator:
 
 
     @property
-    def figure( self ) -> pyplot.Figure:
+    def figure( self ) -> Figure:
         return self._figure
 
 
@@ -212,7 +372,10 @@ class RadarLoopGenerator:
             "\tEnvelope:    {image_envelope}\n"
             "\tOutput Root: {output_path}   \n"
             "\tJSON Path:   {json_path}     \n"
-            "\tImage Path:  {image_path}/   \n",
+            "\tImage Path:  {image_path}/   \n"
+            "\tCompression: {compression}   \n"
+            "\tStrategy:    {png_strategy}  \n"
+            "\tOptimize:    {optimize}      \n",
 
             site_id        = self.site_id,
             site_coords    = self.site_coords,
@@ -221,14 +384,16 @@ class RadarLoopGenerator:
             image_envelope = self.image_envelope,
             output_path    = self.output_path,
             json_path      = self.json_path,
-            image_path     = self.image_path
+            image_path     = self.image_path,
+            compression    = self.compression,
+            png_strategy   = self.png_strategy,
+            optimize       = self.optimize
         )
 
 
     def generate( self ) -> None:
 
-        self._check_site_coords()
-        self._check_image_bounds()
+        self._start_run()
 
         path = Path( self.output_path )
         path.mkdir( parents=True, exist_ok=True )
@@ -236,23 +401,155 @@ class RadarLoopGenerator:
         self.cache.dump()
 
 
+    def _start_run( self ) -> None:
+        """Resolves the site and its bounds, then freezes the run's settings, without writing anything"""
+
+        self._check_site_coords()
+        self._check_image_bounds()
+
+        self._config = self._make_config()
+        self._config_generation = self.cache.generation
+
+
+    @property
+    def config( self ) -> RunConfig | None:
+        """
+        The settings frozen at the start of generate(), which the properties
+        read from instead of the cache while it's current.  None before then,
+        or once any setting has changed since.
+        """
+
+        if self._config and self._config_generation != self.cache.generation:
+            self._config = None
+
+        return self._config
+
+
+    def _make_config( self ) -> RunConfig:
+        from .run_config import RunConfig
+        return RunConfig( **self._config_settings() )
+
+
+    def _config_settings( self ) -> dict:
+        from types import MappingProxyType
+
+        # Read before any of it is frozen, so straight from the cache
+        self._config = None
+
+        return dict(
+            site_id        = self.site_id,
+            site_coords    = tuple( self.site_coords ) if self.site_coords else None,
+            radius         = self.radius,
+            image_bbox     = tuple( self.image_bbox ) if self.image_bbox else None,
+            image_envelope = self.image_envelope,
+            output_path    = self.output_path,
+            shared_path    = self.shared_path,
+            image_path     = self.image_path,
+            compression    = self.compression,
+            png_strategy   = self.png_strategy,
+            optimize       = self.optimize,
+            png_options    = MappingProxyType( self.png_options )
+        )
+
+
     def save_image( self, **kwargs ) -> None:
         path = Path( self.image_path )
         path.mkdir( parents=True, exist_ok=True )
 
         figure = kwargs.pop( 'figure' ) if 'figure' in kwargs else self.figure
         file_path_name = kwargs.pop( 'file' ) if 'file' in kwargs else self.image_file_path_name
-        figure.savefig( file_path_name, bbox_inches='tight', pad_inches=0, **kwargs )
+        kwargs.setdefault( 'bbox_inches', 'tight' )
+        figure.savefig( file_path_name, pad_inches=0, pil_kwargs=self.png_options, **kwargs )
+
+        self._optimize_later( file_path_name )
+
+
+    def encode_image( self, **kwargs ) -> bytes:
+        """The PNG bytes save_image() would write, without touching the filesystem"""
+
+        figure = kwargs.pop( 'figure' ) if 'figure' in kwargs else self.figure
+
+        buffer = BytesIO()
+        figure.savefig( buffer, format='png', bbox_inches='tight', pad_inches=0, pil_kwargs=self.png_options, **kwargs )
+
+        return buffer.getvalue()
+
+
+    def render_image( self, **kwargs ) -> np.ndarray:
+        """Renders the figure the same way save_image() would, but returns the RGBA pixels instead of writing a file"""
+
+        import numpy as np
+        from PIL import Image
+
+        figure = kwargs.pop( 'figure' ) if 'figure' in kwargs else self.figure
+
+        # The intermediate PNG is never stored, so don't spend time compressing it
+        buffer = BytesIO()
+        figure.savefig( buffer, format='png', bbox_inches='tight', pad_inches=0, pil_kwargs=dict( compress_level=0 ), **kwargs )
+        buffer.seek( 0 )
+
+        with Image.open( buffer ) as image:
+            return np.asarray( image.convert( 'RGBA' ) )
 
 
     def make_figure( self ) -> None:
 
-        self.figure, self.axes = pyplot.subplots( figsize=( 16, 16 ), subplot_kw=dict( projection=self.crs ) )
+        self.figure, self.axes = self.new_figure( ( 16, 16 ), projection=self.crs )
 
         # Don't draw borders
         for spine in self.axes.spines:
             self.axes.spines[spine].set_visible( False )
 
+        # The map and every frame are laid over each other, so none can be left to autoscaling
+        if self.image_bbox:
+            west, south, east, north = self.image_bbox
+            self.axes.set_extent( [ west, east, south, north ], crs=self.crs )
+
+
+    def close_figure( self ) -> None:
+        """Drops our references so the figure can be freed; there's no pyplot state holding on to it"""
+        self.figure = None
+        self.axes = None
+
+
+    @classmethod
+    def link_shared_file( cls, source: str | Path, destination: str | Path ) -> bool:
+        """Hard-links (or copies, where linking isn't possible) a shared file into place, returning whether it changed"""
+
+        source = Path( source )
+        destination = Path( destination )
+
+        if destination.is_file():
+            if destination.samefile( source ) or destination.read_bytes() == source.read_bytes():
+                return False
+            destination.unlink()
+
+        destination.parent.mkdir( parents=True, exist_ok=True )
+
+        try:
+            os.link( source, destination )
+        except OSError:
+            shutil.copyfile( source, destination )
+
+        return True
+
+
+    @classmethod
+    def new_figure( cls, figsize: ( float, float ), **kwargs ) -> ( Figure, Axes ):
+        """
+        Creates a figure drawn by an explicit Agg canvas instead of pyplot, so
+        nothing is registered with pyplot's global figure manager, no GUI
+        backend is selected, and figures can be rendered from other threads
+        """
+
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        figure = Figure( figsize=figsize )
+        FigureCanvasAgg( figure )
+
+        return figure, figure.add_subplot( **kwargs )
+
 
     @classmethod
     def _validate_site_id( cls, site_id: str ) -> None:
@@ -269,6 +566,19 @@ class RadarLoopGenerator:
             raise RLGValueError( 'The radius must be an integer between 1 and 500 miles' )
 
 
+    @classmethod
+    def _validate_compression( cls, level: int ) -> None:
+        if not isinstance( level, int ) or level < 0 or level > 9:
+            raise RLGValueError( 'The PNG compression level must be an integer between 0 and 9' )
+
+
+    @classmethod
+    def _validate_png_strategy( cls, strategy: str ) -> None:
+        from .png_optimizer import PNG_STRATEGIES
+        if strategy not in PNG_STRATEGIES:
+            raise RLGValueError( f"The PNG strategy must be one of: {', '.join( PNG_STRATEGIES )}" )
+
+
     @classmethod
     def _validate_file_path( cls, path: str | Path ) -> None:
 
@@ -284,7 +594,7 @@ class RadarLoopGenerator:
 
         file = Path( file_name )
         while file.suffix == '.png':
-            file = file.stem
+            file = Path( file.stem )
 
         if file.name:
             file = file.with_suffix( '.png' )
@@ -292,6 +602,21 @@ class RadarLoopGenerator:
         return file.name
 
 
+    def _optimize_later( self, file_path_name: str ) -> None:
+        if self.optimize:
+            self.optimizer.submit( file_path_name )
+
+
+    def _finish_optimizing( self ) -> None:
+
+        if not self._optimizer:
+            return
+
+        logger.info( 'Waiting for PNG optimization to finish...' )
+        self._optimizer.wait()
+        self._optimizer = None
+
+
     r'''
     ### This method is sooooooo slooooooow, and I'm not sure why ¯\_(ツ)_/¯
     @classmethod
@@ -301,6 +626,7 @@ class RadarLoopGenerator:
 
         logger.info( f"Checking to see if {site_id.upper()} is valid..." )
 
+        DataAccessLayer = data_access_layer()
         request = DataAccessLayer.newDataRequest( 'radar' )
         locations = DataAccessLayer.getAvailableLocationNames( request )
 
@@ -311,6 +637,41 @@ class RadarLoopGenerator:
     '''
 
 
+    def _available_levels( self, request: IDataRequest, key: [ str ] ) -> [ str ]:
+        """
+        The request's levels, from the metadata cache if they were looked up
+        recently enough.  They're names, such as '0.5TILT', which
+        setLevels() accepts as readily as Level objects.
+        """
+
+        return self.metadata.get(
+            'levels', key, lambda: data_access_layer().getAvailableLevels( request ),
+            encode=lambda levels: [ str( level ) for level in levels ]
+        )
+
+
+    def _available_times( self, request: IDataRequest, key: [ str ] ) -> [ DataTime ]:
+        """The request's scan times, from the metadata cache if they were looked up recently enough"""
+
+        from dynamicserialize.dstypes.com.raytheon.uf.common.time import DataTime
+
+        return self.metadata.get(
+            'times', key, lambda: data_access_layer().getAvailableTimes( request, True ),
+            encode=self._encode_times,
+            decode=lambda times: [ DataTime( time ) for time in times ]
+        )
+
+
+    def _remember_times( self, key: [ str ], times: [ DataTime ] ) -> None:
+        """Caches scan times that were learned some other way, so the next lookup needn't ask again"""
+        self.metadata.put( 'times', key, times, encode=self._encode_times )
+
+
+    @classmethod
+    def _encode_times( cls, times: [ DataTime ] ) -> [ str ]:
+        return [ str( time ) for time in times ]
+
+
     def _check_site_coords( self ) -> None:
 
         if self.site_coords:
@@ -318,6 +679,7 @@ class RadarLoopGenerator:
 
         logger.info( "Retrieving coordinates for {}...", self.site_id )
 
+        DataAccessLayer = data_access_layer()
         request = DataAccessLayer.newDataRequest( 'obs', parameters=[ 'longitude', 'latitude' ], locationNames=[ self.site_id ] )
         response = DataAccessLayer.getGeometryData( request, None )
 
@@ -341,6 +703,9 @@ class RadarLoopGenerator:
 
         logger.info( "Calculating image bounds for {}...", self.site_id )
 
+        import shapely.geometry as sgeo
+        from .bounding_box_calculator import BoundingBoxCalculator
+
         bbox_calc = BoundingBoxCalculator( self.site_coords, self.radius )
         self.image_bbox = bbox_calc.get_bbox()
         self.image_envelope = sgeo.mapping( bbox_calc.get_polygon() )
@@ -0,0 +1,77 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import re
+from typing import NamedTuple
+
+
+class ProductStyle( NamedTuple ):
+    """How a radar product is drawn: a metpy colortable split into bins of `step` starting at `start`"""
+
+    colormap: str
+    start: float
+    step: float
+    label: str
+
+    @property
+    def key( self ) -> str:
+        return f"{self.colormap}_{self.start}_{self.step}"
+
+
+REFLECTIVITY_STYLE = ProductStyle( 'NWSStormClearReflectivity', -20, 0.5, 'dBZ' )
+
+# Checked in order; the first pattern found in the product name wins, and
+# anything that doesn't match is drawn as reflectivity
+PRODUCT_STYLES = [
+    ( r'vel',      ProductStyle( 'NWS8bitVel', -100, 1.0, 'm/s' ) ),
+    ( r'spectrum', ProductStyle( 'NWSSpectrumWidth', 0, 5.0, 'm/s' ) ),
+    ( r'precip',   ProductStyle( 'precipitation', 0, 0.25, 'in' ) ),
+]
+
+
+def product_style( product: str ) -> ProductStyle:
+    for pattern, style in PRODUCT_STYLES:
+        if re.search( pattern, product, re.IGNORECASE ):
+            return style
+    return REFLECTIVITY_STYLE
+
+
+class RadarProduct:
+    """
+    One product rendered during a frames run, along with the base name its
+    frames, legend and manifest are saved under and the style it's drawn with
+    """
+
+    def __init__( self, product: str, name: str, style: ProductStyle=None ) -> None:
+        self.product = product
+        self.name = name
+        self.style = style or product_style( product )
+
+
+    def __repr__( self ) -> str:
+        return f"RadarProduct({self.product!r}, {self.name!r})"
+
+
+    @property
+    def file_name( self ) -> str:
+        return f"{self.name}_%d.png"
+
+
+    @classmethod
+    def parse( cls, spec: str, base_name: str, primary: bool ) -> RadarProduct:
+        """
+        Parses 'PRODUCT' or 'PRODUCT=NAME'.  Without a name, the primary
+        product uses the base name as-is, and every other product appends a
+        slug of its own name, e.g. 'frame_velocity'.
+        """
+
+        product, _, name = spec.partition( '=' )
+        product = product.strip()
+        name = name.strip()
+
+        if not name:
+            slug = re.sub( r'[^a-z0-9]+', '_', product.lower() ).strip( '_' )
+            name = base_name if primary else f"{base_name}_{slug}"
+
+        return cls( product, name )
@@ -18,6 +18,7 @@ class RLGCache:
         self._pickledb = None
         self._dirty = False
         self._json_file = None
+        self._generation = 0
 
 
     def __contains__( self, key: str ) -> bool:
@@ -29,6 +30,12 @@ class RLGCache:
         return self._dirty
 
 
+    @property
+    def generation( self ) -> int:
+        """Counts every change, so anything derived from the cache can tell when it's out of date"""
+        return self._generation
+
+
     @property
     def is_loaded( self ) -> bool:
         return self._json_file and self._pickledb
@@ -47,6 +54,7 @@ class RLGCache:
             name += '.json'
         self._json_file = name
         self._pickledb = pickledb.load( self._json_file, False )
+        self._generation += 1
         return self._json_file
 
 
@@ -69,6 +77,7 @@ class RLGCache:
 
         if not self._pickledb.exists( key ) or self._pickledb.get( key ) != value :
             self._dirty = True
+            self._generation += 1
             return self._pickledb.set( key, value )
 
         return False
@@ -81,6 +90,7 @@ class RLGCache:
             return False
 
         self._dirty = True
+        self._generation += 1
 
         return self._pickledb.rem( key )
 
@@ -14,6 +14,10 @@ class _RLGDefaults:
     def output_path( self ) -> str:
         return '/data' if self.dockerized else './out'
 
+    @property
+    def shared_dir( self ) -> str:
+        return 'shared'
+
     @property
     def map_file_name( self ) -> str:
         return 'map'
@@ -34,6 +38,98 @@ class _RLGDefaults:
     def frames( self ) -> int:
         return 12
 
+    @property
+    def compression( self ) -> int:
+        return 6
+
+    @property
+    def png_strategy( self ) -> str:
+        return 'default'
+
+    @property
+    def optimize( self ) -> bool:
+        return False
+
+    @property
+    def indexed( self ) -> bool:
+        return False
+
+    @property
+    def labels( self ) -> bool:
+        return True
+
+    @property
+    def memory_budget( self ) -> int | None:
+        return None
+
+    @property
+    def mosaic_resolution( self ) -> float:
+        return 0.02
+
+    @property
+    def mosaic_tolerance( self ) -> int:
+        return 300
+
+    @property
+    def topography( self ) -> str:
+        return 'contour'
+
+    @property
+    def topography_bbox( self ) -> [ float, float, float, float ]:
+        """The contiguous United States, which the shared topography raster covers"""
+        return [ -126.0, 23.0, -65.0, 51.0 ]
+
+    @property
+    def topography_resolution( self ) -> float:
+        return 0.01
+
+    @property
+    def topography_tile_size( self ) -> float:
+        return 5.0
+
+    @property
+    def layered( self ) -> bool:
+        return False
+
+    @property
+    def source_radius( self ) -> int | None:
+        return None
+
+    @property
+    def metadata_ttl( self ) -> { str: float }:
+        """
+        Seconds each kind of EDEX metadata is reused for.  Scan times go
+        stale within minutes, but a site's levels and products rarely change.
+        A group of sites' last availability answer is only compared with the
+        next, so it's kept as long as a poll might be skipped for.
+        """
+        return dict( levels=86400, times=60, products=86400, availability=86400 )
+
+    @property
+    def natural_earth_dir( self ) -> str | None:
+        """Where the Natural Earth layers were seeded ahead of time, if anywhere"""
+        return environ.get( 'RLG_NATURAL_EARTH_DIR' )
+
+    @property
+    def serve_host( self ) -> str:
+        return '0.0.0.0' if self.dockerized else '127.0.0.1'
+
+    @property
+    def serve_port( self ) -> int:
+        return 8080
+
+    @property
+    def serve_scan_interval( self ) -> float:
+        return 2.0
+
+    @property
+    def frame_delay( self ) -> int:
+        return 120
+
+    @property
+    def last_frame_delay( self ) -> int:
+        return 1000
+
     @property
     def dockerized( self ):
         return self._dockerized
@@ -0,0 +1,66 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Any
+
+from functools import lru_cache
+from pathlib import Path
+
+
+@lru_cache( maxsize=256 )
+def file_path( directory: str, name: str ) -> str:
+    """`name` within `directory`, as a string, worked out once per pair rather than once per frame"""
+    return str( Path( directory, name ) )
+
+
+class RunConfig:
+    """
+    The settings of one run, resolved once when it starts.  Each of the
+    generator's properties otherwise goes back to the JSON cache, and some
+    build new objects, every time they're read, which adds up when they're
+    read for every frame.  It can't be changed once made; a generator
+    whose settings change afterwards simply stops using it.
+    """
+
+    __slots__ = (
+        'site_id', 'site_coords', 'radius', 'image_bbox', 'image_envelope',
+        'output_path', 'shared_path', 'image_path', 'compression', 'png_strategy', 'optimize', 'png_options'
+    )
+
+    def __init__( self, **settings ) -> None:
+
+        for name in self.fields():
+            if name not in settings:
+                raise TypeError( f"{type( self ).__name__} is missing '{name}'" )
+            object.__setattr__( self, name, settings.pop( name ) )
+
+        if settings:
+            raise TypeError( f"{type( self ).__name__} has no {', '.join( repr( name ) for name in settings )}" )
+
+
+    def __setattr__( self, name: str, value: Any ) -> None:
+        raise AttributeError( f"{type( self ).__name__} can't be changed" )
+
+
+    def __delattr__( self, name: str ) -> None:
+        raise AttributeError( f"{type( self ).__name__} can't be changed" )
+
+
+    def __repr__( self ) -> str:
+        settings = ', '.join( f"{name}={getattr( self, name )!r}" for name in self.fields() )
+        return f"{type( self ).__name__}( {settings} )"
+
+
+    @classmethod
+    def fields( cls ) -> [ str ]:
+        return [ name for klass in reversed( cls.__mro__ ) for name in getattr( klass, '__slots__', () ) ]
+
+
+    def to_dict( self ) -> { str: Any }:
+        return { name: getattr( self, name ) for name in self.fields() }
+
+
+class FrameConfig( RunConfig ):
+    """The settings a run of NEXRAD frames reads for every frame, on top of those every run has"""
+
+    __slots__ = ( 'frames', 'indexed', 'labels', 'memory_budget' )
@@ -0,0 +1,82 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+from typing import Any, Callable
+
+from loguru import logger
+
+
+def fresh_sites( sites: [ str ], last_seen: { str: int | None }, query: Callable[ [ [ str ] ], [ Any ] ],
+                 time_of: Callable[ [ Any ], int ]=None, previous: dict=None ) -> ( { str: [ Any ] | None }, dict ):
+    """
+    The sites that have scanned since `last_seen`, in milliseconds, in the
+    order they were given, with the scan times of each, or None where they
+    weren't asked for.  A site never seen before counts as fresh if it has
+    any scans at all.  Also returns what the next check of the same sites
+    should be given as `previous`.
+
+    `query` answers with the scan times of a whole group of sites at once,
+    but not which site each came from.  Sites scan out of step with each
+    other, so that answer can't say which sites are fresh, but a scan none
+    of them had before shows up in it as a time it didn't hold last time.
+    So the whole group is asked about once, and when its answer is the same
+    as last time, that one query is all it costs, however many sites there
+    are.  Only when something has changed are the sites that could have
+    scanned since asked about one at a time, as they are the first time,
+    when there's nothing to compare with.
+    """
+
+    time_of = time_of or ( lambda time: time )
+    sites = list( sites )
+    queries = 0
+
+    def ask( group: [ str ] ) -> [ Any ]:
+        nonlocal queries
+        queries += 1
+        return query( group )
+
+    def is_new( site: str, times: { int } ) -> bool:
+        seen = last_seen.get( site )
+        return any( seen is None or time > seen for time in times )
+
+    fresh = {}
+    newest = {}
+
+    def check( site: str ) -> { int }:
+        times = ask( [ site ] )
+        values = { time_of( time ) for time in times }
+
+        if is_new( site, values ):
+            fresh[site] = times
+            newest[site] = max( values )
+
+        return values
+
+    if not sites:
+        merged = set()
+
+    elif previous is None:
+        merged = set()
+        for site in sites:
+            merged |= check( site )
+
+    else:
+        merged = { time_of( time ) for time in ask( sites ) }
+        changed = merged - set( previous['times'] )
+
+        # Sites found fresh last time that haven't generated since are still fresh, though nothing has changed
+        for site, time in previous['pending'].items():
+            seen = last_seen.get( site )
+            if site in sites and ( seen is None or seen < time ):
+                fresh[site] = None
+                newest[site] = time
+
+        for site in sites:
+            if site not in fresh and is_new( site, changed ):
+                check( site )
+
+    logger.debug( "Checked {} sites for new scans in {} queries", len( sites ), queries )
+
+    state = dict( times=sorted( merged ), pending=newest )
+
+    return { site: fresh[site] for site in sites if site in fresh }, state
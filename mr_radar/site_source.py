@@ -0,0 +1,65 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import numpy as np
+import shapely
+from pathlib import Path
+from shapely.geometry.base import BaseGeometry
+
+
+# Bounds are compared with this much slack, in degrees, as they pass through rounding on the way to disk and back
+BOUNDS_TOLERANCE = 1e-6
+
+
+def load_source( file: str | Path, envelope: BaseGeometry ) -> { str: np.ndarray } | None:
+    """
+    The arrays saved by save_source(), if they were fetched for an
+    envelope that covers `envelope`, or None if they need fetching again
+    """
+
+    with np.load( file ) as data:
+        bounds = shapely.box( *data['bounds'] ).buffer( BOUNDS_TOLERANCE, join_style='mitre' )
+
+        if not bounds.covers( envelope ):
+            return None
+
+        return { name: data[name] for name in data.files if name != 'bounds' }
+
+
+def save_source( file: str | Path, envelope: BaseGeometry, arrays: { str: np.ndarray } ) -> None:
+    """
+    Saves the source data of a map layer fetched for `envelope`, so that
+    maps of any smaller area around the same site can be built from it
+    """
+
+    file = Path( file )
+    file.parent.mkdir( parents=True, exist_ok=True )
+
+    # np.savez() adds '.npz' to names that don't already end with it
+    temp_file = file.with_name( f".{file.stem}.tmp.npz" )
+    np.savez( temp_file, bounds=np.asarray( envelope.bounds ), **arrays )
+    os.replace( temp_file, file )
+
+
+def window( lons: np.ndarray, lats: np.ndarray, bbox: [ float, float, float, float ], margin: int=1 ) -> ( slice, slice ):
+    """
+    The rows and columns of a lat/lon grid, rectilinear or not, that hold
+    every point within `bbox`, plus `margin` cells around them so that
+    anything drawn from them still reaches its edges
+    """
+
+    west, south, east, north = bbox
+    inside = ( lons >= west ) & ( lons <= east ) & ( lats >= south ) & ( lats <= north )
+
+    rows = np.flatnonzero( inside.any( axis=1 ) )
+    cols = np.flatnonzero( inside.any( axis=0 ) )
+
+    if not len( rows ) or not len( cols ):
+        return slice( 0, 0 ), slice( 0, 0 )
+
+    return (
+        slice( max( 0, rows[0] - margin ), rows[-1] + 1 + margin ),
+        slice( max( 0, cols[0] - margin ), cols[-1] + 1 + margin )
+    )
@@ -0,0 +1,227 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import numpy as np
+from pathlib import Path
+from typing import Callable
+
+from loguru import logger
+
+
+# Elevations are stored as whole metres, which is plenty for a faint background shading
+NODATA = -32768
+
+# The light for hillshading comes from the north-west, as on most printed maps
+LIGHT_AZIMUTH  = 315
+LIGHT_ALTITUDE = 45
+
+METRES_PER_DEGREE = 111320.0
+
+
+def grid_axes( lons: np.ndarray, lats: np.ndarray ) -> ( np.ndarray, np.ndarray ) | None:
+    """The longitude of each column and latitude of each row, or None if the grid isn't rectilinear"""
+
+    lons = np.asarray( lons )
+    lats = np.asarray( lats )
+
+    if lons.ndim == 1 and lats.ndim == 1:
+        return lons, lats
+
+    x, y = lons[0, :], lats[:, 0]
+
+    if not ( np.allclose( lons, x[np.newaxis, :], equal_nan=True ) and np.allclose( lats, y[:, np.newaxis], equal_nan=True ) ):
+        return None
+
+    return x, y
+
+
+def pixel_centers( bbox: [ float, float, float, float ], shape: ( int, int ) ) -> ( np.ndarray, np.ndarray ):
+    """The longitude of each column and latitude of each row of a raster covering `bbox`, south to north"""
+
+    west, south, east, north = bbox
+    height, width = shape
+
+    return (
+        west + ( np.arange( width ) + 0.5 ) * ( east - west ) / width,
+        south + ( np.arange( height ) + 0.5 ) * ( north - south ) / height
+    )
+
+
+def resample( x: np.ndarray, y: np.ndarray, values: np.ndarray, bbox: [ float, float, float, float ], shape: ( int, int ) ) -> np.ndarray:
+    """
+    Bilinearly resamples a rectilinear grid, whose columns lie at longitudes
+    `x` and rows at latitudes `y`, onto a raster of `shape` covering `bbox`
+    with its first row at the south.  Pixels outside the grid are NaN.
+    """
+
+    values = np.ma.filled( np.ma.masked_invalid( values ).astype( np.float32 ), np.nan )
+
+    # Interpolation needs both axes ascending
+    if x[0] > x[-1]:
+        x, values = x[::-1], values[:, ::-1]
+    if y[0] > y[-1]:
+        y, values = y[::-1], values[::-1, :]
+
+    target_x, target_y = pixel_centers( bbox, shape )
+
+    def weights( axis: np.ndarray, target: np.ndarray ) -> ( np.ndarray, np.ndarray, np.ndarray, np.ndarray ):
+        # Each edge cell reaches half a cell beyond its center
+        half = ( axis[-1] - axis[0] ) / max( 1, len( axis ) - 1 ) / 2
+        edges = np.concatenate( [ [ axis[0] - half ], axis, [ axis[-1] + half ] ] )
+        indices = np.concatenate( [ [ 0 ], np.arange( len( axis ) ), [ len( axis ) - 1 ] ] )
+
+        position = np.interp( target, edges, indices, left=np.nan, right=np.nan )
+        outside = np.isnan( position )
+        position = np.where( outside, 0, position )
+
+        lower = np.clip( np.floor( position ).astype( np.intp ), 0, max( 0, len( axis ) - 2 ) )
+        upper = np.minimum( lower + 1, len( axis ) - 1 )
+
+        return lower, upper, ( position - lower ).astype( np.float32 ), outside
+
+    left, right, wx, outside_x = weights( x, target_x )
+    bottom, top, wy, outside_y = weights( y, target_y )
+
+    wx = wx[np.newaxis, :]
+    wy = wy[:, np.newaxis]
+
+    result = (
+        ( 1 - wy ) * ( ( 1 - wx ) * values[ np.ix_( bottom, left ) ] + wx * values[ np.ix_( bottom, right ) ] ) +
+        wy * ( ( 1 - wx ) * values[ np.ix_( top, left ) ] + wx * values[ np.ix_( top, right ) ] )
+    )
+
+    result[ outside_y, : ] = np.nan
+    result[ :, outside_x ] = np.nan
+
+    return result
+
+
+def shade( elevation: np.ndarray, cmap, bbox: [ float, float, float, float ], hillshade: bool=False ) -> np.ndarray:
+    """Colors an elevation raster as RGBA, optionally lit as a relief, with missing cells left transparent"""
+
+    from matplotlib.colors import Normalize, LightSource
+
+    missing = np.isnan( elevation )
+
+    if missing.all():
+        return np.zeros( ( *elevation.shape, 4 ) )
+
+    norm = Normalize( np.nanmin( elevation ), np.nanmax( elevation ) )
+    elevation = np.where( missing, norm.vmin, elevation )
+
+    if hillshade:
+        west, south, east, north = bbox
+        height, width = elevation.shape
+
+        # Slopes need the pixel size in the same units as the elevation
+        dx = ( east - west ) / width * METRES_PER_DEGREE * np.cos( np.radians( ( south + north ) / 2 ) )
+        dy = ( north - south ) / height * METRES_PER_DEGREE
+
+        light = LightSource( azdeg=LIGHT_AZIMUTH, altdeg=LIGHT_ALTITUDE )
+
+        # The raster's first row is the south, but LightSource expects the first row to be the north
+        rgba = light.shade( elevation[::-1], cmap=cmap, norm=norm, blend_mode='soft', dx=dx, dy=dy )[::-1]
+    else:
+        rgba = cmap( norm( elevation ) )
+
+    rgba[ missing ] = 0
+
+    return rgba
+
+
+class TopographyRaster:
+    """
+    Elevations on a regular lat/lon raster, so that one copy covering the
+    whole country can be built once, saved, and cropped and resampled for
+    every site's map rather than fetched and contoured each time
+    """
+
+    def __init__( self, bbox: [ float, float, float, float ], resolution: float, elevation: np.ndarray ) -> None:
+        self.bbox = [ float( bound ) for bound in bbox ]
+        self.resolution = float( resolution )
+        self.elevation = elevation
+
+
+    @property
+    def shape( self ) -> ( int, int ):
+        west, south, east, north = self.bbox
+        return int( round( ( north - south ) / self.resolution ) ), int( round( ( east - west ) / self.resolution ) )
+
+
+    def covers( self, bbox: [ float, float, float, float ] ) -> bool:
+        west, south, east, north = bbox
+        return self.bbox[0] <= west and self.bbox[1] <= south and east <= self.bbox[2] and north <= self.bbox[3]
+
+
+    def crop( self, bbox: [ float, float, float, float ], shape: ( int, int ) ) -> np.ndarray:
+        """The elevations within `bbox`, resampled to `shape`"""
+
+        x, y = pixel_centers( self.bbox, self.shape )
+
+        # Only the part of the raster around `bbox` is needed
+        west, south, east, north = bbox
+        cols = slice( max( 0, np.searchsorted( x, west ) - 2 ), np.searchsorted( x, east ) + 2 )
+        rows = slice( max( 0, np.searchsorted( y, south ) - 2 ), np.searchsorted( y, north ) + 2 )
+
+        elevation = np.ma.masked_equal( self.elevation[rows, cols], NODATA )
+
+        return resample( x[cols], y[rows], elevation, bbox, shape )
+
+
+    @classmethod
+    def build( cls, bbox: [ float, float, float, float ], resolution: float, tile_size: float,
+               fetch: Callable[ [ [ float, float, float, float ] ], ( np.ndarray, np.ndarray, np.ndarray ) ] ) -> TopographyRaster:
+        """
+        Fetches the elevations covering `bbox` one tile at a time, so the
+        source grids never all have to be held at once
+        """
+
+        raster = cls( bbox, resolution, None )
+        height, width = raster.shape
+        raster.elevation = np.full( raster.shape, NODATA, dtype=np.int16 )
+
+        tile_pixels = max( 1, int( round( tile_size / resolution ) ) )
+        tiles = [ ( row, col ) for row in range( 0, height, tile_pixels ) for col in range( 0, width, tile_pixels ) ]
+
+        west, south = raster.bbox[0], raster.bbox[1]
+
+        for i, ( row, col ) in enumerate( tiles ):
+            rows = slice( row, min( row + tile_pixels, height ) )
+            cols = slice( col, min( col + tile_pixels, width ) )
+
+            tile_bbox = [
+                west + cols.start * resolution, south + rows.start * resolution,
+                west + cols.stop * resolution, south + rows.stop * resolution
+            ]
+
+            logger.debug( "→ Fetching topography tile {} of {}", i + 1, len( tiles ) )
+
+            lons, lats, values = fetch( tile_bbox )
+            axes = grid_axes( lons, lats )
+
+            if axes is None:
+                raise ValueError( 'The topography grid is not rectilinear' )
+
+            tile = resample( *axes, values, tile_bbox, ( rows.stop - rows.start, cols.stop - cols.start ) )
+            raster.elevation[rows, cols] = np.where( np.isnan( tile ), NODATA, np.round( tile ) ).astype( np.int16 )
+
+        return raster
+
+
+    @classmethod
+    def load( cls, file: str | Path ) -> TopographyRaster:
+        with np.load( file ) as data:
+            return cls( data['bbox'], float( data['resolution'] ), data['elevation'] )
+
+
+    def save( self, file: str | Path ) -> None:
+
+        file = Path( file )
+        file.parent.mkdir( parents=True, exist_ok=True )
+
+        # np.savez_compressed() adds '.npz' to names that don't already end with it
+        temp_file = file.with_name( f".{file.stem}.tmp.npz" )
+        np.savez_compressed( temp_file, bbox=self.bbox, resolution=self.resolution, elevation=self.elevation )
+        os.replace( temp_file, file )
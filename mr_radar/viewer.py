@@ -0,0 +1,34 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import shutil
+from string import Template
+from pathlib import Path
+
+
+VIEWER_PATH  = Path( __file__ ).with_name( 'viewer' )
+PAGE_FILE    = 'loop.html'
+STATIC_FILES = [ 'script.js', 'style.css' ]
+
+
+def write_viewer( image_path: str | Path, page_name: str, manifest_name: str, title: str ) -> str:
+    """Writes the HTML loop page and its static assets next to the images described by the manifest"""
+
+    image_path = Path( image_path )
+    image_path.mkdir( parents=True, exist_ok=True )
+
+    template = Template( Path( VIEWER_PATH, PAGE_FILE ).read_text() )
+    page = template.safe_substitute( title=title, manifest=manifest_name )
+
+    page_file = Path( image_path, page_name ).with_suffix( '.html' )
+    if not page_file.is_file() or page_file.read_text() != page:
+        page_file.write_text( page )
+
+    for name in STATIC_FILES:
+        source = Path( VIEWER_PATH, name )
+        destination = Path( image_path, name )
+        if not destination.is_file() or destination.read_bytes() != source.read_bytes():
+            shutil.copyfile( source, destination )
+
+    return page_file.name
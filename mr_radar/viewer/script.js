@@ -0,0 +1,215 @@
+
+// How often to check the manifest for new frames
+const refreshInterval = 60000;
+
+// Used until the manifest tells us otherwise
+let delayNextFrame =  120;
+let delayLastFrame = 1000;
+
+// Get the element which will contain the frame images
+const framesContainer = document.querySelector('.radar-container .frames-container');
+
+// Get the legend image element
+const legendImage = document.querySelector('.radar-container .legend-container img');
+
+// Frames saved without a label get theirs from the manifest, shown in this element
+const frameLabel = document.querySelector('.radar-container .frame-label');
+
+// The manifest URL comes from the preload tag, which lets the browser start fetching it before this script runs
+const manifestUrl = document.querySelector('head link[rel="preload"].manifest').href;
+
+// Images we've already downloaded, keyed by content hash, so a refresh only fetches frames that changed
+let imageCache = new Map();
+
+// The frames currently in the loop, from oldest to newest; identical frames share one image
+let loopFrames = [];
+
+// Where the loop is in `loopFrames`
+let loopPosition = -1;
+
+// Whether the frames have their labels drawn in, or we need to show them
+let overlayLabels = false;
+
+let loopStarted = false;
+
+function versionedUrl( image )
+{
+    // The hash changes whenever the content does, so browsers can't show a stale image under the same name
+    return image.file + '?v=' + image.hash;
+}
+
+function fetchManifest()
+{
+    return fetch( manifestUrl, { cache: 'no-cache' } ).then( response => {
+        if( !response.ok )
+            throw new Error( 'Manifest request failed: ' + response.status );
+        return response.json();
+    });
+}
+
+function getImage( frame )
+{
+    // Re-use an image we already have, even if it's now at a different position in the loop
+    if( imageCache.has( frame.hash ) )
+        return imageCache.get( frame.hash );
+
+    // Pull a new image object out of thin air
+    let image = new Image();
+    image.alt = frame.label || '';
+
+    // Start the animation as soon as the first frame is available, rather than waiting for all of them
+    image.addEventListener( 'load', () => {
+        image.dataset.loaded = 'true';
+        if( !loopStarted )
+            startLoop();
+    });
+
+    image.src = versionedUrl( frame );
+    imageCache.set( frame.hash, image );
+
+    return image;
+}
+
+function applyManifest( manifest )
+{
+    if( manifest.delay )
+    {
+        delayNextFrame = manifest.delay.frame;
+        delayLastFrame = manifest.delay.last;
+    }
+
+    // Map is the background image visible through the transparency of NEXRAD frames
+    if( manifest.map )
+        framesContainer.style.backgroundImage = 'url(' + versionedUrl( manifest.map ) + ')';
+
+    if( manifest.legend )
+        legendImage.src = versionedUrl( manifest.legend );
+
+    // The legend is in the product's units, which differ between products
+    if( manifest.units || manifest.product )
+        legendImage.alt = 'Legend: ' + ( manifest.units || manifest.product );
+
+    overlayLabels = ( manifest.labels === false );
+    frameLabel.hidden = !overlayLabels;
+
+    let activeImage = framesContainer.querySelector('img.visible');
+    let hashes = new Set( manifest.frames.map( frame => frame.hash ) );
+
+    loopFrames = manifest.frames.map( frame => ({ image: getImage( frame ), label: frame.label || '' }) );
+
+    // Inject frames in loop order; appending an image that's already in the container just moves it
+    loopFrames.forEach( frame => framesContainer.appendChild( frame.image ) );
+
+    // Forget about frames that have aged out of the loop
+    for( let [ hash, image ] of imageCache )
+    {
+        if( hashes.has( hash ) )
+            continue;
+
+        image.remove();
+        imageCache.delete( hash );
+    }
+
+    // If the visible frame was dropped, the loop will pick up from the first one
+    if( activeImage && !activeImage.isConnected )
+        activeImage.classList.remove('visible');
+}
+
+function nextPosition()
+{
+    // The next frame is the next loaded one, or wrap around to the first one if we're at the last one
+    for( let step = 1; step <= loopFrames.length; step++ )
+    {
+        let position = ( loopPosition + step ) % loopFrames.length;
+        if( loopFrames[ position ].image.dataset.loaded )
+            return position;
+    }
+
+    return -1;
+}
+
+function doLoop( time )
+{
+    setTimeout(() => {
+
+        // Get the element for the currently active NEXRAD frame...
+        let activeImage = framesContainer.querySelector('img.visible');
+        let position = nextPosition();
+
+        // ...then after a quick sanity check, activate the next image
+        if( position < 0 )
+        {
+            // If the sanity check failed, this is where you'd take some kind of recovery action, such as updating
+            // the UI to inform the user that the animation crashed.  For this example, we'll just barf a message to
+            // the console
+            console.error( 'No frames available.  Animation loop terminated.' );
+            loopStarted = false;
+            return;
+        }
+
+        loopPosition = position;
+        let image = loopFrames[ position ].image;
+
+        // Make the next image visible...
+        image.classList.add('visible');
+
+        // ...and hide the previously-visible image
+        if( activeImage && activeImage !== image )
+            activeImage.classList.remove('visible');
+
+        if( overlayLabels )
+            frameLabel.textContent = loopFrames[ position ].label;
+
+        // The magic sauce that causes a noticeable pause when displaying the last image in the loop
+        let delay = ( position === loopFrames.length - 1 ) ? delayLastFrame : delayNextFrame;
+
+        // Repeat!
+        doLoop( delay );
+
+    }, time );
+}
+
+function startLoop()
+{
+    console.info( 'Starting animation loop...' );
+    loopStarted = true;
+    doLoop( 0 );
+}
+
+function refresh()
+{
+    fetchManifest()
+        .then( applyManifest )
+        .catch( error => console.error( error ) )
+        .finally( () => setTimeout( refresh, refreshInterval ) );
+}
+
+function listen()
+{
+    // `mr_radar serve-http` announces each new manifest as it's published; other servers
+    // will answer with an error, which closes the stream and leaves us polling as usual
+    if( !window.EventSource )
+        return;
+
+    const manifestName = new URL( manifestUrl ).pathname.split('/').pop();
+    const events = new EventSource( new URL( 'events', manifestUrl ) );
+
+    events.addEventListener( 'manifest', event => {
+        if( JSON.parse( event.data ).file !== manifestName )
+            return;
+
+        fetchManifest()
+            .then( applyManifest )
+            .catch( error => console.error( error ) );
+    });
+}
+
+(function() {
+
+    // This stuff runs when the DOM is ready
+
+    console.info( 'Loading manifest...' );
+    refresh();
+    listen();
+
+}());
@@ -0,0 +1,83 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pathlib import Path
+
+from mr_radar.colormap_lut import ColormapLUT
+from mr_radar.frame_generator import colormap_lut
+from mr_radar.radar_products import REFLECTIVITY_STYLE
+from mr_radar.radar_loop_generator import RadarLoopGenerator
+
+
+@pytest.fixture( scope='class' )
+def lut() -> ColormapLUT:
+    return colormap_lut()
+
+
+@pytest.fixture( scope='class' )
+def data() -> np.ndarray:
+    data = np.ma.masked_invalid( np.linspace( -40, 100, 64 * 64 ).reshape( 64, 64 ) )
+    data[0, :8] = np.ma.masked
+    return data
+
+
+class TestColormapLUT:
+
+    def test_key( self, lut: ColormapLUT ) -> None:
+        assert lut.key == REFLECTIVITY_STYLE.key
+
+    def test_matches_matplotlib( self, lut: ColormapLUT, data: np.ndarray ) -> None:
+        norm, cmap = lut.to_colormap()
+        expected = cmap( norm( data ), bytes=True )
+        assert np.array_equal( lut.apply( data ), expected )
+
+    def test_alpha( self, lut: ColormapLUT, data: np.ndarray ) -> None:
+        rgba = lut.apply( data, alpha=0.75 )
+        assert set( np.unique( rgba[..., 3] ) ) <= { 0, 191 }
+
+    def test_visible( self, lut: ColormapLUT, data: np.ndarray ) -> None:
+        assert lut.visible( data )
+        assert lut.visible( np.ma.masked_less( data, 60 ) )
+
+    def test_not_visible( self, lut: ColormapLUT ) -> None:
+        assert not lut.visible( np.full( ( 8, 8 ), np.nan ) )
+        assert not lut.visible( np.ma.masked_all( ( 8, 8 ) ) )
+        assert not lut.visible( np.empty( ( 0, 0 ) ) )
+
+    def test_visible_with_transparent_bins( self, lut: ColormapLUT ) -> None:
+        colors = lut.colors.copy()
+        colors[:10, 3] = 0
+        clear = ColormapLUT( lut.key, lut.boundaries, colors )
+
+        assert not clear.visible( np.full( ( 8, 8 ), lut.boundaries[5] ) )
+        assert clear.visible( np.full( ( 8, 8 ), lut.boundaries[10] ) )
+
+    def test_save_load( self, lut: ColormapLUT, tmp_path: Path ) -> None:
+        file = Path( tmp_path, f"{REFLECTIVITY_STYLE.key}.npz" )
+        lut.save( file )
+
+        loaded = ColormapLUT.load( file )
+        assert loaded.key == lut.key
+        assert np.array_equal( loaded.boundaries, lut.boundaries )
+        assert np.array_equal( loaded.colors, lut.colors )
+
+    def test_shared_lut( self, tmp_path: Path ) -> None:
+        colormap_lut( REFLECTIVITY_STYLE, str( tmp_path ) )
+        assert Path( tmp_path, f"{REFLECTIVITY_STYLE.key}.npz" ).is_file()
+
+    def test_link_shared_file( self, tmp_path: Path ) -> None:
+        source = Path( tmp_path, 'shared.png' )
+        destination = Path( tmp_path, 'site', 'legend.png' )
+        source.write_bytes( b'legend' )
+
+        assert RadarLoopGenerator.link_shared_file( source, destination )
+        assert not RadarLoopGenerator.link_shared_file( source, destination )
+
+        source.unlink()
+        source.write_bytes( b'new legend' )
+
+        assert RadarLoopGenerator.link_shared_file( source, destination )
+        assert destination.read_bytes() == b'new legend'
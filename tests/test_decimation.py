@@ -0,0 +1,48 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mr_radar.decimation import decimation_factor, decimate
+
+
+@pytest.fixture( scope='class' )
+def grid() -> ( np.ndarray, np.ndarray, np.ma.MaskedArray ):
+    lons, lats = np.meshgrid( np.linspace( -101, -100, 101 ), np.linspace( 31, 32, 101 ) )
+    data = np.ma.masked_less( np.zeros( lons.shape ), 1 )
+    data[50, 50] = 60
+    data[10, 10] = 20
+    return lons, lats, data
+
+
+class TestDecimation:
+
+    def test_factor( self, grid: tuple ) -> None:
+        lons, lats, _ = grid
+        assert decimation_factor( lons, lats, 100 ) == ( 1, 1 )
+        assert decimation_factor( lons, lats, 25 ) == ( 4, 4 )
+
+    def test_unchanged( self, grid: tuple ) -> None:
+        lons, lats, data = grid
+        assert decimate( lons, lats, data, ( 1, 1 ) )[2].shape == data.shape
+
+    def test_shape( self, grid: tuple ) -> None:
+        lons, lats, data = decimate( *grid, ( 4, 3 ) )
+        assert data.shape == lons.shape == lats.shape == ( 26, 34 )
+
+    def test_max_preserved( self, grid: tuple ) -> None:
+        _, _, data = decimate( *grid, ( 4, 4 ) )
+        assert data.max() == 60
+        assert data.count() == 2
+
+    def test_positions( self, grid: tuple ) -> None:
+        lons, lats, _ = decimate( *grid, ( 4, 4 ) )
+        assert lons[0, 0] == pytest.approx( -100.985 )
+        assert lats[0, 0] == pytest.approx( 31.015 )
+
+    def test_nan_masked( self, grid: tuple ) -> None:
+        lons, lats, _ = grid
+        data = np.full( lons.shape, np.nan )
+        assert decimate( lons, lats, data, ( 2, 2 ) )[2].count() == 0
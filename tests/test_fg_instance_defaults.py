@@ -7,6 +7,7 @@ from pathlib import Path
 
 from mr_radar.rlg_defaults import RLGDefaults
 from mr_radar.frame_generator import FrameGenerator
+from mr_radar.radar_frame import RadarFrame
 
 SITE_ID = 'KSJT'
 
@@ -36,3 +37,23 @@ class TestFGInstanceDefaults:
 
     def test_default_frames( self, generator: FrameGenerator ) -> None:
         assert generator.frames == RLGDefaults.frames
+
+    def test_default_labels( self, generator: FrameGenerator ) -> None:
+        assert generator.labels == RLGDefaults.labels
+
+    def test_blank_frames_optimized( self, tmp_path: Path ) -> None:
+        generator = FrameGenerator( site_id=SITE_ID, output_path=str( tmp_path ), labels=False, optimize=True )
+
+        optimized = []
+        generator._optimize_later = optimized.append
+
+        # Empty unlabelled frames are copied from the one already encoded, rather than rendered
+        metadata = dict( Description='KSJT' )
+        generator._blank_frames[ tuple( metadata.items() ) ] = b'blank'
+
+        for index in range( 2 ):
+            frame = RadarFrame( index, generator.product, None, 0, '', metadata, empty=True )
+            generator.save_frame( frame )
+
+        assert optimized == [ generator.image_file_path_name % index for index in range( 2 ) ]
+        assert Path( optimized[0] ).read_bytes() == b'blank'
@@ -42,6 +42,11 @@ class TestFGInvalidInstance:
         with pytest.raises( RLGValueError ):
             FrameGenerator( site_id=VALID_SITE_ID, frames=-1 )
 
+    def test_invalid_frame_encoding( self ) -> None:
+        generator = FrameGenerator( site_id=VALID_SITE_ID, frames=1 )
+        with pytest.raises( RLGValueError ):
+            next( generator.iter_frames( 'jpeg' ) )
+
     def test_invalid_product( self ) -> None:
         generator = FrameGenerator( site_id=VALID_SITE_ID, frames=1, product='foobar')
         with pytest.raises( ThriftRequestException ):
@@ -41,6 +41,13 @@ class TestFGValidInstance:
     def test_file_name( self, generator: FrameGenerator ) -> None:
         assert generator.file_name != RLGDefaults.frame_file_name
 
+    def test_iter_frames( self, generator: FrameGenerator ) -> None:
+        frames = list( generator.iter_frames() )
+
+        assert len( frames ) == FRAMES
+        assert [ frame.index for frame in frames ] == list( range( FRAMES ) )
+        assert all( frame.image.startswith( b'\x89PNG' ) for frame in frames )
+
     ### TODO: expected_indexed_image_file() doesn't work yet
     # def test_generator( self, generator: FrameGenerator, expected_image_file: Path, expected_indexed_image_file: callable, check ) -> None:
     def test_generator( self, generator: FrameGenerator, expected_image_file: Path ) -> None:
@@ -0,0 +1,98 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+import pytest
+from pathlib import Path
+
+from mr_radar.frame_manifest import FrameManifest
+from mr_radar.viewer import write_viewer
+
+SITE_ID = 'KSJT'
+PRODUCT = 'Reflectivity'
+
+
+@pytest.fixture
+def manifest() -> FrameManifest:
+    return FrameManifest( SITE_ID, PRODUCT, 120, 1000 )
+
+
+@pytest.fixture
+def frame_files( tmp_path: Path ) -> [ Path ]:
+    files = []
+    for i in range( 3 ):
+        file = Path( tmp_path, f"frame_{i}.png" )
+        file.write_bytes( bytes( [ i ] ) * 16 )
+        files.append( file )
+    return files
+
+
+class TestFrameManifest:
+
+    def test_file_hash( self, frame_files: [ Path ] ) -> None:
+        hashes = { FrameManifest.file_hash( file ) for file in frame_files }
+        assert len( hashes ) == len( frame_files )
+
+    def test_frames_sorted_oldest_first( self, manifest: FrameManifest, frame_files: [ Path ] ) -> None:
+        # frame_0 is the newest
+        for i, file in enumerate( frame_files ):
+            manifest.add_frame( file, 1000 - i, f"label {i}" )
+
+        frames = manifest.to_dict()['frames']
+        assert [ frame['file'] for frame in frames ] == [ 'frame_2.png', 'frame_1.png', 'frame_0.png' ]
+
+    def test_empty_frames( self, manifest: FrameManifest, frame_files: [ Path ] ) -> None:
+        manifest.add_frame( frame_files[0], 1, 'label', empty=True )
+        manifest.add_frame( frame_files[1], 0, 'label' )
+
+        assert [ frame['empty'] for frame in manifest.to_dict()['frames'] ] == [ False, True ]
+
+    def test_labels( self, frame_files: [ Path ] ) -> None:
+        assert FrameManifest( SITE_ID, PRODUCT, 120, 1000 ).to_dict()['labels'] is True
+        assert FrameManifest( SITE_ID, PRODUCT, 120, 1000, labels=False ).to_dict()['labels'] is False
+
+    def test_page( self, frame_files: [ Path ] ) -> None:
+        manifest = FrameManifest( SITE_ID, PRODUCT, 120, 1000, primary=False )
+        manifest.set_page( 'radar_velocity.html' )
+
+        data = manifest.to_dict()
+        assert data['page'] == 'radar_velocity.html'
+        assert data['primary'] is False
+
+    def test_units( self, frame_files: [ Path ] ) -> None:
+        assert FrameManifest( SITE_ID, PRODUCT, 120, 1000 ).to_dict()['units'] is None
+        assert FrameManifest( SITE_ID, PRODUCT, 120, 1000, units='m/s' ).to_dict()['units'] == 'm/s'
+
+    def test_missing_files_skipped( self, manifest: FrameManifest, tmp_path: Path ) -> None:
+        manifest.set_map( Path( tmp_path, 'map.png' ) )
+        manifest.add_frame( Path( tmp_path, 'frame_0.png' ), 0, '' )
+
+        data = manifest.to_dict()
+        assert data['map'] is None
+        assert data['frames'] == []
+
+    def test_dump( self, manifest: FrameManifest, frame_files: [ Path ], tmp_path: Path ) -> None:
+        manifest.set_legend( frame_files[0] )
+        manifest.add_frame( frame_files[1], 1, 'label' )
+
+        manifest_file = Path( tmp_path, 'frame.json' )
+        assert manifest.dump( manifest_file ) == manifest_file.name
+
+        data = json.loads( manifest_file.read_text() )
+        assert data['site'] == SITE_ID
+        assert data['product'] == PRODUCT
+        assert data['delay'] == dict( frame=120, last=1000 )
+        assert data['legend']['hash'] == FrameManifest.file_hash( frame_files[0] )
+        assert data['frames'][0]['hash'] == FrameManifest.file_hash( frame_files[1] )
+        assert not list( tmp_path.glob( '.*.tmp' ) )
+
+    def test_write_viewer( self, tmp_path: Path ) -> None:
+        page_name = write_viewer( tmp_path, 'frame', 'frame.json', 'Test Loop' )
+
+        page = Path( tmp_path, page_name ).read_text()
+        assert page_name == 'frame.html'
+        assert 'href="frame.json"' in page
+        assert '<title>Test Loop</title>' in page
+        assert Path( tmp_path, 'script.js' ).is_file()
+        assert Path( tmp_path, 'style.css' ).is_file()
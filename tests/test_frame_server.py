@@ -0,0 +1,192 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+import threading
+import http.client
+import pytest
+from pathlib import Path
+
+from mr_radar.frame_server import FrameServer, FrameStore
+
+
+def write( file: Path, body: bytes ) -> None:
+    file.write_bytes( body )
+
+    # Backdate the file so the store doesn't wait for it to settle
+    past = time.time() - 10
+    os.utime( file, ( past, past ) )
+
+
+@pytest.fixture
+def image_path( tmp_path: Path ) -> Path:
+    write( Path( tmp_path, 'frame_0.png' ), b'\x89PNG frame' )
+    write( Path( tmp_path, 'frame.json' ), b'{}' )
+    return tmp_path
+
+
+@pytest.fixture
+def server( image_path: Path ) -> FrameServer:
+    server = FrameServer( ( '127.0.0.1', 0 ), dict( ksjt=image_path ), scan_interval=60 )
+    thread = threading.Thread( target=server.serve_forever, daemon=True )
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def request( server: FrameServer, path: str, **headers ) -> http.client.HTTPResponse:
+    connection = http.client.HTTPConnection( *server.server_address, timeout=5 )
+    connection.request( 'GET', path, headers=headers )
+    return connection.getresponse()
+
+
+class TestFrameStore:
+
+    def test_scan( self, image_path: Path ) -> None:
+        store = FrameStore( dict( ksjt=image_path ) )
+        assert sorted( store.scan() ) == [ 'ksjt/frame.json', 'ksjt/frame_0.png' ]
+        assert store.scan() == []
+
+    def test_changed_file( self, image_path: Path ) -> None:
+        store = FrameStore( dict( ksjt=image_path ) )
+        store.scan()
+        etag = store.get( 'ksjt/frame_0.png' ).etag
+
+        write( Path( image_path, 'frame_0.png' ), b'\x89PNG newer frame' )
+        assert store.scan() == [ 'ksjt/frame_0.png' ]
+        assert store.get( 'ksjt/frame_0.png' ).etag != etag
+
+    def test_unsettled_file( self, image_path: Path ) -> None:
+        store = FrameStore( dict( ksjt=image_path ) )
+        Path( image_path, 'frame_1.png' ).write_bytes( b'\x89PNG partial' )
+        assert 'ksjt/frame_1.png' not in store.scan()
+
+    def test_deleted_file( self, image_path: Path ) -> None:
+        store = FrameStore( dict( ksjt=image_path ) )
+        store.scan()
+
+        Path( image_path, 'frame_0.png' ).unlink()
+        assert store.scan() == [ 'ksjt/frame_0.png' ]
+        assert store.get( 'ksjt/frame_0.png' ) is None
+
+
+    def test_index( self, image_path: Path ) -> None:
+        write( Path( image_path, 'radar.html' ), b'<html>reflectivity</html>' )
+        write( Path( image_path, 'radar_velocity.html' ), b'<html>velocity</html>' )
+        write( Path( image_path, 'radar_velocity.json' ), b'{"page": "radar_velocity.html", "primary": false}' )
+
+        store = FrameStore( dict( ksjt=image_path ) )
+        store.scan()
+
+        # Only the velocity manifest is published so far
+        assert store.index( 'ksjt' ).body == b'<html>velocity</html>'
+
+        write( Path( image_path, 'radar.json' ), b'{"page": "radar.html", "primary": true}' )
+        store.scan()
+        assert store.index( 'ksjt' ).body == b'<html>reflectivity</html>'
+
+        Path( image_path, 'radar.json' ).unlink()
+        store.scan()
+        assert store.index( 'ksjt' ).body == b'<html>velocity</html>'
+
+    def test_index_without_manifest( self, image_path: Path ) -> None:
+        store = FrameStore( dict( ksjt=image_path ) )
+        store.scan()
+        assert store.index( 'ksjt' ) is None
+
+        write( Path( image_path, 'radar.html' ), b'<html></html>' )
+        store.scan()
+        assert store.index( 'ksjt' ).body == b'<html></html>'
+
+    def test_index_while_scanning( self, image_path: Path ) -> None:
+        for i in range( 200 ):
+            write( Path( image_path, f"radar_{i}.json" ), b'{"page": "radar.html"}' )
+
+        store = FrameStore( dict( ksjt=image_path ) )
+        store.scan()
+
+        # Switch threads as often as possible, so the scan adds and drops files while an index is listing them
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval( 1e-6 )
+
+        errors = []
+        done = threading.Event()
+
+        def index() -> None:
+            while not done.is_set():
+                try:
+                    store.index( 'ksjt' )
+                except RuntimeError as error:
+                    errors.append( error )
+                    return
+
+        thread = threading.Thread( target=index )
+        thread.start()
+
+        try:
+            for i in range( 200 ):
+                file = Path( image_path, f"radar_{i}.json" )
+                body = file.read_bytes()
+                file.unlink()
+                store.scan()
+                write( file, body )
+                store.scan()
+        finally:
+            done.set()
+            thread.join()
+            sys.setswitchinterval( interval )
+
+        assert not errors
+
+
+class TestFrameServer:
+
+    def test_get( self, server: FrameServer ) -> None:
+        response = request( server, '/ksjt/frame_0.png' )
+        assert response.status == 200
+        assert response.read() == b'\x89PNG frame'
+        assert response.getheader( 'Content-Type' ) == 'image/png'
+        assert response.getheader( 'ETag' ).startswith( '"' )
+
+    def test_not_modified( self, server: FrameServer ) -> None:
+        etag = request( server, '/ksjt/frame_0.png' ).getheader( 'ETag' )
+        response = request( server, '/ksjt/frame_0.png', **{ 'If-None-Match': etag } )
+        assert response.status == 304
+        assert response.read() == b''
+
+    def test_versioned_url( self, server: FrameServer ) -> None:
+        served = server.store.get( 'ksjt/frame_0.png' )
+        response = request( server, f"/ksjt/frame_0.png?v={served.hash}" )
+        assert 'immutable' in response.getheader( 'Cache-Control' )
+
+    def test_directory_index( self, server: FrameServer, image_path: Path ) -> None:
+        write( Path( image_path, 'radar.html' ), b'<html></html>' )
+        write( Path( image_path, 'radar.json' ), b'{"page": "radar.html", "primary": true}' )
+        server.store.scan()
+
+        response = request( server, '/ksjt/' )
+        assert response.status == 200
+        assert response.read() == b'<html></html>'
+
+    def test_not_found( self, server: FrameServer ) -> None:
+        assert request( server, '/ksjt/frame_9.png' ).status == 404
+        assert request( server, '/kdyx/events' ).status == 404
+
+    def test_events( self, server: FrameServer, image_path: Path ) -> None:
+        response = request( server, '/ksjt/events' )
+        assert response.getheader( 'Content-Type' ) == 'text/event-stream'
+        assert response.readline() == b'retry: 5000\n'
+        response.readline()
+
+        write( Path( image_path, 'frame.json' ), b'{"frames": []}' )
+        server.store.scan()
+
+        lines = [ response.readline() for _ in range( 3 ) ]
+        assert lines[1] == b'event: manifest\n'
+        assert b'"file": "frame.json"' in lines[2]
@@ -0,0 +1,205 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import tracemalloc
+import numpy as np
+import pytest
+from pathlib import Path
+
+from mr_radar import frame_generator, mosaic_generator, radar_loop_generator
+from mr_radar.grid_batches import GridBatches, RENDER_OVERHEAD, grid_nbytes
+from mr_radar.frame_generator import FrameGenerator
+from mr_radar.mosaic_generator import MosaicGenerator
+from mr_radar.rlg_exception import RLGValueError
+
+SHAPE  = ( 256, 256 )
+FRAMES = 40
+BUDGET = 8 * 2**20
+
+
+class FakeGrid:
+
+    def __init__( self, time: int ) -> None:
+        self.time = time
+        self.data = np.full( SHAPE, time, dtype=np.float32 )
+        self.lons, self.lats = np.meshgrid( np.arange( SHAPE[1], dtype=np.float32 ), np.arange( SHAPE[0], dtype=np.float32 ) )
+
+    def getRawData( self ) -> np.ndarray:
+        return self.data
+
+    def getLatLonCoords( self ) -> ( np.ndarray, np.ndarray ):
+        return self.lons, self.lats
+
+
+def fetch( times: [ int ] ) -> [ FakeGrid ]:
+    return [ FakeGrid( time ) for time in times ]
+
+
+def render( grid: FakeGrid ) -> float:
+    # Stands in for drawing the frame, which needs a few copies of the grid
+    work = [ grid.data.astype( np.float64 ) for _ in range( RENDER_OVERHEAD // 2 ) ]
+    return float( sum( w.sum() for w in work ) )
+
+
+def peak_memory( batches: GridBatches ) -> ( int, [ int ] ):
+    tracemalloc.start()
+    try:
+        times = []
+        for grid in batches:
+            render( grid )
+            times.append( grid.time )
+        return tracemalloc.get_traced_memory()[1], times
+    finally:
+        tracemalloc.stop()
+
+
+class FakeRequest:
+
+    def __init__( self ) -> None:
+        self.parameters = []
+
+    def addIdentifier( self, key: str, value ) -> None:
+        pass
+
+    def setParameters( self, *parameters: str ) -> None:
+        self.parameters = list( parameters )
+
+    def setLevels( self, level ) -> None:
+        pass
+
+
+class FakeRadarGrid( FakeGrid ):
+    """A scan around KSJT, as EDEX would return it"""
+
+    def __init__( self, time, parameter: str ) -> None:
+        super().__init__( time.getRefTime().getTime() )
+        self.data_time = time
+        self.parameter = parameter
+        self.lons, self.lats = np.meshgrid( np.linspace( -103, -98, SHAPE[1] ), np.linspace( 29, 34, SHAPE[0] ) )
+        self.data = np.random.default_rng( 0 ).uniform( -30, 70, SHAPE ).astype( np.float32 )
+
+    def getDataTime( self ):
+        return self.data_time
+
+    def getParameter( self ) -> str:
+        return self.parameter
+
+    def getLevel( self ) -> str:
+        return '0.5TILT'
+
+
+class FakeDataAccessLayer:
+    """Serves FRAMES scans, but none for the newest, and records how many grids each fetch asks for"""
+
+    def __init__( self ) -> None:
+        from dynamicserialize.dstypes.com.raytheon.uf.common.time import DataTime
+        self.times = [ DataTime( f"2023-11-14 {hour:02d}:{minute:02d}:00" ) for hour in range( 4 ) for minute in range( 0, 60, 5 ) ][:FRAMES]
+        self.missing = str( self.times[-1] )
+        self.fetches = []
+
+    def newDataRequest( self, *args, **kwargs ) -> FakeRequest:
+        return FakeRequest()
+
+    def getAvailableLevels( self, request: FakeRequest ) -> [ str ]:
+        return [ '0.5TILT' ]
+
+    def getAvailableTimes( self, request: FakeRequest, refTimeOnly: bool=False ) -> list:
+        return self.times
+
+    def getGridData( self, request: FakeRequest, times: list ) -> [ FakeRadarGrid ]:
+        self.fetches.append( len( times ) )
+        return [ FakeRadarGrid( time, name ) for name in request.parameters for time in times if str( time ) != self.missing ]
+
+
+class TestGridBatches:
+
+    def test_order( self ) -> None:
+        assert list( grid.time for grid in GridBatches( [ 3, 2, 1 ], fetch, grid_nbytes ) ) == [ 3, 2, 1 ]
+
+    def test_len( self ) -> None:
+        assert len( GridBatches( [ 3, 2, 1 ], fetch, grid_nbytes, BUDGET ) ) == 3
+
+    def test_batch_size( self ) -> None:
+        batches = GridBatches( [], fetch, grid_nbytes, BUDGET )
+        assert batches.batch_size( 2**20 ) == ( BUDGET // 2**20 ) - RENDER_OVERHEAD
+        assert batches.batch_size( BUDGET ) == 1
+
+    def test_peak_memory_within_budget( self ) -> None:
+        peak, times = peak_memory( GridBatches( list( range( FRAMES ) ), fetch, grid_nbytes, BUDGET ) )
+        assert times == list( range( FRAMES ) )
+        assert peak < BUDGET
+
+    def test_unbounded_exceeds_budget( self ) -> None:
+        # Sanity check that the budget is actually what keeps the batched run small
+        peak, _ = peak_memory( GridBatches( list( range( FRAMES ) ), fetch, grid_nbytes ) )
+        assert peak > BUDGET
+
+    def test_invalid_budget( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            FrameGenerator( site_id='KSJT', memory_budget=4 )
+
+    def test_newest_missing( self ) -> None:
+        served = dict( zip( range( FRAMES ), fetch( range( FRAMES ) ) ) )
+        fetches = []
+
+        def sparse_fetch( times: [ int ] ) -> [ FakeGrid ]:
+            fetches.append( len( times ) )
+            return [ served[time] for time in times if time != 0 ]
+
+        batches = GridBatches( list( range( FRAMES ) ), sparse_fetch, grid_nbytes, BUDGET )
+        batch_size = batches.batch_size( grid_nbytes( served[1] ) )
+
+        assert [ grid.time for grid in batches ] == list( range( 1, FRAMES ) )
+
+        # Measured on the first grid that came back, rather than staying at one grid per fetch
+        assert fetches[:3] == [ 1, 1, batch_size ]
+        assert sum( fetches ) == FRAMES
+
+    def test_fetch_and_draw( self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch ) -> None:
+        DataAccessLayer = FakeDataAccessLayer()
+        monkeypatch.setattr( frame_generator, 'data_access_layer', lambda: DataAccessLayer )
+        monkeypatch.setattr( radar_loop_generator, 'data_access_layer', lambda: DataAccessLayer )
+
+        generator = FrameGenerator( site_id='KSJT', output_path=str( tmp_path ), frames=FRAMES, memory_budget=16 )
+        generator.site_coords = ( 31.37, -100.49 )
+        generator._start_run()
+
+        products = generator.product_list
+        response = generator._fetch_data( products )[ products[0].product ]
+
+        assert len( response ) == FRAMES
+        assert not DataAccessLayer.fetches
+
+        generator.make_figure()
+        try:
+            with generator._rendering( products[0] ):
+                frames = [ frame.time for frame in generator._draw_frames( response ) ]
+        finally:
+            generator.close_figure()
+
+        # Newest first, less the missing newest scan, which costs one fetch before the batch size is known
+        assert frames == [ time.getRefTime().getTime() for time in DataAccessLayer.times[-2::-1] ]
+        assert DataAccessLayer.fetches[:2] == [ 1, 1 ]
+        assert max( DataAccessLayer.fetches ) > 1
+        assert sum( DataAccessLayer.fetches ) == FRAMES
+
+
+    def test_iter_frames_writes_nothing( self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch ) -> None:
+        DataAccessLayer = FakeDataAccessLayer()
+        monkeypatch.setattr( frame_generator, 'data_access_layer', lambda: DataAccessLayer )
+        monkeypatch.setattr( radar_loop_generator, 'data_access_layer', lambda: DataAccessLayer )
+        monkeypatch.setattr( mosaic_generator, 'data_access_layer', lambda: DataAccessLayer )
+
+        generator = FrameGenerator( site_id='KSJT', output_path=str( tmp_path ), frames=3 )
+        generator.site_coords = ( 31.37, -100.49 )
+
+        assert len( list( generator.iter_frames() ) ) == 2
+
+        mosaic = MosaicGenerator( site_id='KSJT', sites=[ 'KDYX' ], output_path=str( tmp_path ), frames=3, bbox=[ -103, 29, -98, 34 ] )
+        mosaic.sites_coords = { 'KSJT': ( 31.37, -100.49 ), 'KDYX': ( 32.54, -99.25 ) }
+
+        assert len( list( mosaic.iter_frames() ) ) == 2
+
+        # Neither the colormap, EDEX's metadata nor the settings of the run were saved
+        assert not list( tmp_path.rglob( '*' ) )
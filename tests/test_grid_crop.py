@@ -0,0 +1,47 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mr_radar.grid_crop import crop_slices, geometry_key
+
+BBOX = [ -101.0, 31.0, -100.0, 32.0 ]
+
+
+@pytest.fixture( scope='class' )
+def grid() -> ( np.ndarray, np.ndarray ):
+    return np.meshgrid( np.linspace( -105, -96, 91 ), np.linspace( 28, 35, 71 ) )
+
+
+class TestGridCrop:
+
+    def test_crop( self, grid: tuple ) -> None:
+        lons, lats = grid
+        rows, cols = crop_slices( lons, lats, BBOX, margin=0 )
+
+        assert lats[rows, cols].min() == pytest.approx( 31.0 )
+        assert lats[rows, cols].max() == pytest.approx( 32.0 )
+        assert lons[rows, cols].min() == pytest.approx( -101.0 )
+        assert lons[rows, cols].max() == pytest.approx( -100.0 )
+
+    def test_margin( self, grid: tuple ) -> None:
+        lons, lats = grid
+        rows, cols = crop_slices( lons, lats, BBOX, margin=2 )
+        assert ( rows.stop - rows.start, cols.stop - cols.start ) == ( 15, 15 )
+
+    def test_margin_clamped( self, grid: tuple ) -> None:
+        lons, lats = grid
+        rows, cols = crop_slices( lons, lats, [ -106, 27, -100, 32 ], margin=5 )
+        assert rows.start == 0 and cols.start == 0
+
+    def test_outside( self, grid: tuple ) -> None:
+        lons, lats = grid
+        rows, cols = crop_slices( lons, lats, [ -90, 40, -89, 41 ] )
+        assert lons[rows, cols].size == 0
+
+    def test_geometry_key( self, grid: tuple ) -> None:
+        lons, lats = grid
+        assert geometry_key( lons, lats ) == geometry_key( lons.copy(), lats.copy() )
+        assert geometry_key( lons, lats ) != geometry_key( lons + 1, lats )
@@ -0,0 +1,51 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pathlib import Path
+from PIL import Image
+
+from mr_radar.indexed_palette import IndexedPalette
+from mr_radar.frame_generator import FRAME_ALPHA, indexed_palette, colormap_lut
+
+PALETTE = indexed_palette()
+
+
+@pytest.fixture( scope='class' )
+def rgba() -> np.ndarray:
+    # Every palette color, tiled into a small image
+    colors = np.resize( PALETTE.palette, ( 32 * 32, 4 ) )
+    return colors.reshape( 32, 32, 4 )
+
+
+class TestIndexedPalette:
+
+    def test_palette_size( self ) -> None:
+        assert len( PALETTE ) <= 256
+
+    def test_first_entry_transparent( self ) -> None:
+        assert PALETTE.palette[0][3] == 0
+
+    def test_plotted_alpha( self ) -> None:
+        palette = IndexedPalette( colormap_lut().colors, FRAME_ALPHA )
+        assert round( FRAME_ALPHA * 255 ) in palette.palette[:, 3]
+
+    def test_exact_colors( self, rgba: np.ndarray ) -> None:
+        indices = PALETTE.quantize( rgba )
+        assert np.array_equal( PALETTE.palette[ indices ], rgba )
+
+    def test_transparent_pixels( self ) -> None:
+        rgba = np.zeros( ( 4, 4, 4 ), dtype=np.uint8 )
+        rgba[..., 0] = 255
+        assert not PALETTE.quantize( rgba ).any()
+
+    def test_save( self, rgba: np.ndarray, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'frame_0.png' )
+        PALETTE.save( rgba, str( file ), dict( Source='test' ) )
+
+        with Image.open( file ) as image:
+            assert image.mode == 'P'
+            assert image.text['Source'] == 'test'
+            assert np.array_equal( np.asarray( image.convert( 'RGBA' ) ), rgba )
@@ -0,0 +1,53 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import shapely
+
+from mr_radar.label_declutter import label_boxes, declutter, CHAR_WIDTH
+
+FONT_SIZE = 10
+
+OFFSET = ( 3, -8 )
+
+
+def boxes_at( x: [ float ], y: [ float ], lengths: [ int ] ) -> np.ndarray:
+    # One data unit per point
+    return label_boxes( np.array( x, dtype=float ), np.array( y, dtype=float ), lengths, OFFSET, FONT_SIZE, 3, 1.0 )
+
+
+class TestLabelDeclutter:
+
+    def test_box_size( self ) -> None:
+        west, south, east, north = shapely.bounds( boxes_at( [ 0 ], [ 0 ], [ 10 ] ) )[0]
+
+        assert west == -3
+        assert east == pytest.approx( 3 + 10 * FONT_SIZE * CHAR_WIDTH )
+        assert south < -8 < north
+
+    def test_box_scale( self ) -> None:
+        box = label_boxes( np.zeros( 1 ), np.zeros( 1 ), [ 10 ], OFFSET, FONT_SIZE, 3, 0.5 )[0]
+        assert box.area == pytest.approx( boxes_at( [ 0 ], [ 0 ], [ 10 ] )[0].area / 4 )
+
+    def test_keeps_highest_priority( self ) -> None:
+        boxes = boxes_at( [ 0, 10, 200 ], [ 0, 0, 0 ], [ 8, 8, 8 ] )
+        assert list( declutter( boxes, [ 5000, 90000, 100 ] ) ) == [ 1, 2 ]
+
+    def test_no_overlap( self ) -> None:
+        rng = np.random.default_rng( 0 )
+        boxes = boxes_at( rng.uniform( 0, 1000, 500 ), rng.uniform( 0, 1000, 500 ), rng.integers( 4, 16, 500 ) )
+
+        kept = boxes[ declutter( boxes, rng.uniform( 0, 1, 500 ) ) ]
+
+        assert 0 < len( kept ) < 500
+        assert shapely.union_all( kept ).area == pytest.approx( shapely.area( kept ).sum() )
+
+    def test_dropped_label_blocks_nothing( self ) -> None:
+        # The middle label loses to the first, so the third, which only overlaps the middle one, is kept
+        boxes = boxes_at( [ 0, 50, 100 ], [ 0, 0, 0 ], [ 10, 10, 10 ] )
+        assert sorted( declutter( boxes, [ 3, 2, 1 ] ) ) == [ 0, 2 ]
+
+    def test_empty( self ) -> None:
+        assert len( declutter( np.array( [], dtype=object ), [] ) ) == 0
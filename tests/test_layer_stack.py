@@ -0,0 +1,113 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pathlib import Path
+
+from mr_radar import map_generator
+from mr_radar.layer_stack import LayerStack, composite, file_stamp, inputs_hash
+from mr_radar.map_generator import MapGenerator
+
+WHITE = ( 1.0, 1.0, 1.0, 1.0 )
+
+
+def solid( color: ( int, int, int, int ), shape: ( int, int )=( 4, 6 ) ) -> np.ndarray:
+    image = np.empty( ( *shape, 4 ), dtype=np.uint8 )
+    image[:] = color
+    return image
+
+
+class TestLayerStack:
+
+    def test_composite_opaque( self ) -> None:
+        result = composite( [ solid( ( 10, 20, 30, 255 ) ), solid( ( 200, 100, 50, 255 ) ) ], WHITE )
+        assert ( result == ( 200, 100, 50, 255 ) ).all()
+
+    def test_composite_transparent( self ) -> None:
+        result = composite( [ solid( ( 10, 20, 30, 255 ) ), solid( ( 200, 100, 50, 0 ) ) ], WHITE )
+        assert ( result == ( 10, 20, 30, 255 ) ).all()
+
+    def test_composite_blend( self ) -> None:
+        result = composite( [ solid( ( 0, 0, 0, 51 ) ) ], WHITE )
+        assert ( result == ( 204, 204, 204, 255 ) ).all()
+
+    def test_composite_transparent_background( self ) -> None:
+        # Two half-transparent layers over nothing keep their color and build up alpha
+        result = composite( [ solid( ( 200, 0, 0, 128 ) ), solid( ( 200, 0, 0, 128 ) ) ], ( 0.0, 0.0, 0.0, 0.0 ) )
+        assert np.abs( result.astype( int ) - ( 200, 0, 0, 192 ) ).max() <= 1
+
+    def test_composite_mismatched( self ) -> None:
+        with pytest.raises( ValueError ):
+            composite( [ solid( ( 0, 0, 0, 255 ) ), solid( ( 0, 0, 0, 255 ), ( 5, 6 ) ) ], WHITE )
+
+    def test_inputs_hash( self ) -> None:
+        inputs = dict( layer='cities', bbox=[ -101.0, 31.0, -100.0, 32.0 ] )
+
+        assert inputs_hash( inputs ) == inputs_hash( dict( reversed( inputs.items() ) ) )
+        assert inputs_hash( inputs ) != inputs_hash( dict( inputs, bbox=[ -101.0, 31.0, -100.0, 32.5 ] ) )
+
+    def test_file_stamp( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'mapdata_lake.npz' )
+        assert file_stamp( file ) is None
+        assert file_stamp( None ) is None
+
+        file.write_bytes( b'lakes' )
+        assert file_stamp( file )[1] == 5
+
+    def test_layer_inputs( self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch ) -> None:
+        generator = MapGenerator( site_id='KSJT', output_path=str( tmp_path ) )
+        generator.image_bbox = [ -101.0, 31.0, -100.0, 32.0 ]
+
+        def lakes() -> str:
+            return inputs_hash( generator._layer_inputs( 'lakes' ) )
+
+        before = lakes()
+
+        # Fetching the site's lakes, or fetching them again, renders the layer again
+        source_file = generator._site_source_file( 'mapdata.lake' )
+        source_file.parent.mkdir( parents=True )
+        source_file.write_bytes( b'lakes' )
+        fetched = lakes()
+        assert fetched != before
+
+        source_file.write_bytes( b'more lakes' )
+        assert lakes() != fetched
+
+        # As does drawing them differently
+        refetched = lakes()
+        monkeypatch.setitem( map_generator.LAYER_STYLES, 'lakes', dict( map_generator.LAYER_STYLES['lakes'], facecolor='red' ) )
+        assert lakes() != refetched
+
+        # But not the data another layer is drawn from
+        styled = lakes()
+        generator._site_source_file( 'mapdata.city' ).write_bytes( b'cities' )
+        assert lakes() == styled
+
+    def test_is_current( self, tmp_path: Path ) -> None:
+        stack = LayerStack( 'white' )
+        stack.set_layer( 'cities', Path( tmp_path, 'map_cities.png' ), 'abc' )
+
+        # Not while the file is missing
+        assert not stack.is_current( 'cities', tmp_path, 'abc' )
+
+        Path( tmp_path, 'map_cities.png' ).touch()
+
+        assert stack.is_current( 'cities', tmp_path, 'abc' )
+        assert not stack.is_current( 'cities', tmp_path, 'def' )
+        assert not stack.is_current( 'lakes', tmp_path, 'abc' )
+
+    def test_round_trip( self, tmp_path: Path ) -> None:
+        stack = LayerStack( 'white' )
+        stack.set_layer( 'topography', 'map_topography.png', 'abc' )
+        stack.set_layer( 'cities', 'map_cities.png', 'def' )
+
+        file = Path( tmp_path, 'map.layers.json' )
+        stack.dump( file )
+        loaded = LayerStack.load( file )
+
+        assert loaded.to_dict() == stack.to_dict()
+        assert loaded.files( tmp_path, [ 'topography', 'lakes', 'cities' ] ) == [
+            Path( tmp_path, 'map_topography.png' ), Path( tmp_path, 'map_cities.png' )
+        ]
@@ -0,0 +1,98 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+import shapely
+import shapely.geometry as sgeo
+from pathlib import Path
+
+from mr_radar.map_layer import MapLayer, simplify_tolerance
+
+ENVELOPE = sgeo.box( -101.0, 31.0, -100.0, 32.0 )
+
+PIXELS_PER_DEGREE = 100.0
+
+
+@pytest.fixture( scope='class' )
+def tolerance() -> float:
+    return simplify_tolerance( PIXELS_PER_DEGREE )
+
+
+@pytest.fixture( scope='class' )
+def geometries() -> list:
+    # A wiggly line crossing the envelope with far more vertices than pixels, one polygon inside it and one well outside
+    x = np.linspace( -102.0, -99.0, 30000 )
+    y = 31.5 + np.sin( x * 4000 ) * 1e-4
+
+    return [
+        sgeo.LineString( np.column_stack( [ x, y ] ) ),
+        sgeo.box( -100.8, 31.2, -100.6, 31.4 ),
+        sgeo.box( -90.0, 40.0, -89.0, 41.0 )
+    ]
+
+
+@pytest.fixture( scope='class' )
+def layer( geometries: list, tolerance: float ) -> MapLayer:
+    key = MapLayer.make_key( 'mapdata.test', ENVELOPE, tolerance )
+    return MapLayer.build( key, geometries, ENVELOPE, tolerance )
+
+
+class TestMapLayer:
+
+    def test_tolerance( self, tolerance: float ) -> None:
+        assert tolerance == pytest.approx( 0.005 )
+
+    def test_outside_dropped( self, layer: MapLayer ) -> None:
+        assert len( layer.geometries ) == 2
+
+    def test_clipped( self, layer: MapLayer, tolerance: float ) -> None:
+        west, south, east, north = shapely.total_bounds( layer.geometries )
+        assert west >= -101.0 - tolerance * 5
+        assert east <= -100.0 + tolerance * 5
+
+    def test_simplified( self, layer: MapLayer, geometries: list ) -> None:
+        assert layer.vertices < 100
+        assert MapLayer( layer.key, geometries ).vertices > 30000
+
+    def test_polygon_kept( self, layer: MapLayer ) -> None:
+        assert layer.geometries[1].equals( sgeo.box( -100.8, 31.2, -100.6, 31.4 ) )
+
+    def test_line_segments( self ) -> None:
+        polygon = sgeo.box( 0, 0, 2, 2 ).difference( sgeo.box( 0.5, 0.5, 1.5, 1.5 ) )
+        lines = sgeo.MultiLineString( [ [ ( 0, 0 ), ( 1, 1 ) ], [ ( 2, 2 ), ( 3, 3 ), ( 4, 2 ) ] ] )
+        collection = sgeo.GeometryCollection( [ sgeo.Point( 5, 5 ), sgeo.LineString( [ ( 5, 5 ), ( 6, 6 ) ] ) ] )
+
+        segments = MapLayer( 'key', [ polygon, lines, collection ] ).line_segments()
+
+        # The polygon's shell and hole, both lines, and the collection's line but not its point
+        assert [ len( segment ) for segment in segments ] == [ 5, 5, 2, 3, 2 ]
+        assert np.array_equal( segments[3], [ [ 2, 2 ], [ 3, 3 ], [ 4, 2 ] ] )
+
+    def test_no_line_segments( self ) -> None:
+        assert MapLayer( 'key', [] ).line_segments() == []
+        assert MapLayer( 'key', [ sgeo.Point( 0, 0 ) ] ).line_segments() == []
+
+    def test_empty( self, tolerance: float ) -> None:
+        assert MapLayer.build( 'key', [], ENVELOPE, tolerance ).geometries == []
+
+    def test_key( self, tolerance: float ) -> None:
+        key = MapLayer.make_key( 'mapdata.county', ENVELOPE, tolerance )
+        assert key != MapLayer.make_key( 'mapdata.county', ENVELOPE, tolerance * 2 )
+        assert key != MapLayer.make_key( 'mapdata.lake', ENVELOPE, tolerance )
+        assert MapLayer.file_name( key ).startswith( 'mapdata_county_' )
+
+    def test_save_load( self, layer: MapLayer, tmp_path: Path ) -> None:
+        file = Path( tmp_path, MapLayer.file_name( layer.key ) )
+        layer.save( file )
+
+        loaded = MapLayer.load( file )
+        assert loaded.key == layer.key
+        assert all( a.equals( b ) for a, b in zip( loaded.geometries, layer.geometries ) )
+        assert not list( tmp_path.glob( '.*.tmp.npz' ) )
+
+    def test_save_load_empty( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'empty.npz' )
+        MapLayer( 'key', [] ).save( file )
+        assert MapLayer.load( file ).geometries == []
@@ -0,0 +1,135 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from mr_radar.metadata_cache import MetadataCache
+
+TTL = dict( levels=3600, times=60 )
+
+
+class Clock:
+
+    def __init__( self ) -> None:
+        self.now = 1000.0
+
+    def __call__( self ) -> float:
+        return self.now
+
+
+class Fetch:
+
+    def __init__( self, value ) -> None:
+        self.value = value
+        self.calls = 0
+
+    def __call__( self ):
+        self.calls += 1
+        return self.value
+
+
+class TestMetadataCache:
+
+    def test_within_ttl( self ) -> None:
+        clock = Clock()
+        cache = MetadataCache( ttl=TTL, clock=clock )
+        fetch = Fetch( [ '0.5TILT' ] )
+
+        assert cache.get( 'levels', [ 'KSJT' ], fetch ) == [ '0.5TILT' ]
+        clock.now += 3599
+        assert cache.get( 'levels', [ 'KSJT' ], fetch ) == [ '0.5TILT' ]
+        assert fetch.calls == 1
+
+    def test_expired( self ) -> None:
+        clock = Clock()
+        cache = MetadataCache( ttl=TTL, clock=clock )
+        fetch = Fetch( [ 1, 2 ] )
+
+        cache.get( 'times', [ 'KSJT', 'Reflectivity' ], fetch )
+        clock.now += 60
+        cache.get( 'times', [ 'KSJT', 'Reflectivity' ], fetch )
+
+        assert fetch.calls == 2
+
+    def test_keys( self ) -> None:
+        cache = MetadataCache( ttl=TTL, clock=Clock() )
+
+        assert cache.get( 'levels', [ 'KSJT' ], Fetch( 'a' ) ) == 'a'
+        assert cache.get( 'levels', [ 'KDYX' ], Fetch( 'b' ) ) == 'b'
+        assert cache.get( 'times', [ 'KSJT' ], Fetch( 'c' ) ) == 'c'
+
+    def test_no_ttl( self ) -> None:
+        cache = MetadataCache( ttl=TTL, clock=Clock() )
+        fetch = Fetch( 'a' )
+
+        cache.get( 'products', [ 'KSJT' ], fetch )
+        cache.get( 'products', [ 'KSJT' ], fetch )
+
+        assert fetch.calls == 2
+
+    def test_codec( self ) -> None:
+        cache = MetadataCache( ttl=TTL, clock=Clock() )
+        codec = dict( encode=lambda values: [ str( value ) for value in values ], decode=lambda values: [ int( value ) for value in values ] )
+
+        # The same types come back whether they were fetched or cached
+        assert cache.get( 'times', [ 'KSJT' ], Fetch( [ 1, 2 ] ), **codec ) == [ 1, 2 ]
+        assert cache.get( 'times', [ 'KSJT' ], Fetch( [ 3 ] ), **codec ) == [ 1, 2 ]
+
+    def test_shared_on_disk( self, tmp_path: Path ) -> None:
+        clock = Clock()
+        file = Path( tmp_path, 'metadata.json' )
+
+        MetadataCache( file, TTL, clock ).get( 'levels', [ 'KSJT' ], Fetch( [ '0.5TILT' ] ) )
+        MetadataCache( file, TTL, clock ).get( 'levels', [ 'KDYX' ], Fetch( [ '0.5TILT' ] ) )
+
+        fetch = Fetch( [ 'other' ] )
+        cache = MetadataCache( file, TTL, clock )
+
+        assert cache.get( 'levels', [ 'KSJT' ], fetch ) == [ '0.5TILT' ]
+        assert cache.get( 'levels', [ 'KDYX' ], fetch ) == [ '0.5TILT' ]
+        assert fetch.calls == 0
+
+    def test_expired_dropped_from_disk( self, tmp_path: Path ) -> None:
+        clock = Clock()
+        file = Path( tmp_path, 'metadata.json' )
+        cache = MetadataCache( file, TTL, clock )
+
+        cache.get( 'times', [ 'KSJT' ], Fetch( [ 1 ] ) )
+        clock.now += 120
+        cache.get( 'levels', [ 'KSJT' ], Fetch( [ '0.5TILT' ] ) )
+
+        assert list( json.loads( file.read_text() ) ) == [ 'levels|KSJT' ]
+
+    def test_unreadable( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'metadata.json' )
+        file.write_text( '{ not json' )
+
+        cache = MetadataCache( file, TTL, Clock() )
+
+        assert cache.get( 'levels', [ 'KSJT' ], Fetch( [ '0.5TILT' ] ) ) == [ '0.5TILT' ]
+        assert 'levels|KSJT' in json.loads( file.read_text() )
+
+    def test_put( self ) -> None:
+        clock = Clock()
+        cache = MetadataCache( ttl=TTL, clock=clock )
+        fetch = Fetch( [ 1 ] )
+
+        cache.get( 'times', [ 'KSJT' ], fetch )
+        cache.put( 'times', [ 'KSJT' ], [ 1, 2 ] )
+
+        assert cache.get( 'times', [ 'KSJT' ], fetch ) == [ 1, 2 ]
+        assert fetch.calls == 1
+
+    def test_peek( self ) -> None:
+        clock = Clock()
+        cache = MetadataCache( ttl=TTL, clock=clock )
+
+        assert cache.peek( 'times', [ 'KSJT' ] ) is None
+
+        cache.put( 'times', [ 'KSJT' ], [ 1 ] )
+        assert cache.peek( 'times', [ 'KSJT' ] ) == [ 1 ]
+
+        clock.now += 120
+        assert cache.peek( 'times', [ 'KSJT' ] ) is None
@@ -7,6 +7,7 @@ from pathlib import Path
 
 from mr_radar.rlg_defaults import RLGDefaults
 from mr_radar.map_generator import MapGenerator
+from mr_radar.rlg_exception import RLGValueError
 
 SITE_ID = 'KSJT'
 
@@ -30,3 +31,41 @@ class TestMGInstanceDefaults:
         """ the full image pathname should be <root>/<site_id>/map.png
         """
         assert generator.image_file_path_name == str( image_path )
+
+    def test_default_topography( self, generator: MapGenerator ) -> None:
+        assert generator.topography == RLGDefaults.topography
+
+    def test_invalid_topography( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            MapGenerator( site_id=SITE_ID, topography='foobar' )
+
+    def test_default_layered( self, generator: MapGenerator ) -> None:
+        assert generator.layered == RLGDefaults.layered
+        assert generator.rebuild_layers == []
+
+    def test_layer_file_path_names( self, generator: MapGenerator, image_path: Path ) -> None:
+        assert generator.layer_file_path_name( 'cities' ) == str( image_path.with_name( 'map_cities.png' ) )
+        assert generator.layer_stack_file_path_name == str( image_path.with_name( 'map.layers.json' ) )
+
+    def test_invalid_rebuild_layers( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            MapGenerator( site_id=SITE_ID, rebuild_layers=[ 'cities', 'foobar' ] )
+
+    def test_default_source_radius( self, generator: MapGenerator ) -> None:
+        assert generator.source_radius == RLGDefaults.source_radius
+        assert generator.source_envelope == generator.image_envelope
+
+    def test_invalid_source_radius( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            MapGenerator( site_id=SITE_ID, source_radius=1000 )
+
+    def test_rebuild_layers_refresh( self ) -> None:
+        generator = MapGenerator( site_id=SITE_ID, rebuild_layers=[ 'cities' ] )
+
+        generator._current_layer = 'highways'
+        assert not generator._refreshing( 'source', 'mapdata.interstate' )
+
+        # Fetched again the first time the rebuilt layer asks for it, and reused after that
+        generator._current_layer = 'cities'
+        assert generator._refreshing( 'source', 'mapdata.city' )
+        assert not generator._refreshing( 'source', 'mapdata.city' )
@@ -0,0 +1,79 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from mr_radar.mosaic_grid import MosaicGrid
+from mr_radar.mosaic_generator import MosaicGenerator
+from mr_radar.rlg_exception import RLGValueError
+
+BBOX = [ -101.0, 31.0, -99.0, 32.0 ]
+
+
+@pytest.fixture
+def grid() -> MosaicGrid:
+    return MosaicGrid( BBOX, 0.1, fill_passes=0 )
+
+
+def layer( lon: float, lat: float, value: float ) -> ( np.ndarray, np.ndarray, np.ndarray ):
+    return np.array( [[ lon ]] ), np.array( [[ lat ]] ), np.ma.masked_invalid( [[ value ]] )
+
+
+class TestMosaicGrid:
+
+    def test_shape( self, grid: MosaicGrid ) -> None:
+        assert grid.shape == ( 10, 20 )
+
+    def test_max_composite( self, grid: MosaicGrid ) -> None:
+        data = grid.composite( [ ( 'KSJT', *layer( -100.05, 31.55, 20 ) ), ( 'KDYX', *layer( -100.05, 31.55, 45 ) ) ] )
+        assert data[5, 9] == 45
+        assert data.count() == 1
+
+    def test_outside_ignored( self, grid: MosaicGrid ) -> None:
+        data = grid.composite( [ ( 'KSJT', *layer( -95.0, 31.5, 30 ) ) ] )
+        assert data.count() == 0
+
+    def test_masked_not_filled( self ) -> None:
+        grid = MosaicGrid( BBOX, 0.1 )
+        lons, lats = np.meshgrid( np.arange( -100.95, -99.0, 0.1 ), np.arange( 31.05, 32.0, 0.1 ) )
+        data = np.ma.masked_all( lons.shape )
+        data[0, 0] = 10
+
+        composite = grid.composite( [ ( 'KSJT', lons, lats, data ) ] )
+        assert composite.count() == 1
+
+    def test_gaps_filled( self ) -> None:
+        grid = MosaicGrid( BBOX, 0.1, fill_passes=1 )
+        lons = np.array( [[ -100.05, -99.85 ]] )
+        lats = np.array( [[ 31.55, 31.55 ]] )
+
+        composite = grid.composite( [ ( 'KSJT', lons, lats, np.ma.masked_invalid( [[ 20, 40 ]] ) ) ] )
+        assert composite[5, 10] == 40
+
+    def test_cached_indices( self, grid: MosaicGrid ) -> None:
+        lons, lats, _ = layer( -100.05, 31.55, 0 )
+        assert grid.locate( 'KSJT', lons, lats )[0] is grid.locate( 'KSJT', lons + 1, lats )[0]
+
+
+class TestMosaicTimes:
+
+    def test_align( self ) -> None:
+        targets, aligned = MosaicGenerator.align_times( dict( KSJT=[ 0, 300, 600 ], KDYX=[ 100, 420 ] ), 2, 150 )
+        assert targets == [ 300, 600 ]
+        assert aligned['KSJT'] == [ 300, 600 ]
+        assert aligned['KDYX'] == [ 420, None ]
+
+    def test_reference_is_newest( self ) -> None:
+        targets, _ = MosaicGenerator.align_times( dict( KSJT=[ 0, 300 ], KDYX=[ 100, 400 ] ), 1, 150 )
+        assert targets == [ 400 ]
+
+    def test_sites( self ) -> None:
+        generator = MosaicGenerator( site_id='ksjt', sites=[ 'KDYX', 'KSJT' ] )
+        assert generator.sites == [ 'KSJT', 'KDYX' ]
+        assert generator.output_name == 'mosaic_ksjt_kdyx'
+
+    def test_invalid_bbox( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            MosaicGenerator( site_id='KSJT', sites=[ 'KDYX' ], bbox=[ -99, 31, -101, 32 ] )
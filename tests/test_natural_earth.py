@@ -0,0 +1,74 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import shapefile
+import shapely
+from pathlib import Path
+
+from mr_radar.natural_earth import NaturalEarthIndex, find_shapefile, natural_earth_index, seed, shapefile_name
+
+SCALE = '50m'
+
+
+def write_lines( file: Path, lines: [ [ ( float, float ) ] ] ) -> None:
+    with shapefile.Writer( str( file ), shapeType=shapefile.POLYLINE ) as writer:
+        writer.field( 'name', 'C' )
+        for i, line in enumerate( lines ):
+            writer.line( [ line ] )
+            writer.record( str( i ) )
+
+
+class TestNaturalEarth:
+
+    def test_find_flat( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, shapefile_name( SCALE, 'coastline' ) )
+        write_lines( file, [ [ ( 0, 0 ), ( 1, 1 ) ] ] )
+
+        assert find_shapefile( [ None, Path( tmp_path, 'missing' ), tmp_path ], 'physical', 'coastline', SCALE ) == file
+
+    def test_find_cartopy_layout( self, tmp_path: Path ) -> None:
+        directory = Path( tmp_path, 'shapefiles', 'natural_earth', 'physical' )
+        directory.mkdir( parents=True )
+
+        file = Path( directory, shapefile_name( SCALE, 'coastline' ) )
+        write_lines( file, [ [ ( 0, 0 ), ( 1, 1 ) ] ] )
+
+        assert find_shapefile( [ tmp_path ], 'physical', 'coastline', SCALE ) == file
+
+    def test_find_missing( self, tmp_path: Path ) -> None:
+        assert find_shapefile( [ tmp_path ], 'physical', 'coastline', SCALE ) is None
+
+    def test_query( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, shapefile_name( SCALE, 'coastline' ) )
+        write_lines( file, [
+            [ ( -101.0, 31.0 ), ( -100.0, 32.0 ) ],
+            [ ( -90.0, 31.0 ), ( -89.0, 32.0 ) ],
+            [ ( -102.0, 31.5 ), ( -99.0, 31.5 ) ],
+        ] )
+
+        index = NaturalEarthIndex.read( file )
+        found = index.query( shapely.box( -100.8, 31.2, -100.2, 31.8 ) )
+
+        assert len( index.geometries ) == 3
+        assert len( found ) == 2
+        assert all( geometry.bounds[0] < -99 for geometry in found )
+
+    def test_query_nothing( self ) -> None:
+        index = NaturalEarthIndex( [ shapely.LineString( [ ( 0, 0 ), ( 1, 1 ) ] ) ] )
+        assert index.query( shapely.box( 10, 10, 11, 11 ) ) == []
+
+    def test_index_cached( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, shapefile_name( SCALE, 'coastline' ) )
+        write_lines( file, [ [ ( 0, 0 ), ( 1, 1 ) ] ] )
+
+        assert natural_earth_index( str( file ) ) is natural_earth_index( str( file ) )
+
+    def test_seed_keeps_existing( self, tmp_path: Path ) -> None:
+        layers = dict( coastline=( 'physical', 'coastline' ) )
+        file = Path( tmp_path, shapefile_name( SCALE, 'coastline' ) )
+        write_lines( file, [ [ ( 0, 0 ), ( 1, 1 ) ] ] )
+
+        # Nothing is downloaded for a layer that's already there
+        assert seed( tmp_path, SCALE, layers ) == [ file ]
+
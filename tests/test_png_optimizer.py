@@ -0,0 +1,59 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pathlib import Path
+from PIL import Image
+from PIL.PngImagePlugin import PngInfo
+
+from mr_radar.png_optimizer import PNGOptimizer, png_options
+
+
+@pytest.fixture
+def rgba() -> np.ndarray:
+    rgba = np.zeros( ( 64, 64, 4 ), dtype=np.uint8 )
+    rgba[16:48, 16:48] = ( 255, 128, 0, 191 )
+    return rgba
+
+
+@pytest.fixture
+def png_file( tmp_path: Path, rgba: np.ndarray ) -> Path:
+    png_info = PngInfo()
+    png_info.add_text( 'Source', 'test' )
+
+    file = Path( tmp_path, 'frame_0.png' )
+    Image.fromarray( rgba, mode='RGBA' ).save( file, pnginfo=png_info, **png_options( 0, 'default' ) )
+    return file
+
+
+class TestPNGOptimizer:
+
+    def test_png_options( self ) -> None:
+        assert png_options( 9, 'rle' ) == dict( compress_level=9, compress_type=3 )
+
+    def test_optimize( self, png_file: Path, rgba: np.ndarray ) -> None:
+        before, after = PNGOptimizer.optimize( png_file )
+
+        assert after < before
+        assert png_file.stat().st_size == after
+
+        with Image.open( png_file ) as image:
+            assert image.text['Source'] == 'test'
+            assert np.array_equal( np.asarray( image.convert( 'RGBA' ) ), rgba )
+
+    def test_already_optimal( self, png_file: Path ) -> None:
+        PNGOptimizer.optimize( png_file )
+        size = png_file.stat().st_size
+
+        before, after = PNGOptimizer.optimize( png_file )
+        assert before == after == size
+
+    def test_background( self, png_file: Path ) -> None:
+        size = png_file.stat().st_size
+
+        with PNGOptimizer( workers=2 ) as optimizer:
+            optimizer.submit( png_file )
+
+        assert png_file.stat().st_size < size
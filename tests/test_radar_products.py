@@ -0,0 +1,44 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import pytest
+
+from mr_radar.radar_products import RadarProduct, REFLECTIVITY_STYLE, product_style
+from mr_radar.frame_generator import FrameGenerator
+from mr_radar.rlg_exception import RLGValueError
+
+VALID_SITE_ID = 'KSJT'
+
+
+class TestRadarProducts:
+
+    def test_primary_product( self ) -> None:
+        product = RadarProduct.parse( 'Reflectivity', 'frame', True )
+        assert product.product == 'Reflectivity'
+        assert product.file_name == 'frame_%d.png'
+
+    def test_secondary_product( self ) -> None:
+        product = RadarProduct.parse( 'Radial Velocity', 'frame', False )
+        assert product.file_name == 'frame_radial_velocity_%d.png'
+
+    def test_named_product( self ) -> None:
+        product = RadarProduct.parse( 'Radial Velocity=vel', 'frame', False )
+        assert product.product == 'Radial Velocity'
+        assert product.file_name == 'vel_%d.png'
+
+    @pytest.mark.parametrize( 'name, label', [ ( 'Reflectivity', 'dBZ' ), ( 'Radial Velocity', 'm/s' ), ( 'One Hour Precip', 'in' ) ] )
+    def test_style( self, name: str, label: str ) -> None:
+        assert product_style( name ).label == label
+
+    def test_unknown_style( self ) -> None:
+        assert product_style( 'foobar' ) == REFLECTIVITY_STYLE
+
+    def test_generator_products( self ) -> None:
+        generator = FrameGenerator( site_id=VALID_SITE_ID, product=[ 'Reflectivity', 'Radial Velocity=vel' ] )
+        assert generator.product == 'Reflectivity'
+        assert [ p.file_name for p in generator.product_list ] == [ 'frame_%d.png', 'vel_%d.png' ]
+
+    def test_invalid_product( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            FrameGenerator( site_id=VALID_SITE_ID, product=[ '=vel' ] )
@@ -45,3 +45,11 @@ class TestRLGInvalidInstance:
         with pytest.raises( RLGValueError ):
             RadarLoopGenerator( site_id=VALID_SITE_ID, output_path=existing_file )
 
+    def test_invalid_compression( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            RadarLoopGenerator( site_id=VALID_SITE_ID, compression=10 )
+
+    def test_invalid_png_strategy( self ) -> None:
+        with pytest.raises( RLGValueError ):
+            RadarLoopGenerator( site_id=VALID_SITE_ID, png_strategy='foobar' )
+
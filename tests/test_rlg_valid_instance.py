@@ -45,6 +45,20 @@ class TestRLGValidInstance:
     def test_json_path( self, generator: RadarLoopGenerator, expected_json_file: Path ) -> None:
         assert generator.json_path == str( expected_json_file )
 
+    def test_make_figure( self, generator: RadarLoopGenerator ) -> None:
+        from matplotlib import pyplot
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+        generator.make_figure()
+
+        assert isinstance( generator.figure.canvas, FigureCanvasAgg )
+        assert not pyplot.get_fignums()
+
+        generator.close_figure()
+
+        assert generator.figure is None
+        assert generator.axes is None
+
     def test_generator( self, generator: RadarLoopGenerator, expected_json_file: Path, check ) -> None:
         generator.generate()
 
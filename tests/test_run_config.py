@@ -0,0 +1,83 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import pytest
+from pathlib import Path
+
+from mr_radar.radar_loop_generator import RadarLoopGenerator
+from mr_radar.run_config import RunConfig, FrameConfig, file_path
+
+SITE_ID = 'KSJT'
+
+
+@pytest.fixture
+def generator( tmp_path: Path ) -> RadarLoopGenerator:
+    generator = RadarLoopGenerator( site_id=SITE_ID, output_path=tmp_path, radius=100 )
+    generator.site_coords = ( 31.37, -100.49 )
+    return generator
+
+
+class TestRunConfig:
+
+    def test_frozen( self, generator: RadarLoopGenerator ) -> None:
+        generator.generate()
+
+        with pytest.raises( AttributeError ):
+            generator.config.radius = 200
+
+        with pytest.raises( AttributeError ):
+            generator.config.anything = 1
+
+    def test_fields( self ) -> None:
+        fields = FrameConfig.fields()
+
+        assert fields[ :len( RunConfig.fields() ) ] == RunConfig.fields()
+        assert 'labels' in fields and 'labels' not in RunConfig.fields()
+
+    def test_settings_checked( self, generator: RadarLoopGenerator ) -> None:
+        generator.generate()
+        settings = generator.config.to_dict()
+
+        with pytest.raises( TypeError ):
+            RunConfig( **settings, frames=12 )
+
+        settings.pop( 'radius' )
+        with pytest.raises( TypeError ):
+            RunConfig( **settings )
+
+    def test_snapshot( self, generator: RadarLoopGenerator ) -> None:
+        assert generator.config is None
+
+        generator.generate()
+        config = generator.config
+
+        assert isinstance( config, RunConfig )
+        assert generator.image_envelope is generator.image_envelope
+        assert generator.image_bbox == tuple( generator.cache.get( 'bbox' ) )
+        assert generator.image_path == str( Path( generator.output_path, SITE_ID.lower() ) )
+        assert generator.png_options == config.png_options
+
+    def test_png_options_copied( self, generator: RadarLoopGenerator ) -> None:
+        generator.generate()
+        generator.png_options[ 'extra' ] = True
+
+        assert 'extra' not in generator.png_options
+
+    def test_changed_setting( self, generator: RadarLoopGenerator ) -> None:
+        generator.generate()
+        generator.radius = 200
+
+        assert generator.config is None
+        assert generator.radius == 200
+        assert generator.image_bbox is None
+
+    def test_unchanged_setting( self, generator: RadarLoopGenerator ) -> None:
+        generator.generate()
+        generator.radius = 100
+
+        assert generator.config is not None
+
+    def test_file_path( self ) -> None:
+        assert file_path( '/data/ksjt', 'frame_%d.png' ) == str( Path( '/data/ksjt', 'frame_%d.png' ) )
+        assert file_path( '/data/ksjt', '' ) == str( Path( '/data/ksjt' ) )
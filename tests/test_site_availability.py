@@ -0,0 +1,125 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+from mr_radar.site_availability import fresh_sites
+
+SITES = [ f"K{i:03d}" for i in range( 16 ) ]
+
+
+class Query:
+    """Answers with every scan of every site asked about, without saying whose they are"""
+
+    def __init__( self, scans: { str: [ int ] } ) -> None:
+        self.scans = scans
+        self.groups = []
+
+    def __call__( self, group: [ str ] ) -> [ int ]:
+        self.groups.append( list( group ) )
+        return sorted( { time for site in group for time in self.scans.get( site, [] ) } )
+
+
+def staggered( sites: [ str ] ) -> { str: [ int ] }:
+    """Scans every 300 seconds, with each site a little behind the one before"""
+    return { site: [ 1000 * ( 300 * scan + 7 * i ) for scan in range( 10 ) ] for i, site in enumerate( sites ) }
+
+
+def newest( scans: { str: [ int ] } ) -> { str: int }:
+    return { site: times[-1] for site, times in scans.items() }
+
+
+class TestFreshSites:
+
+    def test_first_check( self ) -> None:
+        scans = staggered( SITES )
+        query = Query( scans )
+
+        found, state = fresh_sites( SITES, { site: times[-2] for site, times in scans.items() }, query )
+
+        # With nothing to compare with, every site is asked about alone
+        assert found == scans
+        assert query.groups == [ [ site ] for site in SITES ]
+        assert state['times'] == sorted( time for times in scans.values() for time in times )
+
+    def test_nothing_new( self ) -> None:
+        query = Query( { site: [ 100, 200 ] for site in SITES } )
+        _, state = fresh_sites( SITES, { site: 200 for site in SITES }, query )
+
+        query.groups.clear()
+        assert fresh_sites( SITES, { site: 200 for site in SITES }, query, previous=state )[0] == {}
+        assert query.groups == [ SITES ]
+
+    def test_nothing_new_staggered( self ) -> None:
+        scans = staggered( SITES )
+        query = Query( scans )
+        _, state = fresh_sites( SITES, newest( scans ), query )
+
+        query.groups.clear()
+        assert fresh_sites( SITES, newest( scans ), query, previous=state )[0] == {}
+        assert len( query.groups ) == 1
+
+    def test_one_fresh_staggered( self ) -> None:
+        scans = staggered( SITES )
+        last_seen = newest( scans )
+        _, state = fresh_sites( SITES, last_seen, Query( scans ) )
+
+        scans['K005'] = [ *scans['K005'], scans['K005'][-1] + 300000 ]
+        query = Query( scans )
+
+        found, state = fresh_sites( SITES, last_seen, query, previous=state )
+
+        assert found == { 'K005': scans['K005'] }
+        assert query.groups[0] == SITES
+        assert [ 'K005' ] in query.groups
+
+        # Once it's generated, nothing has changed any more
+        last_seen['K005'] = scans['K005'][-1]
+        query.groups.clear()
+
+        assert fresh_sites( SITES, last_seen, query, previous=state )[0] == {}
+        assert len( query.groups ) == 1
+
+    def test_pending( self ) -> None:
+        scans = { 'K000': [ 100 ], 'K001': [ 100 ] }
+        _, state = fresh_sites( [ 'K000', 'K001' ], { 'K000': 100, 'K001': 100 }, Query( scans ) )
+
+        scans['K001'] = [ 100, 200 ]
+        found, state = fresh_sites( [ 'K000', 'K001' ], { 'K000': 100, 'K001': 100 }, Query( scans ), previous=state )
+        assert list( found ) == [ 'K001' ]
+
+        # Found fresh, but not generated since, so it's still fresh, though the answer hasn't changed
+        query = Query( scans )
+        found, _ = fresh_sites( [ 'K000', 'K001' ], { 'K000': 100, 'K001': 100 }, query, previous=state )
+
+        assert found == { 'K001': None }
+        assert len( query.groups ) == 1
+
+    def test_order_kept( self ) -> None:
+        query = Query( { 'K001': [ 300 ], 'K003': [ 300 ] } )
+
+        assert list( fresh_sites( [ 'K003', 'K002', 'K001' ], {}, query )[0] ) == [ 'K003', 'K001' ]
+
+    def test_never_seen( self ) -> None:
+        query = Query( { 'K000': [ 100 ], 'K001': [ 100 ] } )
+
+        assert list( fresh_sites( [ 'K000', 'K001' ], { 'K000': 100 }, query )[0] ) == [ 'K001' ]
+
+    def test_no_scans( self ) -> None:
+        query = Query( {} )
+        _, state = fresh_sites( [ 'K000', 'K001' ], {}, query )
+
+        query.groups.clear()
+        assert fresh_sites( [ 'K000', 'K001' ], {}, query, previous=state )[0] == {}
+        assert len( query.groups ) == 1
+
+    def test_no_sites( self ) -> None:
+        query = Query( {} )
+
+        assert fresh_sites( [], {}, query )[0] == {}
+        assert query.groups == []
+
+    def test_time_of( self ) -> None:
+        query = Query( { 'K000': [ 100 ], 'K001': [ 300 ] } )
+        found, _ = fresh_sites( [ 'K000', 'K001' ], { 'K000': 2, 'K001': 2 }, query, lambda time: time // 100 )
+
+        assert list( found ) == [ 'K001' ]
@@ -0,0 +1,59 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import shapely
+from pathlib import Path
+
+from mr_radar.map_layer import pack_geometries, unpack_geometries
+from mr_radar.site_source import load_source, save_source, window
+
+LARGE = shapely.box( -104.0, 28.0, -97.0, 35.0 )
+SMALL = shapely.box( -102.0, 30.0, -99.0, 33.0 )
+
+
+class TestSiteSource:
+
+    def test_covered( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'source.npz' )
+        save_source( file, LARGE, dict( x=np.arange( 5.0 ) ) )
+
+        for envelope in ( LARGE, SMALL ):
+            source = load_source( file, envelope )
+            assert list( source ) == [ 'x' ]
+            assert np.array_equal( source['x'], np.arange( 5.0 ) )
+
+    def test_not_covered( self, tmp_path: Path ) -> None:
+        file = Path( tmp_path, 'source.npz' )
+        save_source( file, SMALL, dict( x=np.arange( 5.0 ) ) )
+
+        assert load_source( file, LARGE ) is None
+        assert load_source( file, shapely.box( -101.0, 31.0, -98.0, 34.0 ) ) is None
+
+    def test_geometries( self, tmp_path: Path ) -> None:
+        lines = [ shapely.LineString( [ ( -103, 29 ), ( -98, 34 ) ] ), shapely.Point( -100, 31 ) ]
+
+        file = Path( tmp_path, 'source.npz' )
+        offsets, wkb = pack_geometries( lines )
+        save_source( file, LARGE, dict( offsets=offsets, wkb=wkb ) )
+
+        source = load_source( file, SMALL )
+        assert unpack_geometries( source['offsets'], source['wkb'] ) == lines
+
+    def test_no_geometries( self ) -> None:
+        assert unpack_geometries( *pack_geometries( [] ) ) == []
+
+    def test_window( self ) -> None:
+        lons, lats = np.meshgrid( np.linspace( -104.0, -97.0, 71 ), np.linspace( 28.0, 35.0, 71 ) )
+        rows, cols = window( lons, lats, SMALL.bounds )
+
+        assert lons[rows, cols].min() < -102.0 and lons[rows, cols].max() > -99.0
+        assert lats[rows, cols].min() < 30.0 and lats[rows, cols].max() > 33.0
+        assert lons[rows, cols].shape == ( 33, 33 )
+
+    def test_window_outside( self ) -> None:
+        lons, lats = np.meshgrid( np.linspace( -104.0, -97.0, 8 ), np.linspace( 28.0, 35.0, 8 ) )
+        rows, cols = window( lons, lats, ( -90.0, 30.0, -89.0, 31.0 ) )
+
+        assert lons[rows, cols].size == 0
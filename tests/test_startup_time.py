@@ -0,0 +1,48 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import sys
+import time
+import subprocess
+import pytest
+from pathlib import Path
+
+# Cheap commands must return in well under a second, with plenty of headroom for slow CI runners
+STARTUP_BUDGET = 1.0
+
+HEAVY_MODULES = [ 'matplotlib', 'cartopy', 'shapely', 'awips', 'metpy', 'numpy', 'PIL', 'geopy' ]
+
+PACKAGE_ROOT = str( Path( __file__ ).parent.parent )
+
+
+def run( *args: str ) -> ( float, subprocess.CompletedProcess ):
+    """Best of three, to keep one-off scheduling hiccups from failing the test"""
+
+    timings = []
+    for _ in range( 3 ):
+        start = time.perf_counter()
+        result = subprocess.run( [ sys.executable, *args ], cwd=PACKAGE_ROOT, capture_output=True, text=True )
+        timings.append( time.perf_counter() - start )
+
+    return min( timings ), result
+
+
+@pytest.mark.parametrize( 'module', [ 'mr_radar.cli', 'mr_radar.radar_loop_generator', 'mr_radar.frame_generator' ] )
+def test_no_heavy_imports( module: str ) -> None:
+    code = f"import sys, {module}; print( ','.join( m for m in {HEAVY_MODULES!r} if m in sys.modules ) )"
+    result = subprocess.run( [ sys.executable, '-c', code ], cwd=PACKAGE_ROOT, capture_output=True, text=True )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ''
+
+
+def test_help_startup() -> None:
+    elapsed, result = run( '-m', 'mr_radar', '--help' )
+    assert result.returncode == 0
+    assert elapsed < STARTUP_BUDGET
+
+
+def test_validation_error_startup() -> None:
+    elapsed, result = run( '-m', 'mr_radar', 'frames', 'foobar' )
+    assert 'does not match expected format' in result.stderr
+    assert elapsed < STARTUP_BUDGET
@@ -0,0 +1,107 @@
+## -*- coding: utf-8 -*-
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+from pathlib import Path
+from matplotlib import colormaps
+
+from mr_radar.topography import TopographyRaster, NODATA, grid_axes, pixel_centers, resample, shade
+
+BBOX = [ -101.0, 31.0, -100.0, 32.0 ]
+
+
+def plane( lons: np.ndarray, lats: np.ndarray ) -> np.ndarray:
+    # Linear in both directions, so bilinear resampling reproduces it exactly
+    return 1000.0 + ( lons + 101.0 ) * 300.0 + ( lats - 31.0 ) * 500.0
+
+
+@pytest.fixture( scope='class' )
+def grid() -> ( np.ndarray, np.ndarray, np.ndarray ):
+    lons, lats = np.meshgrid( np.linspace( -102.0, -99.0, 61 ), np.linspace( 30.0, 33.0, 61 ) )
+    return lons, lats, plane( lons, lats )
+
+
+class TestTopography:
+
+    def test_grid_axes( self, grid: tuple ) -> None:
+        lons, lats, _ = grid
+        x, y = grid_axes( lons, lats )
+
+        assert np.array_equal( x, lons[0] )
+        assert np.array_equal( y, lats[:, 0] )
+
+    def test_grid_axes_curvilinear( self, grid: tuple ) -> None:
+        lons, lats, _ = grid
+        assert grid_axes( lons + lats * 0.1, lats ) is None
+
+    def test_resample( self, grid: tuple ) -> None:
+        lons, lats, values = grid
+        elevation = resample( *grid_axes( lons, lats ), values, BBOX, ( 40, 50 ) )
+
+        x, y = pixel_centers( BBOX, ( 40, 50 ) )
+        expected = plane( *np.meshgrid( x, y ) )
+
+        assert elevation.shape == ( 40, 50 )
+        assert np.allclose( elevation, expected, atol=0.1 )
+
+    def test_resample_descending( self, grid: tuple ) -> None:
+        lons, lats, values = grid
+        x, y = grid_axes( lons, lats )
+
+        ascending = resample( x, y, values, BBOX, ( 20, 20 ) )
+        descending = resample( x[::-1], y[::-1], values[::-1, ::-1], BBOX, ( 20, 20 ) )
+
+        assert np.allclose( ascending, descending )
+
+    def test_resample_outside( self, grid: tuple ) -> None:
+        lons, lats, values = grid
+        elevation = resample( *grid_axes( lons, lats ), values, [ -100.0, 32.0, -98.0, 34.0 ], ( 20, 20 ) )
+
+        assert np.isnan( elevation[ 15:, : ] ).all()
+        assert np.isnan( elevation[ :, 15: ] ).all()
+        assert not np.isnan( elevation[ :5, :5 ] ).any()
+
+    def test_shade( self, grid: tuple ) -> None:
+        lons, lats, values = grid
+        elevation = resample( *grid_axes( lons, lats ), values, BBOX, ( 20, 20 ) )
+        elevation[0, 0] = np.nan
+
+        for hillshade in ( False, True ):
+            rgba = shade( elevation, colormaps['terrain'], BBOX, hillshade=hillshade )
+
+            assert rgba.shape == ( 20, 20, 4 )
+            assert rgba[0, 0, 3] == 0
+            assert ( rgba[1:, 1:, 3] == 1 ).all()
+
+    def test_shade_nothing( self ) -> None:
+        rgba = shade( np.full( ( 4, 4 ), np.nan ), colormaps['terrain'], BBOX )
+        assert not rgba.any()
+
+    def test_raster( self, grid: tuple, tmp_path: Path ) -> None:
+        lons, lats, values = grid
+        tiles = []
+
+        def fetch( tile_bbox: list ) -> tuple:
+            tiles.append( tile_bbox )
+            return lons, lats, values
+
+        raster = TopographyRaster.build( [ -102.0, 30.0, -99.0, 33.0 ], 0.05, 1.0, fetch )
+
+        assert len( tiles ) == 9
+        assert raster.shape == ( 60, 60 )
+        assert raster.elevation.dtype == np.int16
+        assert ( raster.elevation != NODATA ).all()
+        assert raster.covers( BBOX )
+        assert not raster.covers( [ -103.0, 31.0, -100.0, 32.0 ] )
+
+        file = Path( tmp_path, 'topography.npz' )
+        raster.save( file )
+        loaded = TopographyRaster.load( file )
+
+        assert loaded.bbox == raster.bbox
+        assert loaded.resolution == raster.resolution
+
+        x, y = pixel_centers( BBOX, ( 30, 30 ) )
+        assert np.allclose( loaded.crop( BBOX, ( 30, 30 ) ), plane( *np.meshgrid( x, y ) ), atol=1.0 )